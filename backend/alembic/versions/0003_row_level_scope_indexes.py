@@ -0,0 +1,35 @@
+"""Index the columns used by row-level authorization predicates
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(op.f('ix_projects_user_id'), 'projects', ['user_id'], unique=False)
+    op.create_index(op.f('ix_budgets_project_id'), 'budgets', ['project_id'], unique=False)
+    op.create_index(op.f('ix_risks_project_id'), 'risks', ['project_id'], unique=False)
+    op.create_index(op.f('ix_risks_owner_id'), 'risks', ['owner_id'], unique=False)
+    op.create_index(op.f('ix_resources_store_number'), 'resources', ['store_number'], unique=False)
+    op.create_index(op.f('ix_project_stores_store_id'), 'project_stores', ['store_id'], unique=False)
+    op.create_index(op.f('ix_project_resources_resource_id'), 'project_resources', ['resource_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_project_resources_resource_id'), table_name='project_resources')
+    op.drop_index(op.f('ix_project_stores_store_id'), table_name='project_stores')
+    op.drop_index(op.f('ix_resources_store_number'), table_name='resources')
+    op.drop_index(op.f('ix_risks_owner_id'), table_name='risks')
+    op.drop_index(op.f('ix_risks_project_id'), table_name='risks')
+    op.drop_index(op.f('ix_budgets_project_id'), table_name='budgets')
+    op.drop_index(op.f('ix_projects_user_id'), table_name='projects')
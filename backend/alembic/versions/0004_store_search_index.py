@@ -0,0 +1,66 @@
+"""Store search index: FTS5 on SQLite, pg_trgm on PostgreSQL
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS stores_fts USING fts5(
+                store_number, name, region, district, format,
+                content='stores', content_rowid='id', tokenize='trigram'
+            )
+        """)
+        op.execute("""
+            CREATE TRIGGER IF NOT EXISTS stores_fts_ai AFTER INSERT ON stores BEGIN
+                INSERT INTO stores_fts(rowid, store_number, name, region, district, format)
+                VALUES (new.id, new.store_number, new.name, new.region, new.district, new.format);
+            END
+        """)
+        op.execute("""
+            CREATE TRIGGER IF NOT EXISTS stores_fts_ad AFTER DELETE ON stores BEGIN
+                INSERT INTO stores_fts(stores_fts, rowid, store_number, name, region, district, format)
+                VALUES ('delete', old.id, old.store_number, old.name, old.region, old.district, old.format);
+            END
+        """)
+        op.execute("""
+            CREATE TRIGGER IF NOT EXISTS stores_fts_au AFTER UPDATE ON stores BEGIN
+                INSERT INTO stores_fts(stores_fts, rowid, store_number, name, region, district, format)
+                VALUES ('delete', old.id, old.store_number, old.name, old.region, old.district, old.format);
+                INSERT INTO stores_fts(rowid, store_number, name, region, district, format)
+                VALUES (new.id, new.store_number, new.name, new.region, new.district, new.format);
+            END
+        """)
+        op.execute("INSERT INTO stores_fts(stores_fts) VALUES ('rebuild')")
+    elif dialect == 'postgresql':
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.execute("CREATE INDEX IF NOT EXISTS ix_stores_name_trgm ON stores USING gin (name gin_trgm_ops)")
+        op.execute("CREATE INDEX IF NOT EXISTS ix_stores_store_number_pattern ON stores (store_number text_pattern_ops)")
+        op.execute("CREATE INDEX IF NOT EXISTS ix_stores_district ON stores (district)")
+        op.execute("CREATE INDEX IF NOT EXISTS ix_stores_format ON stores (format)")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute("DROP TRIGGER IF EXISTS stores_fts_au")
+        op.execute("DROP TRIGGER IF EXISTS stores_fts_ad")
+        op.execute("DROP TRIGGER IF EXISTS stores_fts_ai")
+        op.execute("DROP TABLE IF EXISTS stores_fts")
+    elif dialect == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_stores_format")
+        op.execute("DROP INDEX IF EXISTS ix_stores_district")
+        op.execute("DROP INDEX IF EXISTS ix_stores_store_number_pattern")
+        op.execute("DROP INDEX IF EXISTS ix_stores_name_trgm")
@@ -0,0 +1,70 @@
+"""Full-text search: FTS5 tables on SQLite, tsvector GIN indexes on PostgreSQL
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+# table -> indexed columns, label column first (mirrors app.text_search.SEARCHABLE)
+SEARCHABLE = {
+    'tasks': ('title', 'description'),
+    'projects': ('name', 'description'),
+    'risks': ('title', 'description', 'mitigation_plan'),
+}
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    for table, columns in SEARCHABLE.items():
+        names = ', '.join(columns)
+        new_values = ', '.join('new.' + c for c in columns)
+        old_values = ', '.join('old.' + c for c in columns)
+        if dialect == 'sqlite':
+            op.execute(f"""
+                CREATE VIRTUAL TABLE IF NOT EXISTS {table}_fts USING fts5(
+                    {names}, content='{table}', content_rowid='id', tokenize='porter unicode61'
+                )
+            """)
+            op.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS {table}_fts_ai AFTER INSERT ON {table} BEGIN
+                    INSERT INTO {table}_fts(rowid, {names}) VALUES (new.id, {new_values});
+                END
+            """)
+            op.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS {table}_fts_ad AFTER DELETE ON {table} BEGIN
+                    INSERT INTO {table}_fts({table}_fts, rowid, {names}) VALUES ('delete', old.id, {old_values});
+                END
+            """)
+            op.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS {table}_fts_au AFTER UPDATE ON {table} BEGIN
+                    INSERT INTO {table}_fts({table}_fts, rowid, {names}) VALUES ('delete', old.id, {old_values});
+                    INSERT INTO {table}_fts(rowid, {names}) VALUES (new.id, {new_values});
+                END
+            """)
+            op.execute(f"INSERT INTO {table}_fts({table}_fts) VALUES ('rebuild')")
+        elif dialect == 'postgresql':
+            document = ' || '.join(
+                f"setweight(to_tsvector('english', coalesce({column}, '')), '{weight}')"
+                for column, weight in zip(columns, 'ABCD')
+            )
+            op.execute(f"CREATE INDEX IF NOT EXISTS ix_{table}_fts ON {table} USING gin (({document}))")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    for table in SEARCHABLE:
+        if dialect == 'sqlite':
+            op.execute(f"DROP TRIGGER IF EXISTS {table}_fts_au")
+            op.execute(f"DROP TRIGGER IF EXISTS {table}_fts_ad")
+            op.execute(f"DROP TRIGGER IF EXISTS {table}_fts_ai")
+            op.execute(f"DROP TABLE IF EXISTS {table}_fts")
+        elif dialect == 'postgresql':
+            op.execute(f"DROP INDEX IF EXISTS ix_{table}_fts")
@@ -0,0 +1,57 @@
+"""Normalized resource_skills index, backfilled from resources.skills
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def _normalize(skills):
+    # mirrors app.skill_matching.normalize_skills
+    if not skills:
+        return {}
+    if not isinstance(skills, dict):
+        skills = dict.fromkeys(skills)
+    normalized = {}
+    for name, level in skills.items():
+        key = " ".join(str(name).split()).lower()
+        if not key or level is False:
+            continue
+        normalized[key] = int(level) if isinstance(level, (int, float)) and not isinstance(level, bool) else None
+    return normalized
+
+
+def upgrade():
+    resource_skills = op.create_table(
+        'resource_skills',
+        sa.Column('resource_id', sa.Integer(), nullable=False),
+        sa.Column('skill', sa.String(), nullable=False),
+        sa.Column('level', sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(['resource_id'], ['resources.id'], ),
+        sa.PrimaryKeyConstraint('resource_id', 'skill')
+    )
+    op.create_index(op.f('ix_resource_skills_skill'), 'resource_skills', ['skill'], unique=False)
+
+    resources = sa.table('resources', sa.column('id', sa.Integer), sa.column('skills', sa.JSON))
+    connection = op.get_bind()
+    rows = [
+        {'resource_id': resource_id, 'skill': skill, 'level': level}
+        for resource_id, skills in connection.execute(sa.select(resources.c.id, resources.c.skills))
+        for skill, level in _normalize(skills).items()
+    ]
+    if rows:
+        op.bulk_insert(resource_skills, rows)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_resource_skills_skill'), table_name='resource_skills')
+    op.drop_table('resource_skills')
@@ -0,0 +1,40 @@
+"""Task dependency edges for critical path scheduling
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'task_dependencies',
+        sa.Column('predecessor_id', sa.Integer(), nullable=False),
+        sa.Column('successor_id', sa.Integer(), nullable=False),
+        sa.Column('project_id', sa.Integer(), nullable=False),
+        sa.Column('lag_hours', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['predecessor_id'], ['tasks.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['successor_id'], ['tasks.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ),
+        sa.PrimaryKeyConstraint('predecessor_id', 'successor_id')
+    )
+    op.create_index(op.f('ix_task_dependencies_successor_id'), 'task_dependencies', ['successor_id'], unique=False)
+    op.create_index('ix_task_dependencies_project_id_created_at', 'task_dependencies', ['project_id', 'created_at'], unique=False)
+    op.create_index('ix_tasks_project_id_updated_at', 'tasks', ['project_id', 'updated_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_tasks_project_id_updated_at', table_name='tasks')
+    op.drop_index('ix_task_dependencies_project_id_created_at', table_name='task_dependencies')
+    op.drop_index(op.f('ix_task_dependencies_successor_id'), table_name='task_dependencies')
+    op.drop_table('task_dependencies')
@@ -0,0 +1,35 @@
+"""Daily earned value snapshots
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'evm_snapshots',
+        sa.Column('project_id', sa.Integer(), nullable=False),
+        sa.Column('snapshot_date', sa.Date(), nullable=False),
+        sa.Column('bac', sa.Numeric(precision=14, scale=2), nullable=True),
+        sa.Column('pv', sa.Numeric(precision=14, scale=2), nullable=True),
+        sa.Column('ev', sa.Numeric(precision=14, scale=2), nullable=True),
+        sa.Column('ac', sa.Numeric(precision=14, scale=2), nullable=True),
+        sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ),
+        sa.PrimaryKeyConstraint('project_id', 'snapshot_date')
+    )
+    op.create_index(op.f('ix_evm_snapshots_snapshot_date'), 'evm_snapshots', ['snapshot_date'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_evm_snapshots_snapshot_date'), table_name='evm_snapshots')
+    op.drop_table('evm_snapshots')
@@ -0,0 +1,94 @@
+"""Metric rollups (day/week/month) and a time-range index on project_metrics
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+import datetime
+from decimal import Decimal
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0009'
+down_revision = '0008'
+branch_labels = None
+depends_on = None
+
+
+def _bucket_start(day, bucket):
+    # mirrors app.metric_series.bucket_start
+    if bucket == 'week':
+        return day - datetime.timedelta(days=day.weekday())
+    if bucket == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def _fold(totals, key, actual, target):
+    total = totals.setdefault(key, {
+        'count': 0, 'actual_count': 0, 'actual_sum': Decimal(0), 'actual_min': None, 'actual_max': None,
+        'target_count': 0, 'target_sum': Decimal(0), 'target_min': None, 'target_max': None,
+    })
+    total['count'] += 1
+    for name, value in (('actual', actual), ('target', target)):
+        if value is None:
+            continue
+        value = Decimal(value)
+        total[name + '_count'] += 1
+        total[name + '_sum'] += value
+        if total[name + '_min'] is None or value < total[name + '_min']:
+            total[name + '_min'] = value
+        if total[name + '_max'] is None or value > total[name + '_max']:
+            total[name + '_max'] = value
+
+
+def upgrade():
+    op.create_index('ix_project_metrics_project_name_date', 'project_metrics',
+                    ['project_id', 'metric_name', 'measurement_date'], unique=False)
+    metric_rollups = op.create_table(
+        'metric_rollups',
+        sa.Column('bucket', sa.String(), nullable=False),
+        sa.Column('metric_name', sa.String(), nullable=False),
+        sa.Column('bucket_start', sa.Date(), nullable=False),
+        sa.Column('project_id', sa.Integer(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=True),
+        sa.Column('actual_count', sa.Integer(), nullable=True),
+        sa.Column('actual_sum', sa.Numeric(precision=18, scale=2), nullable=True),
+        sa.Column('actual_min', sa.Numeric(precision=12, scale=2), nullable=True),
+        sa.Column('actual_max', sa.Numeric(precision=12, scale=2), nullable=True),
+        sa.Column('target_count', sa.Integer(), nullable=True),
+        sa.Column('target_sum', sa.Numeric(precision=18, scale=2), nullable=True),
+        sa.Column('target_min', sa.Numeric(precision=12, scale=2), nullable=True),
+        sa.Column('target_max', sa.Numeric(precision=12, scale=2), nullable=True),
+        sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ),
+        sa.PrimaryKeyConstraint('bucket', 'metric_name', 'bucket_start', 'project_id')
+    )
+
+    metrics = sa.table(
+        'project_metrics',
+        sa.column('project_id', sa.Integer), sa.column('metric_name', sa.String),
+        sa.column('measurement_date', sa.Date),
+        sa.column('actual_value', sa.Numeric), sa.column('target_value', sa.Numeric)
+    )
+    totals = {}
+    connection = op.get_bind()
+    for project_id, metric_name, day, actual, target in connection.execute(
+        sa.select(metrics.c.project_id, metrics.c.metric_name, metrics.c.measurement_date,
+                  metrics.c.actual_value, metrics.c.target_value)
+        .where(metrics.c.measurement_date != None)
+    ):
+        for bucket in ('day', 'week', 'month'):
+            _fold(totals, (bucket, metric_name, _bucket_start(day, bucket), project_id), actual, target)
+    rows = [
+        dict(zip(('bucket', 'metric_name', 'bucket_start', 'project_id'), key), **total)
+        for key, total in totals.items()
+    ]
+    if rows:
+        op.bulk_insert(metric_rollups, rows)
+
+
+def downgrade():
+    op.drop_table('metric_rollups')
+    op.drop_index('ix_project_metrics_project_name_date', table_name='project_metrics')
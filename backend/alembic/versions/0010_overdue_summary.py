@@ -0,0 +1,42 @@
+"""Overdue sweep: (status, deadline) index on tasks and the overdue_summary table
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0010'
+down_revision = '0009'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_tasks_status_deadline', 'tasks', ['status', 'deadline'], unique=False)
+    op.create_table(
+        'overdue_summary',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('project_id', sa.Integer(), nullable=True),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('overdue_count', sa.Integer(), nullable=True),
+        sa.Column('oldest_deadline', sa.DateTime(), nullable=True),
+        sa.Column('swept_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['project_id'], ['projects.id'], ),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_overdue_summary_id'), 'overdue_summary', ['id'], unique=False)
+    op.create_index(op.f('ix_overdue_summary_project_id'), 'overdue_summary', ['project_id'], unique=False)
+    op.create_index(op.f('ix_overdue_summary_user_id'), 'overdue_summary', ['user_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_overdue_summary_user_id'), table_name='overdue_summary')
+    op.drop_index(op.f('ix_overdue_summary_project_id'), table_name='overdue_summary')
+    op.drop_index(op.f('ix_overdue_summary_id'), table_name='overdue_summary')
+    op.drop_table('overdue_summary')
+    op.drop_index('ix_tasks_status_deadline', table_name='tasks')
@@ -0,0 +1,78 @@
+"""Stored child aggregates for incremental task completion roll-up
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0011'
+down_revision = '0010'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('tasks', sa.Column('child_count', sa.Integer(), nullable=True, server_default='0'))
+    op.add_column('tasks', sa.Column('child_done', sa.Integer(), nullable=True, server_default='0'))
+    op.add_column('tasks', sa.Column('child_weight', sa.Numeric(precision=12, scale=2), nullable=True, server_default='0'))
+    op.add_column('tasks', sa.Column('child_progress', sa.Numeric(precision=14, scale=2), nullable=True, server_default='0'))
+    op.add_column('projects', sa.Column('task_weight', sa.Numeric(precision=12, scale=2), nullable=True, server_default='0'))
+    op.add_column('projects', sa.Column('task_progress', sa.Numeric(precision=14, scale=2), nullable=True, server_default='0'))
+
+    # mirrors app.task_rollup.contribution: cancelled children are left out, complete ones count as 100%
+    tasks = sa.table(
+        'tasks',
+        sa.column('id', sa.Integer), sa.column('parent_id', sa.Integer), sa.column('project_id', sa.Integer),
+        sa.column('status', sa.String), sa.column('completion_percentage', sa.Integer),
+        sa.column('estimated_hours', sa.Numeric),
+        sa.column('child_count', sa.Integer), sa.column('child_done', sa.Integer),
+        sa.column('child_weight', sa.Numeric), sa.column('child_progress', sa.Numeric)
+    )
+    projects = sa.table(
+        'projects', sa.column('id', sa.Integer),
+        sa.column('task_weight', sa.Numeric), sa.column('task_progress', sa.Numeric)
+    )
+    weight = sa.case((tasks.c.estimated_hours > 0, tasks.c.estimated_hours), else_=1)
+    percent = sa.case((tasks.c.status == 'COMPLETE', 100), else_=sa.func.coalesce(tasks.c.completion_percentage, 0))
+    done = sa.func.sum(sa.case((tasks.c.status == 'COMPLETE', 1), else_=0))
+    connection = op.get_bind()
+
+    rows = connection.execute(
+        sa.select(tasks.c.parent_id, sa.func.count(), done, sa.func.sum(weight), sa.func.sum(weight * percent))
+        .where(tasks.c.parent_id != None, tasks.c.status != 'CANCELLED')
+        .group_by(tasks.c.parent_id)
+    ).all()
+    if rows:
+        connection.execute(
+            tasks.update().where(tasks.c.id == sa.bindparam('b_id')).values(
+                child_count=sa.bindparam('count'), child_done=sa.bindparam('done'),
+                child_weight=sa.bindparam('weight'), child_progress=sa.bindparam('progress')
+            ),
+            [{'b_id': r[0], 'count': r[1], 'done': r[2], 'weight': r[3], 'progress': r[4]} for r in rows]
+        )
+
+    rows = connection.execute(
+        sa.select(tasks.c.project_id, sa.func.sum(weight), sa.func.sum(weight * percent))
+        .where(tasks.c.parent_id == None, tasks.c.project_id != None, tasks.c.status != 'CANCELLED')
+        .group_by(tasks.c.project_id)
+    ).all()
+    if rows:
+        connection.execute(
+            projects.update().where(projects.c.id == sa.bindparam('b_id')).values(
+                task_weight=sa.bindparam('weight'), task_progress=sa.bindparam('progress')
+            ),
+            [{'b_id': r[0], 'weight': r[1], 'progress': r[2]} for r in rows]
+        )
+
+
+def downgrade():
+    op.drop_column('projects', 'task_progress')
+    op.drop_column('projects', 'task_weight')
+    op.drop_column('tasks', 'child_progress')
+    op.drop_column('tasks', 'child_weight')
+    op.drop_column('tasks', 'child_done')
+    op.drop_column('tasks', 'child_count')
@@ -0,0 +1,49 @@
+"""Delta sync: updated_at indexes, budgets.updated_at and the sync_tombstones table
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0012'
+down_revision = '0011'
+branch_labels = None
+depends_on = None
+
+TABLES = ('projects', 'tasks', 'budgets', 'risks')
+
+
+def upgrade():
+    op.add_column('budgets', sa.Column('updated_at', sa.DateTime(), nullable=True))
+    # rows never stamped would otherwise never show up in a delta
+    for name in TABLES:
+        table = sa.table(name, sa.column('created_at', sa.DateTime), sa.column('updated_at', sa.DateTime))
+        op.execute(
+            table.update().where(table.c.updated_at == None)
+            .values(updated_at=sa.func.coalesce(table.c.created_at, sa.func.current_timestamp()))
+        )
+        op.create_index(op.f(f'ix_{name}_updated_at'), name, ['updated_at'], unique=False)
+
+    op.create_table(
+        'sync_tombstones',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('entity', sa.String(), nullable=False),
+        sa.Column('entity_id', sa.Integer(), nullable=False),
+        sa.Column('deleted_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_sync_tombstones_id'), 'sync_tombstones', ['id'], unique=False)
+    op.create_index(op.f('ix_sync_tombstones_deleted_at'), 'sync_tombstones', ['deleted_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_sync_tombstones_deleted_at'), table_name='sync_tombstones')
+    op.drop_index(op.f('ix_sync_tombstones_id'), table_name='sync_tombstones')
+    op.drop_table('sync_tombstones')
+    for name in reversed(TABLES):
+        op.drop_index(op.f(f'ix_{name}_updated_at'), table_name=name)
+    op.drop_column('budgets', 'updated_at')
@@ -0,0 +1,27 @@
+"""Optimistic concurrency: version columns on projects, tasks, budgets and risks
+
+Revision ID: 0013
+Revises: 0012
+Create Date: 2026-10-19 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0013'
+down_revision = '0012'
+branch_labels = None
+depends_on = None
+
+TABLES = ('projects', 'tasks', 'budgets', 'risks')
+
+
+def upgrade():
+    for name in TABLES:
+        op.add_column(name, sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+
+
+def downgrade():
+    for name in reversed(TABLES):
+        op.drop_column(name, 'version')
@@ -0,0 +1,33 @@
+"""Export watermarks for incremental Parquet/Arrow exports
+
+Revision ID: 0016
+Revises: 0015
+Create Date: 2026-10-19 22:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0016'
+down_revision = '0015'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'export_watermarks',
+        sa.Column('dataset', sa.String(), nullable=False),
+        sa.Column('watermark', sa.DateTime(), nullable=False),
+        sa.Column('exported_at', sa.DateTime(), nullable=True),
+        sa.Column('row_count', sa.Integer(), nullable=True),
+        sa.PrimaryKeyConstraint('dataset')
+    )
+    # the incremental export of metrics filters on created_at
+    op.create_index(op.f('ix_project_metrics_created_at'), 'project_metrics', ['created_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_project_metrics_created_at'), table_name='project_metrics')
+    op.drop_table('export_watermarks')
@@ -0,0 +1,24 @@
+"""Index resources.email for the bulk import
+
+Revision ID: 0017
+Revises: 0016
+Create Date: 2026-10-19 23:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0017'
+down_revision = '0016'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # resource imports look up existing rows by email, one chunk at a time
+    op.create_index(op.f('ix_resources_email'), 'resources', ['email'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_resources_email'), table_name='resources')
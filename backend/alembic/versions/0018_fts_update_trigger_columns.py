@@ -0,0 +1,49 @@
+"""Reindex full-text rows only when their indexed columns are updated
+
+Revision ID: 0018
+Revises: 0017
+Create Date: 2026-10-20 09:00:00.000000
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '0018'
+down_revision = '0017'
+branch_labels = None
+depends_on = None
+
+# table -> indexed columns, label column first (mirrors app.text_search.SEARCHABLE)
+SEARCHABLE = {
+    'tasks': ('title', 'description'),
+    'projects': ('name', 'description'),
+    'risks': ('title', 'description', 'mitigation_plan'),
+}
+
+
+def _update_trigger(table, columns, watched):
+    names = ', '.join(columns)
+    new_values = ', '.join('new.' + c for c in columns)
+    old_values = ', '.join('old.' + c for c in columns)
+    op.execute(f"DROP TRIGGER IF EXISTS {table}_fts_au")
+    op.execute(f"""
+        CREATE TRIGGER {table}_fts_au AFTER UPDATE{watched} ON {table} BEGIN
+            INSERT INTO {table}_fts({table}_fts, rowid, {names}) VALUES ('delete', old.id, {old_values});
+            INSERT INTO {table}_fts(rowid, {names}) VALUES (new.id, {new_values});
+        END
+    """)
+
+
+def upgrade():
+    # PostgreSQL indexes an expression over the same columns and has no trigger
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for table, columns in SEARCHABLE.items():
+        _update_trigger(table, columns, ' OF ' + ', '.join(columns))
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    for table, columns in SEARCHABLE.items():
+        _update_trigger(table, columns, '')
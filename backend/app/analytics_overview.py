@@ -0,0 +1,83 @@
+"""
+Executive overview: the dashboard and project-performance payloads from one load.
+
+Both payloads aggregate the same four column sets (the user's projects, and the
+budgets, tasks and risks of those projects), so overview() loads each set once.
+The loaders, plus the overdue count, are independent queries: they run
+concurrently on a thread pool, each on its own session and therefore its own
+pooled connection. Engines whose pool hands every thread the same connection
+(in-memory SQLite) run them one after another instead.
+
+The time each section took is returned alongside the payload, and the router
+reports it in a Server-Timing header.
+"""
+
+import os
+import time
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool, SingletonThreadPool
+from . import models, portfolio_analytics, overdue
+
+WORKERS = int(os.getenv("ANALYTICS_OVERVIEW_WORKERS", 4))
+
+_executor = None
+
+def _pool():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="analytics-overview")
+    return _executor
+
+def _shares_connection(engine):
+    return isinstance(engine.pool, (StaticPool, SingletonThreadPool))
+
+def _timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+def _on_own_session(engine, load):
+    def run():
+        with Session(bind=engine) as session:
+            return _timed(load, session)
+    return run
+
+def load_sections(db: Session, user_id: int, now: datetime.datetime):
+    """({section: result}, {section: milliseconds}) of the shared loads."""
+    project_ids = portfolio_analytics.user_project_ids(user_id)
+    loads = {
+        "projects": lambda s: portfolio_analytics.load_projects(s, user_id),
+        "budgets": lambda s: portfolio_analytics.load_budgets(s, models.Budget.project_id.in_(project_ids)),
+        "tasks": lambda s: portfolio_analytics.load_tasks(
+            s, models.Task.user_id == user_id, models.Task.project_id.in_(project_ids)
+        ),
+        "risks": lambda s: portfolio_analytics.load_risks(s, models.Risk.project_id.in_(project_ids)),
+        "overdue": lambda s: overdue.count_for_user(s, user_id, project_ids, now),
+    }
+    engine = db.get_bind()
+    if WORKERS <= 1 or _shares_connection(engine):
+        timed = {name: _timed(load, db) for name, load in loads.items()}
+    else:
+        futures = {name: _pool().submit(_on_own_session(engine, load)) for name, load in loads.items()}
+        timed = {name: future.result() for name, future in futures.items()}
+    return {name: result for name, (result, _) in timed.items()}, {name: ms for name, (_, ms) in timed.items()}
+
+def overview(db: Session, user_id: int, now: datetime.datetime = None):
+    """({"dashboard": ..., "project_performance": [...]}, {section: milliseconds})."""
+    now = now or datetime.datetime.now()
+    start = time.perf_counter()
+    data, timings = load_sections(db, user_id, now)
+    dashboard, timings["dashboard"] = _timed(
+        portfolio_analytics.dashboard_summary,
+        data["projects"], data["budgets"], data["tasks"], data["risks"], now, data["overdue"]
+    )
+    performance, timings["performance"] = _timed(
+        portfolio_analytics.project_performance, data["projects"], data["budgets"], data["tasks"], data["risks"]
+    )
+    timings["total"] = (time.perf_counter() - start) * 1000
+    return {"dashboard": dashboard, "project_performance": performance}, timings
+
+def server_timing(timings: dict) -> str:
+    return ", ".join(f"{name};dur={ms:.1f}" for name, ms in timings.items())
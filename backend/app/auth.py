@@ -1,4 +1,7 @@
 import os
+import threading
+import time
+import uuid
 from passlib.context import CryptContext
 from datetime import datetime, timedelta
 from jose import jwt, JWTError
@@ -12,7 +15,11 @@ if not SECRET_KEY:
     raise RuntimeError("SECRET_KEY not set; set it via environment variable")
 
 ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 60*24*7))
+# Access tokens are short-lived and carry the claims needed to authorize a request,
+# so they are verified without touching the database. Refresh tokens are long-lived
+# and are the point where the user record and the revocation list are checked.
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 15))
+REFRESH_TOKEN_EXPIRE_MINUTES = int(os.getenv("REFRESH_TOKEN_EXPIRE_MINUTES", 60*24*7))
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/token")
@@ -26,19 +33,113 @@ def get_password_hash(password):
 def create_access_token(data: dict, expires_delta: timedelta = None):
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
+    to_encode.setdefault("type", "access")
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(db.get_db)):
+def create_refresh_token(username: str, expires_delta: timedelta = None):
+    return create_access_token(
+        {"sub": username, "type": "refresh"},
+        expires_delta or timedelta(minutes=REFRESH_TOKEN_EXPIRE_MINUTES)
+    )
+
+def create_user_tokens(user: models.User):
+    """Issue an access/refresh token pair; the access token embeds the authorization claims."""
+    claims = {
+        "sub": user.username,
+        "uid": user.id,
+        "role": user.role,
+        "store_number": user.store_number,
+    }
+    return {
+        "access_token": create_access_token(claims),
+        "refresh_token": create_refresh_token(user.username),
+        "token_type": "bearer"
+    }
+
+class TokenRevocationList:
+    """In-memory set of revoked token ids, pruned as the tokens themselves expire."""
+
+    def __init__(self):
+        self._revoked = {}  # jti -> exp (unix seconds)
+        self._lock = threading.Lock()
+
+    def revoke(self, jti: str, exp: float) -> bool:
+        """Revoke jti; False if it already was, so exactly one caller wins a rotation."""
+        with self._lock:
+            self._prune(time.time())
+            if jti in self._revoked:
+                return False
+            self._revoked[jti] = exp
+            return True
+
+    def is_revoked(self, jti: str) -> bool:
+        return jti in self._revoked
+
+    def _prune(self, now: float):
+        expired = [jti for jti, exp in self._revoked.items() if exp < now]
+        for jti in expired:
+            del self._revoked[jti]
+
+    def __len__(self):
+        return len(self._revoked)
+
+revocation_list = TokenRevocationList()
+
+class TokenUser:
+    """Authenticated principal rebuilt from access token claims (no DB round trip)."""
+    __slots__ = ("id", "username", "role", "store_number")
+
+    def __init__(self, id: int, username: str, role: str = "user", store_number: str = None):
+        self.id = id
+        self.username = username
+        self.role = role
+        self.store_number = store_number
+
+def decode_token(token: str, expected_type: str = "access"):
     credentials_exception = HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate credentials")
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
     except JWTError:
         raise credentials_exception
+    # tokens issued before typed tokens existed are treated as access tokens
+    if payload.get("type", "access") != expected_type or payload.get("sub") is None:
+        raise credentials_exception
+    return payload
+
+def get_token_user(token: str = Depends(oauth2_scheme)):
+    """Stateless fast path: authorize from the access token claims alone."""
+    payload = decode_token(token)
+    if payload.get("uid") is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate credentials")
+    return TokenUser(
+        id=payload["uid"],
+        username=payload["sub"],
+        role=payload.get("role") or "user",
+        store_number=payload.get("store_number")
+    )
+
+def refresh_tokens(db: Session, refresh_token: str):
+    """Rotate a refresh token: revoke the presented one and issue a fresh pair."""
+    payload = decode_token(refresh_token, expected_type="refresh")
+    jti = payload.get("jti")
+    # check-and-revoke in one step: of two concurrent refreshes with one token, only one rotates
+    if not jti or not revocation_list.revoke(jti, payload["exp"]):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Refresh token revoked")
+    user = db.query(models.User).filter(models.User.username == payload["sub"]).first()
+    if user is None or not user.is_active:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate credentials")
+    return create_user_tokens(user)
+
+def revoke_refresh_token(refresh_token: str):
+    payload = decode_token(refresh_token, expected_type="refresh")
+    if payload.get("jti"):
+        revocation_list.revoke(payload["jti"], payload["exp"])
+
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(db.get_db)):
+    credentials_exception = HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate credentials")
+    username = decode_token(token)["sub"]
     user = db.query(models.User).filter(models.User.username == username).first()
     if user is None:
         raise credentials_exception
-    return user
\ No newline at end of file
+    return user
@@ -0,0 +1,266 @@
+"""
+Streaming CSV/XLSX import of stores and resources.
+
+The upload is parsed lazily: csv.reader over the spooled upload, or openpyxl
+in read-only mode for .xlsx. Rows are taken CHUNK_ROWS at a time, so memory is
+bounded by one chunk plus the error report, which keeps at most MAX_ERRORS rows.
+Headers are matched case-insensitively, with spaces read as underscores
+("Store Number" is store_number). Unknown columns are ignored, and empty cells
+are NULL.
+
+Each row is validated with the create schema (StoreCreate, ResourceCreate).
+Invalid rows are reported by line number and skipped; the valid rows of the
+chunk are written in one batch and committed:
+- Stores are upserted on store_number with INSERT ... ON CONFLICT DO UPDATE.
+  PostgreSQL and SQLite both have it. SQLite's INSERT OR REPLACE would delete
+  and reinsert the row, giving the store a new id and orphaning its
+  project_stores rows.
+- Resources have no unique column. They are matched on email: one lookup per
+  chunk, then updates by id and a multi-row insert for the rest. Rows without
+  an email are always inserted. The resource_skills index is rewritten for the
+  chunk in one delete and one insert.
+
+An update only sets the columns present in the file, so a file without a format
+column leaves existing formats alone. When a key appears twice in a chunk, the
+later row wins. With dry_run nothing is written, and the report shows what would
+be created and updated.
+"""
+
+import io
+import os
+import csv
+import datetime
+import itertools
+import orjson
+from pydantic import ValidationError
+from sqlalchemy import select, insert, update, bindparam
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from . import models, schemas, store_search, skill_matching
+
+CHUNK_ROWS = int(os.getenv("IMPORT_CHUNK_ROWS", 1000))
+MAX_ERRORS = int(os.getenv("IMPORT_MAX_ERRORS", 1000))
+
+class ImportFileError(Exception):
+    """The file as a whole cannot be imported (format, encoding or missing columns)."""
+
+def _column_name(header) -> str:
+    return "_".join(str(header or "").strip().lower().split())
+
+def _cell(value):
+    """An XLSX cell as the text a CSV would hold."""
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))  # store numbers typed as numbers
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    return str(value)
+
+def _csv_rows(file):
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    reader = csv.reader(text)
+    header = next(reader, None)
+    if header is None:
+        return None, iter(())
+    return header, ((reader.line_num, row) for row in reader)
+
+def _xlsx_rows(file):
+    import openpyxl  # only needed for spreadsheet uploads
+    sheet = openpyxl.load_workbook(file, read_only=True, data_only=True).active
+    rows = sheet.iter_rows(values_only=True)
+    header = next(rows, None)
+    if header is None:
+        return None, iter(())
+    return header, ((line, [_cell(value) for value in row]) for line, row in enumerate(rows, start=2))
+
+def read_rows(file, filename: str, required=()):
+    """(line number, {column: text or None}) per non-empty data row; ImportFileError for unusable files."""
+    extension = os.path.splitext(filename or "")[1].lower()
+    if extension not in (".csv", ".xlsx"):
+        raise ImportFileError("Upload a .csv or .xlsx file")
+    try:
+        header, rows = _csv_rows(file) if extension == ".csv" else _xlsx_rows(file)
+    except UnicodeDecodeError:
+        raise ImportFileError("CSV files must be UTF-8 encoded")
+    except ImportFileError:
+        raise
+    except Exception as exc:
+        raise ImportFileError(f"Unreadable {extension} file: {exc}")
+    columns = [_column_name(name) for name in header or ()]
+    missing = [name for name in required if name not in columns]
+    if missing:
+        raise ImportFileError(f"Missing columns: {', '.join(missing)}")
+
+    def records():
+        try:
+            for line, values in rows:
+                record = {
+                    name: value.strip() or None if isinstance(value, str) else value
+                    for name, value in zip(columns, values) if name
+                }
+                if any(value is not None for value in record.values()):
+                    yield line, record
+        except UnicodeDecodeError:
+            raise ImportFileError("CSV files must be UTF-8 encoded")
+    return [name for name in columns if name], records()
+
+def parse_skills(text):
+    """A skills cell: a JSON object, or names with optional levels ("python:3; sql")."""
+    if text is None or isinstance(text, dict):
+        return text
+    text = text.strip()
+    if text.startswith("{"):
+        return orjson.loads(text)
+    skills = {}
+    for item in text.replace(",", ";").split(";"):
+        name, _, level = item.partition(":")
+        if name.strip():
+            skills[name.strip()] = int(level) if level.strip().isdigit() else None
+    return skills
+
+def _messages(exc: ValidationError):
+    return [f"{'.'.join(str(part) for part in error['loc']) or 'row'}: {error['msg']}" for error in exc.errors()]
+
+class Report:
+    def __init__(self):
+        self.rows = self.created = self.updated = self.failed = 0
+        self.errors = []
+
+    def fail(self, line: int, messages):
+        self.failed += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append({"row": line, "errors": messages})
+
+    def as_dict(self, dry_run: bool = False):
+        return {
+            "rows": self.rows, "created": self.created, "updated": self.updated, "failed": self.failed,
+            "dry_run": dry_run, "errors": self.errors, "errors_truncated": self.failed > len(self.errors)
+        }
+
+def _validate(chunk, schema, report: Report, prepare=None):
+    """The chunk's valid rows as dicts of the schema's fields; failures go to the report."""
+    valid = []
+    for line, record in chunk:
+        report.rows += 1
+        try:
+            if prepare is not None:
+                record = prepare(record)
+            valid.append(schema(**record).dict())
+        except ValidationError as exc:
+            report.fail(line, _messages(exc))
+        except ValueError as exc:
+            report.fail(line, [str(exc)])
+    return valid
+
+def _chunks(records, size: int):
+    while True:
+        chunk = list(itertools.islice(records, size))
+        if not chunk:
+            return
+        yield chunk
+
+def upsert_stores(db: Session, rows: list, columns) -> tuple:
+    """Insert or update stores by store_number; (created, updated). Caller commits."""
+    table = models.Store.__table__
+    rows = list({row["store_number"]: row for row in rows}.values())
+    existing = set(db.execute(
+        select(table.c.store_number).where(table.c.store_number.in_([row["store_number"] for row in rows]))
+    ).scalars())
+    now = datetime.datetime.utcnow()
+    values = [{**row, "is_active": True, "created_at": now} for row in rows]
+    changed = [name for name in ("name", "region", "district", "format") if name in columns]
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        stmt = (postgresql if dialect == "postgresql" else sqlite).insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.store_number], set_={name: stmt.excluded[name] for name in changed}
+        ) if changed else stmt.on_conflict_do_nothing(index_elements=[table.c.store_number])
+        db.execute(stmt, values)
+    else:
+        inserts = [row for row in values if row["store_number"] not in existing]
+        if inserts:
+            db.execute(insert(table), inserts)
+        updates = [
+            {"key": row["store_number"], **{name: row[name] for name in changed}}
+            for row in rows if row["store_number"] in existing
+        ]
+        if updates and changed:
+            db.execute(
+                update(table).where(table.c.store_number == bindparam("key"))
+                .values({name: bindparam(name) for name in changed}), updates
+            )
+    store_search.index_stores(db, [row["store_number"] for row in rows])
+    return len(rows) - len(existing), len(existing)
+
+def upsert_resources(db: Session, rows: list, columns) -> tuple:
+    """Update resources matched by email, insert the rest; (created, updated). Caller commits."""
+    table = models.Resource.__table__
+    emailed = {row["email"]: row for row in rows if row["email"]}
+    rows = [row for row in rows if not row["email"]] + list(emailed.values())
+    existing = dict(db.execute(
+        select(table.c.email, table.c.id).where(table.c.email.in_(list(emailed)))
+    ).all()) if emailed else {}
+    changed = [
+        name for name in ("name", "role", "store_number", "availability", "hourly_rate", "skills")
+        if name in columns
+    ]
+    updates = [
+        {"resource_id": existing[row["email"]], **{name: row[name] for name in changed}}
+        for row in rows if row["email"] in existing
+    ]
+    if updates and changed:
+        db.execute(
+            update(table).where(table.c.id == bindparam("resource_id"))
+            .values({name: bindparam(name) for name in changed}), updates
+        )
+    now = datetime.datetime.utcnow()
+    inserts = [{**row, "is_active": True, "created_at": now} for row in rows if row["email"] not in existing]
+    skills = {}
+    if inserts:
+        ids = db.execute(insert(table).returning(table.c.id, sort_by_parameter_order=True), inserts).scalars().all()
+        skills.update((resource_id, row["skills"]) for resource_id, row in zip(ids, inserts))
+    if "skills" in columns:
+        skills.update((row["resource_id"], row["skills"]) for row in updates)
+    skill_matching.sync_skills(db, skills)
+    return len(inserts), len(updates)
+
+def _prepare_resource(record: dict) -> dict:
+    if "skills" in record:
+        try:
+            record = {**record, "skills": parse_skills(record["skills"])}
+        except (ValueError, TypeError):
+            raise ValueError("skills: expected a JSON object or names like python:3; sql")
+    return record
+
+IMPORTS = {
+    # name -> create schema, required columns, upsert, row preparation
+    "stores": (schemas.StoreCreate, ("store_number", "name"), upsert_stores, None),
+    "resources": (schemas.ResourceCreate, ("name",), upsert_resources, _prepare_resource),
+}
+
+def import_file(db: Session, kind: str, file, filename: str, dry_run: bool = False, chunk_rows: int = None):
+    """Validate and upsert every row of an uploaded file; returns the report."""
+    schema, required, upsert, prepare = IMPORTS[kind]
+    columns, records = read_rows(file, filename, required)
+    report = Report()
+    table = (models.Store if kind == "stores" else models.Resource).__table__
+    for chunk in _chunks(records, chunk_rows or CHUNK_ROWS):
+        valid = _validate(chunk, schema, report, prepare)
+        if not valid:
+            continue
+        if dry_run:
+            created, updated = _count_matches(db, kind, table, valid)
+        else:
+            created, updated = upsert(db, valid, columns)
+            db.commit()
+        report.created += created
+        report.updated += updated
+    return report.as_dict(dry_run)
+
+def _count_matches(db: Session, kind: str, table, rows: list) -> tuple:
+    key = "store_number" if kind == "stores" else "email"
+    keys = {row[key] for row in rows if row[key]}
+    keyless = sum(1 for row in rows if not row[key])
+    found = len(set(db.execute(select(table.c[key]).where(table.c[key].in_(list(keys)))).scalars())) if keys else 0
+    return len(keys) - found + keyless, found
@@ -0,0 +1,250 @@
+"""
+Columnar (Parquet or Arrow IPC) export of budgets, tasks, project metrics and
+project-store assignments for BI tools.
+
+A dataset is read in one ordered select, CHUNK_ROWS rows at a time. yield_per
+makes this a server-side cursor on PostgreSQL, so memory stays at one chunk.
+Each chunk becomes an Arrow record batch and is appended to its partition's
+file. The column types come from the table:
+- Numeric(p, s) becomes decimal128(p, s).
+- Date becomes date32, and DateTime becomes timestamp[us].
+- Enums become their API string, and JSON becomes a JSON string.
+
+A run writes EXPORT_DIR/<dataset>/<run>/part-0.<ext>, or one file per
+partition in hive-style directories (fiscal_year=FY26/ or month=2026-03/,
+__HIVE_DEFAULT_PARTITION__ for NULL). A fiscal_year partition leaves that column
+out of its files, since readers take it from the directory name. Files are zstd
+compressed.
+
+Datasets with a change timestamp (updated_at, or created_at for append-only
+metrics) keep a watermark in export_watermarks. Every run exports rows stamped
+up to SETTLE_SECONDS ago and then moves the watermark there. An incremental run
+exports only rows stamped after the previous watermark. Rows that changed since
+then are exported again, so BI loads should upsert on the primary key.
+project_stores has no timestamp and is always exported in full.
+
+pyarrow is imported on the first export, so the API starts without it.
+"""
+
+import os
+import re
+import decimal
+import datetime
+import enum
+import orjson
+from sqlalchemy import select, insert, update, or_, Boolean, Date, DateTime, Enum as SQLEnum, Float, Integer, JSON, Numeric
+from sqlalchemy.orm import Session
+from . import models
+
+EXPORT_DIR = os.getenv("EXPORT_DIR", "./exports")
+CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", 50000))
+SETTLE_SECONDS = int(os.getenv("EXPORT_SETTLE_SECONDS", 5))
+
+FORMATS = {"parquet": "parquet", "arrow": "arrow"}  # format -> file extension
+NULL_PARTITION = "__HIVE_DEFAULT_PARTITION__"
+
+# name -> table, watermark column, date column of the month partition, partitionings
+DATASETS = {
+    "budgets": {
+        "table": models.Budget.__table__, "watermark": "updated_at", "month": "created_at",
+        "partitions": ("fiscal_year", "month"),
+    },
+    "tasks": {
+        "table": models.Task.__table__, "watermark": "updated_at", "month": "created_at",
+        "partitions": ("month",),
+    },
+    "metrics": {
+        "table": models.ProjectMetrics.__table__, "watermark": "created_at", "month": "measurement_date",
+        "partitions": ("month",),
+    },
+    "project_stores": {
+        "table": models.ProjectStore.__table__, "watermark": None, "month": "start_date",
+        "partitions": ("month",),
+    },
+}
+
+def validate(name: str, fmt: str = "parquet", partition_by: str = None, incremental: bool = False):
+    """ValueError (with a message for the client) unless the options apply to the dataset."""
+    spec = DATASETS[name]
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format {fmt}; use {', '.join(FORMATS)}")
+    if partition_by is not None and partition_by not in spec["partitions"]:
+        raise ValueError(f"{name} can be partitioned by {', '.join(spec['partitions'])}")
+    if incremental and spec["watermark"] is None:
+        raise ValueError(f"{name} has no change timestamp; export it in full")
+
+def column_type(column):
+    """(kind, precision, scale) of a column: int64, float64, decimal, bool, date, timestamp, json or string."""
+    sql_type = column.type
+    if isinstance(sql_type, SQLEnum):
+        return ("string", None, None)
+    if isinstance(sql_type, Float):
+        return ("float64", None, None)
+    if isinstance(sql_type, Numeric):
+        return ("decimal", sql_type.precision or 38, sql_type.scale if sql_type.scale is not None else 10)
+    if isinstance(sql_type, Boolean):
+        return ("bool", None, None)
+    if isinstance(sql_type, Integer):
+        return ("int64", None, None)
+    if isinstance(sql_type, DateTime):
+        return ("timestamp", None, None)
+    if isinstance(sql_type, Date):
+        return ("date", None, None)
+    if isinstance(sql_type, JSON):
+        return ("json", None, None)
+    return ("string", None, None)
+
+def converter(kind: str, scale: int = None):
+    """Python value -> value Arrow accepts for the kind; None when values pass through."""
+    if kind == "decimal":
+        exponent = decimal.Decimal(1).scaleb(-scale)
+        # decimal128 rejects values with more digits after the point than the scale
+        def to_decimal(value):
+            if value is None:
+                return None
+            if not isinstance(value, decimal.Decimal):
+                value = decimal.Decimal(str(value))
+            return value.quantize(exponent)
+        return to_decimal
+    if kind == "json":
+        return lambda value: None if value is None else orjson.dumps(value).decode()
+    if kind == "string":
+        return lambda value: value.name.lower() if isinstance(value, enum.Enum) else value
+    return None
+
+def partition_value(value, partition_by: str) -> str:
+    if value is None:
+        return NULL_PARTITION
+    if partition_by == "month":
+        return f"{value.year:04d}-{value.month:02d}"
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", str(value)) or NULL_PARTITION
+
+def get_watermark(db: Session, name: str):
+    table = models.ExportWatermark.__table__
+    return db.execute(select(table.c.watermark).where(table.c.dataset == name)).scalar()
+
+def _save_watermark(db: Session, name: str, watermark: datetime.datetime, rows: int, now: datetime.datetime):
+    table = models.ExportWatermark.__table__
+    values = {"watermark": watermark, "exported_at": now, "row_count": rows}
+    if db.execute(update(table).where(table.c.dataset == name).values(**values)).rowcount == 0:
+        db.execute(insert(table).values(dataset=name, **values))
+    db.commit()
+
+def stream(db: Session, name: str, since: datetime.datetime = None, until: datetime.datetime = None,
+           chunk_rows: int = CHUNK_ROWS):
+    """Lists of at most chunk_rows rows of the dataset in primary key order, within the watermark bounds."""
+    spec = DATASETS[name]
+    table = spec["table"]
+    stmt = select(table)
+    if spec["watermark"] is not None:
+        stamp = table.c[spec["watermark"]]
+        if since is not None:
+            stmt = stmt.where(stamp > since)
+        if until is not None:
+            # unstamped rows only ever appear in full exports
+            stmt = stmt.where(stamp <= until if since is not None else or_(stamp <= until, stamp.is_(None)))
+    result = db.execute(stmt.order_by(*table.primary_key.columns).execution_options(yield_per=chunk_rows))
+    yield from result.partitions()
+
+def _pyarrow():
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+    return pyarrow
+
+def arrow_schema(pa, table, names=None):
+    simple = {
+        "int64": pa.int64(), "float64": pa.float64(), "bool": pa.bool_(), "date": pa.date32(),
+        "timestamp": pa.timestamp("us"), "json": pa.string(), "string": pa.string(),
+    }
+    fields = []
+    for column in table.columns:
+        if names is not None and column.name not in names:
+            continue
+        kind, precision, scale = column_type(column)
+        arrow_type = pa.decimal128(precision, scale) if kind == "decimal" else simple[kind]
+        fields.append(pa.field(column.name, arrow_type, nullable=column.nullable))
+    return pa.schema(fields)
+
+class _Writer:
+    """One output file, appended to one record batch at a time."""
+
+    def __init__(self, pa, path: str, schema, fmt: str):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.rows = 0
+        if fmt == "parquet":
+            self._parquet = pa.parquet.ParquetWriter(path, schema, compression="zstd")
+        else:
+            self._parquet = None
+            self._sink = pa.OSFile(path, "wb")
+            self._ipc = pa.ipc.new_file(self._sink, schema, options=pa.ipc.IpcWriteOptions(compression="zstd"))
+
+    def write(self, pa, batch):
+        if self._parquet is not None:
+            self._parquet.write_table(pa.Table.from_batches([batch]))
+        else:
+            self._ipc.write_batch(batch)
+        self.rows += batch.num_rows
+
+    def close(self):
+        if self._parquet is not None:
+            self._parquet.close()
+        else:
+            self._ipc.close()
+            self._sink.close()
+
+def export(db: Session, name: str, fmt: str = "parquet", partition_by: str = None, incremental: bool = False,
+           out_dir: str = None, now: datetime.datetime = None):
+    """Write one export run; returns its manifest (files relative to out_dir, rows, watermarks)."""
+    validate(name, fmt, partition_by, incremental)
+    pa = _pyarrow()
+    now = now or datetime.datetime.utcnow()
+    out_dir = out_dir or EXPORT_DIR
+    spec = DATASETS[name]
+    table = spec["table"]
+    names = list(table.columns.keys())
+    key_column = None
+    if partition_by is not None:
+        key_column = names.index(spec["month"] if partition_by == "month" else partition_by)
+    # a partition column lives in the directory name only, as hive-style readers expect
+    kept = [i for i, name in enumerate(names) if name != partition_by]
+    schema = arrow_schema(pa, table, [names[i] for i in kept])
+    converters = [converter(kind, scale) for kind, _, scale in (column_type(table.columns[i]) for i in kept)]
+
+    tracked = spec["watermark"] is not None
+    since = get_watermark(db, name) if incremental else None
+    until = now - datetime.timedelta(seconds=SETTLE_SECONDS) if tracked else None
+    run = os.path.join(name, now.strftime("%Y%m%dT%H%M%S%fZ"))
+    writers = {}
+    try:
+        for rows in stream(db, name, since, until):
+            groups = {}
+            for row in rows:
+                key = partition_value(row[key_column], partition_by) if partition_by else None
+                groups.setdefault(key, []).append(row)
+            for key, group in groups.items():
+                columns = zip(*([row[i] for i in kept] for row in group))
+                arrays = [
+                    pa.array([convert(value) for value in values] if convert else list(values), type=field.type)
+                    for values, convert, field in zip(columns, converters, schema)
+                ]
+                if key not in writers:
+                    folder = os.path.join(run, f"{partition_by}={key}") if partition_by else run
+                    writers[key] = _Writer(pa, os.path.join(out_dir, folder, f"part-0.{FORMATS[fmt]}"), schema, fmt)
+                writers[key].write(pa, pa.RecordBatch.from_arrays(arrays, schema=schema))
+    finally:
+        for writer in writers.values():
+            writer.close()
+
+    rows = sum(writer.rows for writer in writers.values())
+    if tracked:
+        _save_watermark(db, name, until, rows, now)
+    return {
+        "dataset": name, "format": fmt, "partition_by": partition_by, "incremental": incremental,
+        "since": since, "watermark": until, "rows": rows,
+        "files": [
+            {"path": os.path.relpath(writer.path, out_dir), "rows": writer.rows}
+            for _, writer in sorted(writers.items(), key=lambda item: str(item[0]))
+        ],
+    }
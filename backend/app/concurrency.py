@@ -0,0 +1,72 @@
+"""
+Optimistic concurrency control for projects, tasks, budgets and risks.
+
+Each of those tables has a version column that SQLAlchemy uses as the mapper's
+version_id_col. An ORM flush updates a row only WHERE version still matches
+what was loaded, and increments it. The Core bulk updates (task_batch,
+task_rollup) increment it themselves. No row locks are taken, so a concurrent
+writer is detected when it flushes.
+
+Clients send the version they last read in If-Match (the ETag of the previous
+response). A mismatch raises VersionConflict, and the routes answer 409 with the
+current version. Updates without If-Match still fail with VersionConflict if the
+row changed between their own read and write, but they do not check what the
+client saw.
+
+ConflictStats counts updates and conflicts per entity in this process, for the
+conflict-rate metric at /api/analytics/conflicts.
+"""
+
+import re
+import threading
+
+class VersionConflict(Exception):
+    def __init__(self, entity: str, entity_id: int, current_version: int = None):
+        super().__init__(f"{entity} {entity_id} was modified concurrently")
+        self.entity = entity
+        self.entity_id = entity_id
+        self.current_version = current_version
+
+_ETAG = re.compile(r'^(?:W/)?"?(\d+)"?$')
+
+def parse_if_match(header: str = None):
+    """Expected version from an If-Match header ("3", W/"3" or 3); None for absent or *."""
+    if header is None or header.strip() == "*":
+        return None
+    match = _ETAG.match(header.strip())
+    if not match:
+        raise ValueError(header)
+    return int(match.group(1))
+
+def etag(version: int) -> str:
+    return f'"{version}"'
+
+class ConflictStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {}
+
+    def record(self, entity: str, conflict: bool = False):
+        with self._lock:
+            updates, conflicts = self._counts.get(entity, (0, 0))
+            self._counts[entity] = (updates + 1, conflicts + int(conflict))
+
+    def add_conflict(self, entity: str):
+        """A conflict found at flush time, for an update already recorded."""
+        with self._lock:
+            updates, conflicts = self._counts.get(entity, (0, 0))
+            self._counts[entity] = (updates, conflicts + 1)
+
+    def snapshot(self):
+        with self._lock:
+            counts = dict(self._counts)
+        return {
+            entity: {
+                "updates": updates,
+                "conflicts": conflicts,
+                "conflict_rate": round(conflicts / updates, 4) if updates else 0.0
+            }
+            for entity, (updates, conflicts) in sorted(counts.items())
+        }
+
+stats = ConflictStats()
@@ -1,6 +1,8 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
-from . import models, schemas
+from sqlalchemy.orm.exc import StaleDataError
+from sqlalchemy import and_, or_, select
+from . import models, schemas, policy, store_search, skill_matching, metric_series, task_rollup, task_batch, concurrency
+from . import delta_sync  # noqa: F401 -- records tombstones for deleted rows
 from .auth import get_password_hash, verify_password, create_access_token
 import datetime
 
@@ -52,8 +54,8 @@ def create_project(db: Session, user_id: int, project_data: schemas.ProjectCreat
     project = models.Project(
         name=project_data.name,
         description=project_data.description,
-        project_type=project_data.project_type,
-        priority=project_data.priority,
+        project_type=models.ProjectType[project_data.project_type.name],
+        priority=models.Priority[project_data.priority.name],
         start_date=project_data.start_date,
         end_date=project_data.end_date,
         budget_total=project_data.budget_total,
@@ -70,14 +72,34 @@ def create_project(db: Session, user_id: int, project_data: schemas.ProjectCreat
     db.refresh(project)
     return project
 
-def update_project(db: Session, project_id: int, user_id: int, project_data: schemas.ProjectUpdate):
+def _check_version(entity: str, row, expected_version: int = None):
+    conflict = expected_version is not None and row.version != expected_version
+    concurrency.stats.record(entity, conflict)
+    if conflict:
+        raise concurrency.VersionConflict(entity, row.id, row.version)
+
+def _flush_versioned(db: Session, entity: str, model, row_id: int):
+    """Flush, turning a version mismatch (a concurrent write) into VersionConflict."""
+    try:
+        db.flush()
+    except StaleDataError:
+        db.rollback()
+        concurrency.stats.add_conflict(entity)
+        current = db.execute(select(model.version).where(model.id == row_id)).scalar()
+        raise concurrency.VersionConflict(entity, row_id, current)
+
+def update_project(db: Session, project_id: int, user_id: int, project_data: schemas.ProjectUpdate,
+                   expected_version: int = None):
+    """Raises concurrency.VersionConflict when the project is not at expected_version (or changes meanwhile)."""
     project = db.query(models.Project).filter(
         and_(models.Project.id == project_id, models.Project.user_id == user_id)
     ).first()
     if project:
-        for key, value in project_data.dict(exclude_unset=True).items():
+        _check_version("projects", project, expected_version)
+        for key, value in task_batch.model_values(project_data.dict(exclude_unset=True)).items():
             setattr(project, key, value)
         project.updated_at = datetime.datetime.utcnow()
+        _flush_versioned(db, "projects", models.Project, project_id)
         db.commit()
         db.refresh(project)
     return project
@@ -88,11 +110,23 @@ def list_projects(db: Session, user_id: int, project_type: str = None):
         query = query.filter(models.Project.project_type == project_type)
     return query.all()
 
+def project_rows(db: Session, columns, user_id: int, project_type: str = None):
+    """Core rows of just the given Project columns, filtered like list_projects."""
+    stmt = select(*columns).where(models.Project.user_id == user_id)
+    if project_type:
+        stmt = stmt.where(models.Project.project_type == project_type)
+    return db.execute(stmt)
+
 def get_project(db: Session, project_id: int, user_id: int):
     return db.query(models.Project).filter(
         and_(models.Project.id == project_id, models.Project.user_id == user_id)
     ).first()
 
+def get_visible_project(db: Session, project_id: int, user):
+    return db.query(models.Project).filter(
+        and_(models.Project.id == project_id, policy.project_scope(user))
+    ).first()
+
 def delete_project(db: Session, project_id: int, user_id: int):
     project = get_project(db, project_id, user_id)
     if project:
@@ -108,7 +142,7 @@ def create_task(db: Session, user_id: int, task_data: schemas.TaskCreate):
         title=task_data.title,
         project_id=task_data.project_id,
         user_id=user_id,
-        priority=task_data.priority,
+        priority=models.Priority[task_data.priority.name],
         deadline=task_data.deadline,
         estimated_hours=task_data.estimated_hours,
         assigned_to=task_data.assigned_to,
@@ -120,21 +154,30 @@ def create_task(db: Session, user_id: int, task_data: schemas.TaskCreate):
         updated_at=datetime.datetime.utcnow()
     )
     db.add(task)
+    db.flush()
+    task_rollup.propagate(db, {task.id: None})
     db.commit()
     db.refresh(task)
     return task
 
-def update_task(db: Session, task_id: int, user_id: int, task_data: schemas.TaskUpdate):
+def update_task(db: Session, task_id: int, user_id: int, task_data: schemas.TaskUpdate,
+                expected_version: int = None):
+    """Raises concurrency.VersionConflict when the task is not at expected_version (or changes meanwhile)."""
     task = db.query(models.Task).filter(
         and_(models.Task.id == task_id, models.Task.user_id == user_id)
     ).first()
     if task:
-        for key, value in task_data.dict(exclude_unset=True).items():
+        _check_version("tasks", task, expected_version)
+        before = task_rollup.snapshot(db, [task.id])
+        now = datetime.datetime.utcnow()
+        values = task_batch.model_values(task_data.dict(exclude_unset=True))
+        if "status" in values:
+            values.update(task_batch.status_effects(values["status"], now, current=task))
+        for key, value in values.items():
             setattr(task, key, value)
-        task.updated_at = datetime.datetime.utcnow()
-        if task.status == models.TaskStatus.COMPLETE:
-            task.completed_at = datetime.datetime.utcnow()
-            task.completion_percentage = 100
+        task.updated_at = now
+        _flush_versioned(db, "tasks", models.Task, task_id)
+        task_rollup.propagate(db, before)
         db.commit()
         db.refresh(task)
     return task
@@ -156,9 +199,62 @@ def list_tasks(db: Session, user_id: int, project_id: int = None, parent_id=None
         query = query.filter(models.Task.status == status)
     return query.order_by(models.Task.priority.asc(), models.Task.deadline.asc()).all()
 
+def task_tree_rows(db: Session, columns, user_id: int, project_id: int = None, parent_id: int = None, tree: bool = True):
+    """
+    Core rows of the given columns plus (id, project_id, parent_id) as the last three
+    items, ordered like list_tasks: every task of the user (in one project) for
+    building subtask trees, or with tree=False just the parent_id level.
+    """
+    task = models.Task
+    stmt = select(*columns, task.id, task.project_id, task.parent_id).where(task.user_id == user_id)
+    if project_id:
+        stmt = stmt.where(task.project_id == project_id)
+    if not tree:
+        stmt = stmt.where(task.parent_id.is_(None) if parent_id is None else task.parent_id == parent_id)
+    return db.execute(stmt.order_by(task.priority.asc(), task.deadline.asc())).all()
+
 def delete_task(db: Session, task: models.Task):
+    before = task_rollup.snapshot(db, [task.id])
+    db.query(models.TaskDependency).filter(
+        or_(models.TaskDependency.predecessor_id == task.id, models.TaskDependency.successor_id == task.id)
+    ).delete(synchronize_session=False)
     db.delete(task)
+    db.flush()
+    task_rollup.propagate(db, before)
+    db.commit()
+
+# Task dependencies
+def add_task_dependency(db: Session, successor: models.Task, dependency_data: schemas.TaskDependencyCreate):
+    dependency = models.TaskDependency(
+        predecessor_id=dependency_data.predecessor_id,
+        successor_id=successor.id,
+        project_id=successor.project_id,
+        lag_hours=dependency_data.lag_hours,
+        created_at=datetime.datetime.utcnow()
+    )
+    db.add(dependency)
     db.commit()
+    db.refresh(dependency)
+    return dependency
+
+def get_task_dependency(db: Session, predecessor_id: int, successor_id: int):
+    return db.query(models.TaskDependency).filter(
+        and_(models.TaskDependency.predecessor_id == predecessor_id,
+             models.TaskDependency.successor_id == successor_id)
+    ).first()
+
+def get_task_dependencies(db: Session, task_id: int):
+    return db.query(models.TaskDependency).filter(
+        or_(models.TaskDependency.predecessor_id == task_id, models.TaskDependency.successor_id == task_id)
+    ).all()
+
+def remove_task_dependency(db: Session, predecessor_id: int, successor_id: int):
+    deleted = db.query(models.TaskDependency).filter(
+        and_(models.TaskDependency.predecessor_id == predecessor_id,
+             models.TaskDependency.successor_id == successor_id)
+    ).delete(synchronize_session=False)
+    db.commit()
+    return deleted > 0
 
 # Stores
 def create_store(db: Session, store_data: schemas.StoreCreate):
@@ -174,18 +270,35 @@ def create_store(db: Session, store_data: schemas.StoreCreate):
     db.add(store)
     db.commit()
     db.refresh(store)
+    store_search.index_store(db, store)
     return store
 
-def get_stores(db: Session, skip: int = 0, limit: int = 100, region: str = None):
+def get_stores(db: Session, skip: int = 0, limit: int = 100, region: str = None, user=None):
     query = db.query(models.Store).filter(models.Store.is_active == True)
+    if user is not None:
+        query = query.filter(policy.store_scope(user))
     if region:
         query = query.filter(models.Store.region == region)
     return query.offset(skip).limit(limit).all()
 
-def get_store(db: Session, store_id: int):
-    return db.query(models.Store).filter(
+def store_rows(db: Session, columns, skip: int = 0, limit: int = 100, region: str = None, user=None, store_id: int = None):
+    """Core rows of just the given Store columns, filtered and paged like get_stores (or one store)."""
+    stmt = select(*columns).where(models.Store.is_active == True)
+    if store_id is not None:
+        stmt = stmt.where(models.Store.id == store_id)
+    if user is not None:
+        stmt = stmt.where(policy.store_scope(user))
+    if region:
+        stmt = stmt.where(models.Store.region == region)
+    return db.execute(stmt.offset(skip).limit(limit))
+
+def get_store(db: Session, store_id: int, user=None):
+    query = db.query(models.Store).filter(
         and_(models.Store.id == store_id, models.Store.is_active == True)
-    ).first()
+    )
+    if user is not None:
+        query = query.filter(policy.store_scope(user))
+    return query.first()
 
 # Resources
 def create_resource(db: Session, resource_data: schemas.ResourceCreate):
@@ -201,26 +314,44 @@ def create_resource(db: Session, resource_data: schemas.ResourceCreate):
         created_at=datetime.datetime.utcnow()
     )
     db.add(resource)
+    db.flush()
+    skill_matching.sync_resource_skills(db, resource.id, resource.skills)
     db.commit()
     db.refresh(resource)
     return resource
 
-def get_resources(db: Session, skip: int = 0, limit: int = 100, role: str = None):
+def get_resources(db: Session, skip: int = 0, limit: int = 100, role: str = None, user=None):
     query = db.query(models.Resource).filter(models.Resource.is_active == True)
+    if user is not None:
+        query = query.filter(policy.resource_scope(user))
     if role:
         query = query.filter(models.Resource.role == role)
     return query.offset(skip).limit(limit).all()
 
-def get_resource(db: Session, resource_id: int):
-    return db.query(models.Resource).filter(
+def resource_rows(db: Session, columns, skip: int = 0, limit: int = 100, role: str = None, user=None, resource_id: int = None):
+    """Core rows of just the given Resource columns, filtered and paged like get_resources (or one resource)."""
+    stmt = select(*columns).where(models.Resource.is_active == True)
+    if resource_id is not None:
+        stmt = stmt.where(models.Resource.id == resource_id)
+    if user is not None:
+        stmt = stmt.where(policy.resource_scope(user))
+    if role:
+        stmt = stmt.where(models.Resource.role == role)
+    return db.execute(stmt.offset(skip).limit(limit))
+
+def get_resource(db: Session, resource_id: int, user=None):
+    query = db.query(models.Resource).filter(
         and_(models.Resource.id == resource_id, models.Resource.is_active == True)
-    ).first()
+    )
+    if user is not None:
+        query = query.filter(policy.resource_scope(user))
+    return query.first()
 
 # Budgets
 def create_budget(db: Session, budget_data: schemas.BudgetCreate):
     budget = models.Budget(
         project_id=budget_data.project_id,
-        category=budget_data.category,
+        category=models.BudgetCategory[budget_data.category.name],
         planned_amount=budget_data.planned_amount,
         currency=budget_data.currency,
         fiscal_year=budget_data.fiscal_year,
@@ -233,19 +364,30 @@ def create_budget(db: Session, budget_data: schemas.BudgetCreate):
     db.refresh(budget)
     return budget
 
-def get_budgets(db: Session, project_id: int = None):
+def get_budgets(db: Session, project_id: int = None, user=None):
     query = db.query(models.Budget)
+    if user is not None:
+        query = query.filter(policy.budget_scope(user))
     if project_id:
         query = query.filter(models.Budget.project_id == project_id)
     return query.all()
 
+def budget_rows(db: Session, columns, project_id: int = None, user=None):
+    """Core rows of just the given Budget columns, filtered like get_budgets."""
+    stmt = select(*columns)
+    if user is not None:
+        stmt = stmt.where(policy.budget_scope(user))
+    if project_id:
+        stmt = stmt.where(models.Budget.project_id == project_id)
+    return db.execute(stmt)
+
 # Risks
 def create_risk(db: Session, risk_data: schemas.RiskCreate):
     risk = models.Risk(
         project_id=risk_data.project_id,
         title=risk_data.title,
         description=risk_data.description,
-        category=risk_data.category,
+        category=models.RiskCategory[risk_data.category.name],
         probability=risk_data.probability,
         impact=risk_data.impact,
         mitigation_plan=risk_data.mitigation_plan,
@@ -259,14 +401,27 @@ def create_risk(db: Session, risk_data: schemas.RiskCreate):
     db.refresh(risk)
     return risk
 
-def get_risks(db: Session, project_id: int = None, status: str = None):
+def get_risks(db: Session, project_id: int = None, status: str = None, user=None):
     query = db.query(models.Risk)
+    if user is not None:
+        query = query.filter(policy.risk_scope(user))
     if project_id:
         query = query.filter(models.Risk.project_id == project_id)
     if status:
         query = query.filter(models.Risk.status == status)
     return query.all()
 
+def risk_rows(db: Session, columns, project_id: int = None, status: str = None, user=None):
+    """Core rows of just the given Risk columns, filtered like get_risks."""
+    stmt = select(*columns)
+    if user is not None:
+        stmt = stmt.where(policy.risk_scope(user))
+    if project_id:
+        stmt = stmt.where(models.Risk.project_id == project_id)
+    if status:
+        stmt = stmt.where(models.Risk.status == status)
+    return db.execute(stmt)
+
 # Metrics
 def create_metric(db: Session, metric_data: schemas.MetricsCreate):
     metric = models.ProjectMetrics(
@@ -280,14 +435,28 @@ def create_metric(db: Session, metric_data: schemas.MetricsCreate):
         created_at=datetime.datetime.utcnow()
     )
     db.add(metric)
+    metric_series.apply_rollups(db, [metric_data.dict()])
     db.commit()
     db.refresh(metric)
     return metric
 
-def get_metrics(db: Session, project_id: int = None):
+def get_metrics(db: Session, project_id: int = None, metric_name: str = None,
+                start_date: datetime.date = None, end_date: datetime.date = None,
+                skip: int = 0, limit: int = None, user=None):
     query = db.query(models.ProjectMetrics)
+    if user is not None and not policy.is_privileged(user):
+        query = query.filter(models.ProjectMetrics.project_id.in_(policy.visible_project_ids(user)))
     if project_id:
         query = query.filter(models.ProjectMetrics.project_id == project_id)
+    if metric_name:
+        query = query.filter(models.ProjectMetrics.metric_name == metric_name)
+    if start_date:
+        query = query.filter(models.ProjectMetrics.measurement_date >= start_date)
+    if end_date:
+        query = query.filter(models.ProjectMetrics.measurement_date <= end_date)
+    query = query.order_by(models.ProjectMetrics.measurement_date, models.ProjectMetrics.id)
+    if limit is not None:
+        query = query.offset(skip).limit(limit)
     return query.all()
 
 # Audit logging
@@ -0,0 +1,116 @@
+"""
+Delta sync: projects, tasks, budgets and risks changed since a sync token.
+
+A token is the server's UTC clock in microseconds when the response was
+assembled, issued strictly increasing within the process. Changed rows are those
+with updated_at past the token, found through the updated_at index of each
+table (updated_at is set on insert and on every update). The window reaches
+back OVERLAP_SECONDS before the token to cover transactions that were still
+open when the previous token was issued, so clients apply rows as upserts and
+may see a row twice.
+
+Deleted rows leave a sync_tombstones row. Every ORM flush that deletes one of
+the four models writes one, so crud.delete_task, crud.delete_project and their
+cascades are all covered. Tombstones carry only the entity and id, not row
+data, and are returned to every client. Deleting an id it never had is a no-op
+for a client. Tombstones are kept for TOMBSTONE_DAYS. An older token cannot be
+answered incrementally (TokenExpired), so the client must do a full sync again.
+"""
+
+import os
+import datetime
+import threading
+from sqlalchemy import select, insert, delete, event
+from sqlalchemy.orm import Session
+from . import models, schemas, policy, fast_json
+
+OVERLAP_SECONDS = int(os.getenv("SYNC_OVERLAP_SECONDS", 5))
+TOMBSTONE_DAYS = int(os.getenv("SYNC_TOMBSTONE_DAYS", 30))
+
+EPOCH = datetime.datetime(1970, 1, 1)
+
+class TokenExpired(Exception):
+    pass
+
+# (response key, model, schema, visibility clause)
+ENTITIES = [
+    ("projects", models.Project, schemas.ProjectOut, policy.project_scope),
+    ("tasks", models.Task, schemas.TaskOut, policy.task_scope),
+    ("budgets", models.Budget, schemas.BudgetOut, policy.budget_scope),
+    ("risks", models.Risk, schemas.RiskOut, policy.risk_scope),
+]
+ENTITY_NAMES = {model: name for name, model, _, _ in ENTITIES}
+
+_token_lock = threading.Lock()
+_last_token = 0
+
+def issue_token(now: datetime.datetime = None) -> str:
+    """The current time as a token, always greater than the last one issued."""
+    global _last_token
+    now = now or datetime.datetime.utcnow()
+    micros = (now - EPOCH) // datetime.timedelta(microseconds=1)
+    with _token_lock:
+        _last_token = max(micros, _last_token + 1)
+        return str(_last_token)
+
+def decode_token(token: str) -> datetime.datetime:
+    """ValueError when malformed or out of range."""
+    micros = int(token)
+    if micros < 0:
+        raise ValueError(token)
+    try:
+        return EPOCH + datetime.timedelta(microseconds=micros)
+    except OverflowError:
+        raise ValueError(token)
+
+def sync_fields(model, schema):
+    """The schema's columns plus project_id and updated_at, which sync clients need."""
+    names = fast_json.field_names(schema, model)
+    return names + [name for name in ("project_id", "updated_at") if name not in names and name in model.__table__.columns]
+
+def changes(db: Session, user, since: str = None, now: datetime.datetime = None):
+    """
+    {"token", "full", <entity>: [rows], "deleted": {<entity>: [ids]}}. Without since
+    every visible row is returned (full sync) and nothing is listed as deleted.
+    """
+    now = now or datetime.datetime.utcnow()
+    token = issue_token(now)
+    after = None
+    if since:
+        after = decode_token(since)
+        if after < now - datetime.timedelta(days=TOMBSTONE_DAYS):
+            raise TokenExpired(since)
+        after -= datetime.timedelta(seconds=OVERLAP_SECONDS)
+
+    response = {"token": token, "full": after is None}
+    for name, model, schema, scope in ENTITIES:
+        names = sync_fields(model, schema)
+        table = model.__table__
+        stmt = select(*fast_json.columns(model, names)).where(scope(user))
+        if after is not None:
+            stmt = stmt.where(table.c.updated_at > after)
+        response[name] = [fast_json.encoder(schema, names)(row) for row in db.execute(stmt.order_by(table.c.id))]
+
+    deleted = {name: [] for name, _, _, _ in ENTITIES}
+    if after is not None:
+        tombstone = models.SyncTombstone
+        for entity, entity_id in db.execute(
+            select(tombstone.entity, tombstone.entity_id)
+            .where(tombstone.deleted_at > after).order_by(tombstone.id)
+        ):
+            deleted[entity].append(entity_id)
+    response["deleted"] = deleted
+    return response
+
+@event.listens_for(Session, "after_flush")
+def _record_tombstones(session, flush_context):
+    rows = [
+        {"entity": ENTITY_NAMES[type(obj)], "entity_id": obj.id, "deleted_at": datetime.datetime.utcnow()}
+        for obj in session.deleted if type(obj) in ENTITY_NAMES
+    ]
+    if rows:
+        table = models.SyncTombstone.__table__
+        connection = session.connection()
+        connection.execute(insert(table), rows)
+        horizon = datetime.datetime.utcnow() - datetime.timedelta(days=TOMBSTONE_DAYS)
+        connection.execute(delete(table).where(table.c.deleted_at < horizon))
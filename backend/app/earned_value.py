@@ -0,0 +1,264 @@
+"""
+Earned value management (EVM) per project and across the portfolio.
+
+Inputs come from three grouped queries (one row per project), and the
+arithmetic runs on int64 cent arrays:
+- BAC: sum of Budget.planned_amount, else Project.budget_total.
+- AC: sum of Budget.actual_amount, else Project.actual_cost, else labor cost
+  (Task.actual_hours x Resource.hourly_rate of the assignee).
+- EV: BAC x hour-weighted task completion (complete tasks count as 100%), else
+  BAC x Project.completion_percentage when no task is estimated.
+- PV: BAC x the estimated hours of tasks due by the as-of date over those of
+  all tasks with a deadline; without task deadlines it is linear between the
+  project's start_date and end_date, and without either there is no baseline
+  (PV and SPI are null).
+- CPI = EV / AC, SPI = EV / PV, EAC = BAC / CPI (AC + BAC - EV while CPI is
+  undefined), ETC = EAC - AC, VAC = BAC - EAC. For several projects, SPI and SV
+  compare PV with the EV of just the projects that have a baseline.
+
+capture_snapshots() writes one evm_snapshots row per project and day, only for
+projects that have no row for that day yet, so the history grows incrementally and
+trend() reads pre-aggregated points instead of recomputing the past.
+start_snapshotter() runs it every EVM_SNAPSHOT_SECONDS in each API process, so
+every day gets its point without a cron job; after the day's first run there is
+nothing missing and nothing is written. It also runs as the evm.snapshots job.
+evm_report() only reads, and the insert skips rows that another run already wrote.
+"""
+
+import os
+import datetime
+import threading
+import numpy as np
+from sqlalchemy import select, insert, func, case, cast, BigInteger
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from . import models, policy
+from .portfolio_analytics import cents, to_money, load_columns
+
+COMPLETE = models.TaskStatus.COMPLETE
+SNAPSHOT_SECONDS = int(os.getenv("EVM_SNAPSHOT_SECONDS", 3600))
+
+def load_projects(db: Session, *criteria):
+    stmt = select(
+        models.Project.id,
+        models.Project.name,
+        models.Project.start_date,
+        models.Project.end_date,
+        cents(models.Project.budget_total),
+        cents(models.Project.actual_cost),
+        func.coalesce(models.Project.completion_percentage, 0)
+    ).where(*criteria)
+    return load_columns(db, stmt.order_by(models.Project.id), {
+        "id": np.int64, "name": object, "start": "datetime64[D]", "end": "datetime64[D]",
+        "budget_total": np.int64, "actual_cost": np.int64, "completion": np.int64
+    })
+
+def load_budget_totals(db: Session, project_ids):
+    stmt = select(
+        models.Budget.project_id,
+        func.sum(cents(models.Budget.planned_amount)),
+        func.sum(cents(models.Budget.actual_amount))
+    ).where(models.Budget.project_id.in_(project_ids)).group_by(models.Budget.project_id)
+    return load_columns(db, stmt, {"project_id": np.int64, "planned": np.int64, "actual": np.int64})
+
+def load_task_totals(db: Session, project_ids, as_of: datetime.date):
+    """Per project: estimated hours (x100), earned hours (x100 x percent), hours due by as_of, labor cost."""
+    hours = cast(func.round(func.coalesce(models.Task.estimated_hours, 0) * 100), BigInteger)
+    completion = case((models.Task.status == COMPLETE, 100), else_=func.coalesce(models.Task.completion_percentage, 0))
+    due_by = datetime.datetime.combine(as_of + datetime.timedelta(days=1), datetime.time())
+    stmt = select(
+        models.Task.project_id,
+        func.sum(hours),
+        func.sum(hours * completion),
+        func.sum(case((models.Task.deadline != None, hours), else_=0)),
+        func.sum(case((models.Task.deadline < due_by, hours), else_=0)),
+        func.sum(cents(func.coalesce(models.Task.actual_hours, 0) * models.Resource.hourly_rate))
+    ).outerjoin(
+        models.Resource, models.Resource.id == models.Task.assigned_to
+    ).where(models.Task.project_id.in_(project_ids)).group_by(models.Task.project_id)
+    return load_columns(db, stmt, {
+        "project_id": np.int64, "hours": np.int64, "earned": np.int64,
+        "scheduled": np.int64, "due": np.int64, "labor": np.int64
+    })
+
+def _aligned(ids, keys, values):
+    """values keyed by project id, aligned to the sorted ids (0 where missing)."""
+    out = np.zeros(len(ids), dtype=values.dtype if len(values) else np.int64)
+    if len(keys) and len(ids):
+        pos = np.searchsorted(ids, keys).clip(max=len(ids) - 1)
+        known = ids[pos] == keys
+        out[pos[known]] = values[known]
+    return out
+
+def planned_fraction(start, end, as_of: datetime.date):
+    """Linear baseline between start and end dates (inclusive); NaN without dates."""
+    day = np.datetime64(as_of, "D")
+    elapsed = (day - start).astype(np.float64) + 1
+    duration = (end - start).astype(np.float64) + 1
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fraction = np.clip(elapsed / duration, 0.0, 1.0)
+    return np.where(np.isnat(start) | np.isnat(end) | (duration <= 0), np.nan, fraction)
+
+def compute(projects, budgets, tasks, as_of: datetime.date):
+    """Arrays of bac, pv (NaN = no baseline), ev and ac in cents, aligned to projects["id"]."""
+    ids = projects["id"]
+    planned = _aligned(ids, budgets["project_id"], budgets["planned"])
+    actual = _aligned(ids, budgets["project_id"], budgets["actual"])
+    hours = _aligned(ids, tasks["project_id"], tasks["hours"])
+    earned = _aligned(ids, tasks["project_id"], tasks["earned"])
+    scheduled = _aligned(ids, tasks["project_id"], tasks["scheduled"])
+    due = _aligned(ids, tasks["project_id"], tasks["due"])
+    labor = _aligned(ids, tasks["project_id"], tasks["labor"])
+
+    bac = np.where(planned > 0, planned, projects["budget_total"])
+    ac = np.where(actual > 0, actual, np.where(projects["actual_cost"] > 0, projects["actual_cost"], labor))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        earned_fraction = np.where(hours > 0, earned / (hours * 100.0), projects["completion"] / 100.0)
+        task_baseline = due / scheduled
+    planned_share = np.where(scheduled > 0, task_baseline, planned_fraction(projects["start"], projects["end"], as_of))
+    ev = np.round(bac * earned_fraction).astype(np.int64)
+    pv = np.round(bac * planned_share)
+    return bac, pv, ev, ac
+
+def indices(bac: int, pv, ev: int, ac: int, scheduled_ev: int = None):
+    """EVM measures from cent totals; pv may be None (no baseline).
+
+    scheduled_ev is the EV of the projects counted in pv (default: ev), for SPI and SV.
+    """
+    scheduled_ev = ev if scheduled_ev is None else scheduled_ev
+    cpi = ev / ac if ac else None
+    spi = scheduled_ev / pv if pv else None
+    eac = round(bac / cpi) if cpi else ac + (bac - ev)
+    return {
+        "bac": to_money(bac),
+        "pv": None if pv is None else to_money(pv),
+        "ev": to_money(ev),
+        "ac": to_money(ac),
+        "cv": to_money(ev - ac),
+        "sv": None if pv is None else to_money(scheduled_ev - pv),
+        "cpi": None if cpi is None else round(cpi, 4),
+        "spi": None if spi is None else round(spi, 4),
+        "eac": to_money(eac),
+        "etc": to_money(eac - ac),
+        "vac": to_money(bac - eac),
+        "percent_complete": round(ev / bac * 100, 2) if bac else None,
+        "percent_planned": None if pv is None or not bac else round(pv / bac * 100, 2)
+    }
+
+def _cents_or_none(value):
+    return None if np.isnan(value) else int(value)
+
+def load_current(db: Session, as_of: datetime.date, *criteria):
+    projects = load_projects(db, *criteria)
+    project_ids = projects["id"].tolist()
+    return projects, compute(
+        projects, load_budget_totals(db, project_ids), load_task_totals(db, project_ids, as_of), as_of
+    )
+
+def evm_report(db: Session, user=None, project_id: int = None, as_of: datetime.date = None):
+    """Current EVM per visible project plus portfolio totals (read-only; snapshots come from the job)."""
+    as_of = as_of or datetime.date.today()
+    criteria = [policy.project_scope(user)] if user is not None else []
+    if project_id is not None:
+        criteria.append(models.Project.id == project_id)
+    projects, (bac, pv, ev, ac) = load_current(db, as_of, *criteria)
+
+    rows = []
+    for i, pid in enumerate(projects["id"].tolist()):
+        rows.append({
+            "project_id": pid,
+            "project_name": projects["name"][i],
+            **indices(int(bac[i]), _cents_or_none(pv[i]), int(ev[i]), int(ac[i]))
+        })
+    baseline = ~np.isnan(pv)
+    portfolio = indices(
+        int(bac.sum()), int(pv[baseline].sum()) if baseline.any() else None, int(ev.sum()), int(ac.sum()),
+        scheduled_ev=int(ev[baseline].sum())
+    )
+    return {"as_of": as_of, "projects": rows, "portfolio": portfolio}
+
+def _store(db: Session, day: datetime.date, ids, bac, pv, ev, ac):
+    """Insert snapshot rows for the projects that have none for day yet; returns rows written."""
+    if not len(ids):
+        return 0
+    rows = [
+        {
+            "project_id": pid, "snapshot_date": day,
+            "bac": to_money(bac[i]), "ev": to_money(ev[i]), "ac": to_money(ac[i]),
+            "pv": None if np.isnan(pv[i]) else to_money(pv[i])
+        }
+        for i, pid in enumerate(ids.tolist())
+    ]
+    table = models.EvmSnapshot.__table__
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        # a concurrent run may have written some of the day's rows since they were selected
+        stmt = (postgresql if dialect == "postgresql" else sqlite).insert(table).on_conflict_do_nothing(
+            index_elements=[table.c.project_id, table.c.snapshot_date]
+        ).returning(table.c.project_id)
+        written = len(db.execute(stmt, rows).all())
+    else:
+        existing = set(db.execute(select(table.c.project_id).where(table.c.snapshot_date == day)).scalars())
+        rows = [row for row in rows if row["project_id"] not in existing]
+        if rows:
+            db.execute(insert(table), rows)
+        written = len(rows)
+    db.commit()
+    return written
+
+def capture_snapshots(db: Session, day: datetime.date = None):
+    """Record the day's point for every project still missing one; returns rows written."""
+    day = day or datetime.date.today()
+    missing = models.Project.id.not_in(
+        select(models.EvmSnapshot.project_id).where(models.EvmSnapshot.snapshot_date == day)
+    )
+    projects, (bac, pv, ev, ac) = load_current(db, day, missing)
+    return _store(db, day, projects["id"], bac, pv, ev, ac)
+
+def trend(db: Session, user=None, project_id: int = None, start: datetime.date = None, end: datetime.date = None):
+    """Daily EVM points from evm_snapshots, summed over the visible (or given) projects."""
+    snapshot = models.EvmSnapshot
+    stmt = select(
+        snapshot.snapshot_date,
+        func.sum(cents(snapshot.bac)),
+        func.sum(cents(snapshot.pv)),
+        func.sum(cents(snapshot.ev)),
+        func.sum(cents(snapshot.ac)),
+        func.count(snapshot.pv),
+        func.sum(case((snapshot.pv.is_not(None), cents(snapshot.ev)), else_=0))
+    ).group_by(snapshot.snapshot_date).order_by(snapshot.snapshot_date)
+    if project_id is not None:
+        stmt = stmt.where(snapshot.project_id == project_id)
+    if user is not None and not policy.is_privileged(user):
+        stmt = stmt.where(snapshot.project_id.in_(policy.visible_project_ids(user)))
+    if start:
+        stmt = stmt.where(snapshot.snapshot_date >= start)
+    if end:
+        stmt = stmt.where(snapshot.snapshot_date <= end)
+    return [
+        {"date": day, **indices(int(bac), int(pv) if with_baseline else None, int(ev), int(ac), int(scheduled_ev))}
+        for day, bac, pv, ev, ac, with_baseline, scheduled_ev in db.execute(stmt)
+    ]
+
+def start_snapshotter(session_factory, interval: int = SNAPSHOT_SECONDS):
+    """Capture missing snapshots every interval seconds in a daemon thread (disabled when interval <= 0)."""
+    if interval <= 0:
+        return None
+    stop = threading.Event()
+
+    def run():
+        while True:
+            db = session_factory()
+            try:
+                capture_snapshots(db)
+            except Exception:
+                # the day's rows are still missing, so the next round writes them
+                db.rollback()
+            finally:
+                db.close()
+            if stop.wait(interval):
+                break
+
+    thread = threading.Thread(target=run, name="evm-snapshotter", daemon=True)
+    thread.start()
+    return stop
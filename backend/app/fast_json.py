@@ -0,0 +1,152 @@
+"""
+Fast JSON responses: orjson rendering plus precompiled row encoders.
+
+ORJSONResponse renders with orjson, which writes datetimes, dates and numbers
+natively; Decimal and Enum values that reach it are encoded the way the pydantic
+schemas print them (Decimal as its exact string, enums by value). It is the app's
+default response class.
+
+For large lists a router can skip the ORM and the per-row schema validation
+altogether: select() just the schema's columns and pass the Core rows through
+encoder(schema, names). That compiles, once per (schema, names), a function
+building the response dict straight from a row tuple, with converters only on
+the Decimal and enum fields (model enums map to the schema enum of the same
+member name, so Priority.MEDIUM becomes "medium"). The output is identical to
+response_model serialization of the same rows.
+
+fieldset() is the dependency behind the fields= and include= query parameters:
+list and detail routes select and encode only the requested columns, and nest
+relations (such as a task's subtasks) only when asked to.
+"""
+
+import enum
+import typing
+from decimal import Decimal
+from functools import lru_cache
+from typing import Optional
+import orjson
+from fastapi import HTTPException
+from fastapi.responses import Response
+
+OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+def _default(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, enum.Enum):
+        return value.value
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+def dumps(content) -> bytes:
+    return orjson.dumps(content, default=_default, option=OPTIONS)
+
+class ORJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+def _unwrap(annotation):
+    """Optional[X] -> X."""
+    if typing.get_origin(annotation) is typing.Union:
+        args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+        if len(args) == 1:
+            return args[0]
+    return annotation
+
+def field_types(schema) -> dict:
+    """{field name: type} of a pydantic schema, Optional unwrapped."""
+    fields = getattr(schema, "model_fields", None)
+    if fields is not None:
+        return {name: _unwrap(field.annotation) for name, field in fields.items()}
+    return {name: field.outer_type_ for name, field in schema.__fields__.items()}
+
+def field_names(schema, model=None):
+    """Schema fields in declaration order, only those that are columns of model when given."""
+    names = list(field_types(schema))
+    if model is not None:
+        table_columns = model.__table__.columns
+        names = [name for name in names if name in table_columns]
+    return names
+
+def columns(model, names):
+    """The model's table columns of those names, for a plain Core select()."""
+    table_columns = model.__table__.columns
+    return [table_columns[name] for name in names]
+
+def _names(value: str):
+    return [name.strip() for name in value.split(",") if name.strip()]
+
+def fieldset(schema, model, relations=()):
+    """
+    Dependency reading fields= (comma-separated columns) and include= (relations)
+    into (names in schema order, set of relations). Without fields every column is
+    returned; without either parameter every relation is included too, as before.
+    Relation names are accepted in fields= as well. Unknown names, and a fields=
+    naming nothing (e.g. "fields=,"), are a 400.
+    """
+    available = field_names(schema, model)
+
+    def dependency(fields: Optional[str] = None, include: Optional[str] = None):
+        requested = _names(fields) if fields else None
+        included = _names(include) if include else []
+        if requested is not None:
+            relations_requested = [name for name in requested if name in relations]
+            included += relations_requested
+            requested = [name for name in requested if name not in relations]
+            if not requested and not relations_requested:
+                # fields=, would select no columns at all
+                raise HTTPException(status_code=400, detail="fields must name at least one field")
+        unknown = sorted(set(requested or []) - set(available)) + sorted(set(included) - set(relations))
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+        if requested is None and include is None:
+            included = list(relations)
+        names = available if requested is None else [name for name in available if name in requested]
+        return names, set(included)
+    return dependency
+
+def _enum_converter(schema_enum):
+    by_name = {member.name: member.value for member in schema_enum}
+    by_value = {member.value: member.value for member in schema_enum}
+
+    def convert(value):
+        if isinstance(value, enum.Enum):
+            return by_name.get(value.name, value.value)
+        return by_value.get(value, by_name.get(value, value))
+    return convert
+
+@lru_cache(maxsize=None)
+def _compile(schema, names: tuple):
+    types = field_types(schema)
+    namespace, items = {}, []
+    for i, name in enumerate(names):
+        kind = types.get(name)
+        converter = None
+        if kind is Decimal:
+            converter = str
+        elif isinstance(kind, type) and issubclass(kind, enum.Enum):
+            converter = _enum_converter(kind)
+        if converter is None:
+            items.append(f"{name!r}: row[{i}]")
+        else:
+            namespace[f"_c{i}"] = converter
+            items.append(f"{name!r}: None if (v{i} := row[{i}]) is None else _c{i}(v{i})")
+    source = "def encode(row):\n    return {" + ", ".join(items) + "}\n"
+    exec(compile(source, f"<encoder {schema.__name__}>", "exec"), namespace)
+    return namespace["encode"]
+
+def encoder(schema, names=None):
+    """
+    Function turning a row (any sequence whose first len(names) items are those
+    fields, in order) into the schema's response dict. Extra trailing items are ignored.
+    """
+    return _compile(schema, tuple(names if names is not None else field_names(schema)))
+
+def encode_object(schema, model, obj) -> dict:
+    """The response dict of one ORM instance (its columns only), as encoder() builds it from rows."""
+    names = field_names(schema, model)
+    return encoder(schema, names)([getattr(obj, name) for name in names])
+
+def rows_response(rows, encode) -> ORJSONResponse:
+    return ORJSONResponse([encode(row) for row in rows])
@@ -0,0 +1,250 @@
+"""
+Project completion forecasts from task burn-down history.
+
+One grouped query (a UNION ALL of tasks grouped by creation day and by completion
+day, per project) yields everything needed: the total scope, the work done and
+when it was done. Work is measured in estimated hours; tasks without an estimate
+count as the project's average estimate (one hour when nothing is estimated).
+
+Throughput is the work completed per week over the last HISTORY_WEEKS full weeks,
+counted only from the week the project's first task was created. A Monte Carlo
+simulation then samples those weeks with replacement, vectorized over projects
+and trials, until the remaining work is burned down. P50/P85 are the 50th/85th
+percentile of the weeks that took. Projects that completed nothing in their
+history get no forecast, since no amount of sampling would finish them.
+
+forecast_portfolio() computes every project in one batch and caches the result
+per database and day, keyed by a fingerprint of the tasks table (row count plus
+the newest created_at/updated_at), so any task change recomputes on the next request.
+"""
+
+import datetime
+import threading
+import numpy as np
+from sqlalchemy import select, func, case, literal, union_all, cast, BigInteger
+from sqlalchemy.orm import Session
+from . import models, policy
+from .portfolio_analytics import load_columns
+from .resource_capacity import week_start
+
+HISTORY_WEEKS = 12
+MAX_WEEKS = 156
+TRIALS = 500
+SEED = 20261019
+PERCENTILES = (50, 85)
+BLOCK_ELEMENTS = 1 << 18
+
+COMPLETE = models.TaskStatus.COMPLETE
+CANCELLED = models.TaskStatus.CANCELLED
+
+def _grouped(kind: int, day, *criteria):
+    task = models.Task
+    hours = cast(func.round(func.coalesce(task.estimated_hours, 0) * 100), BigInteger)
+    return select(
+        task.project_id,
+        literal(kind),
+        day,
+        func.count(),
+        func.sum(case((task.estimated_hours > 0, 1), else_=0)),
+        func.sum(hours)
+    ).where(task.status != CANCELLED, *criteria).group_by(task.project_id, day)
+
+def load_burndown(db: Session, *criteria):
+    """
+    Rows per (project, kind, day): kind 0 counts tasks by creation day, kind 1 by
+    completion day (completed_at, else the last update of a COMPLETE task).
+    """
+    task = models.Task
+    created = _grouped(0, func.date(task.created_at), *criteria)
+    done = _grouped(1, func.date(func.coalesce(task.completed_at, task.updated_at)), task.status == COMPLETE, *criteria)
+    return load_columns(db, union_all(created, done), {
+        "project_id": np.int64, "kind": np.int64, "day": "datetime64[D]",
+        "tasks": np.int64, "estimated": np.int64, "hours": np.int64
+    })
+
+def work_units(rows):
+    """Work of each row in hours x 100, unestimated tasks at their project's average estimate."""
+    created = rows["kind"] == 0
+    projects, inverse = np.unique(rows["project_id"], return_inverse=True)
+    hours = np.bincount(inverse, weights=np.where(created, rows["hours"], 0), minlength=len(projects))
+    estimated = np.bincount(inverse, weights=np.where(created, rows["estimated"], 0), minlength=len(projects))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        average = np.where(estimated > 0, hours / estimated, 100.0)
+    return rows["hours"] + (rows["tasks"] - rows["estimated"]) * average[inverse]
+
+def throughput(rows, work, as_of: datetime.date, weeks: int = HISTORY_WEEKS):
+    """
+    (project ids, remaining work, weekly throughput matrix, usable history weeks)
+    with the matrix shaped projects x weeks, oldest week first.
+    """
+    created = rows["kind"] == 0
+    projects, inverse = np.unique(rows["project_id"], return_inverse=True)
+    total = np.bincount(inverse, weights=np.where(created, work, 0), minlength=len(projects))
+    done = np.bincount(inverse, weights=np.where(created, 0, work), minlength=len(projects))
+    remaining = np.maximum(total - done, 0)
+
+    window_end = np.datetime64(week_start(as_of), "D")
+    window_start = window_end - np.timedelta64(weeks * 7, "D")
+    week = (rows["day"] - window_start).astype(np.int64) // 7
+    in_window = ~created & ~np.isnat(rows["day"]) & (rows["day"] >= window_start) & (rows["day"] < window_end)
+    matrix = np.zeros((len(projects), weeks))
+    np.add.at(matrix, (inverse[in_window], week[in_window]), work[in_window])
+
+    # weeks before a project's first task are not zero-throughput weeks
+    first = np.full(len(projects), np.datetime64("NaT"), dtype="datetime64[D]")
+    if len(projects):
+        days = np.where(created & ~np.isnat(rows["day"]), rows["day"], np.datetime64("9999-12-31"))
+        order = np.lexsort((days, inverse))
+        starts = np.searchsorted(inverse[order], np.arange(len(projects)))
+        first = days[order][starts]
+    first_week = (first - window_start).astype(np.int64) // 7
+    history = np.clip(weeks - first_week, 0, weeks)
+    return projects, remaining, matrix, history
+
+def simulate(remaining, matrix, history, trials: int = TRIALS, max_weeks: int = MAX_WEEKS, seed: int = SEED):
+    """
+    Weeks needed per project and trial (inf when not done within max_weeks),
+    drawing each future week from the project's last `history` weeks.
+
+    Projects are simulated in chunks of similar expected length. Each chunk first
+    draws a block of weeks per trial at the mean pace, where the cumulative sum along the
+    block gives the finishing week directly. Only the trials still running are then
+    extended, a few weeks at a time, so there is no Python loop per simulated week.
+    """
+    count, weeks = matrix.shape
+    needed = np.full((count, trials), np.inf)
+    needed[remaining <= 0] = 0
+    totals = matrix.sum(axis=1)
+    active = np.flatnonzero((remaining > 0) & (history > 0) & (totals > 0))
+    if not active.size:
+        return needed
+    rng = np.random.default_rng(seed)
+    expected = np.clip(np.ceil(remaining[active] * history[active] / totals[active]), 1, max_weeks).astype(np.int64)
+    order = np.argsort(expected, kind="stable")
+    active, expected = active[order], expected[order]
+
+    start = 0
+    while start < active.size:
+        size = max(1, min(active.size - start, BLOCK_ELEMENTS // (trials * int(expected[start]))))
+        chunk = active[start:start + size]
+        block = int(expected[start + size - 1])
+        start += size
+
+        samples = matrix[chunk]
+        span = history[chunk]
+        offset = weeks - span
+        target = remaining[chunk]
+        picks = offset[:, None, None] + (rng.random((size, trials, block)) * span[:, None, None]).astype(np.int64)
+        cumulative = np.cumsum(samples[np.arange(size)[:, None, None], picks], axis=2)
+        # throughput is never negative, so a trial has finished iff its last week is on target
+        hit = cumulative >= target[:, None, None]
+        taken = np.where(hit[:, :, -1], hit.argmax(axis=2) + 1, np.inf)
+
+        rows, columns = np.nonzero(~hit[:, :, -1])
+        burned = cumulative[rows, columns, -1]
+        elapsed = block
+        step = max(4, block // 4)
+        while rows.size and elapsed < max_weeks:
+            length = min(step, max_weeks - elapsed)
+            picks = offset[rows][:, None] + (rng.random((rows.size, length)) * span[rows][:, None]).astype(np.int64)
+            cumulative = burned[:, None] + np.cumsum(samples[rows[:, None], picks], axis=1)
+            reached = cumulative >= target[rows][:, None]
+            done = reached[:, -1]
+            taken[rows[done], columns[done]] = elapsed + reached[done].argmax(axis=1) + 1
+            rows, columns, burned = rows[~done], columns[~done], cumulative[~done, -1]
+            elapsed += length
+        needed[chunk] = taken
+    return needed
+
+def percentile_weeks(needed, percentiles=PERCENTILES):
+    """{p: weeks per project}, inf where the percentile trial never finished."""
+    if not needed.size:
+        return {p: np.zeros(0) for p in percentiles}
+    return {p: np.percentile(needed, p, axis=1, method="higher") for p in percentiles}
+
+def burndown_series(rows, work, project_id: int, as_of: datetime.date, weeks: int = HISTORY_WEEKS):
+    """Remaining work (hours) at the start of each of the last `weeks` weeks and today."""
+    mine = rows["project_id"] == project_id
+    created = mine & (rows["kind"] == 0)
+    done = mine & (rows["kind"] == 1)
+    window_end = week_start(as_of)
+    dates = [window_end - datetime.timedelta(weeks=w) for w in range(weeks, -1, -1)]
+    if dates[-1] != as_of:
+        dates.append(as_of)
+    series = []
+    for day in dates:
+        # work done on day itself counts only for today's point
+        cutoff = np.datetime64(day, "D") + np.timedelta64(1 if day == as_of else 0, "D")
+        scope = work[created & (rows["day"] < cutoff)].sum()
+        burned = work[done & (rows["day"] < cutoff)].sum()
+        series.append({"date": day, "remaining_hours": round(max(float(scope - burned), 0.0) / 100, 2)})
+    return series
+
+def compute(rows, as_of: datetime.date):
+    """{project_id: forecast} for every project in rows."""
+    work = work_units(rows)
+    projects, remaining, matrix, history = throughput(rows, work, as_of)
+    needed = simulate(remaining, matrix, history)
+    quantiles = percentile_weeks(needed)
+    mean = np.divide(matrix.sum(axis=1), history, out=np.zeros(len(projects)), where=history > 0)
+    results = {}
+    for i, project_id in enumerate(projects.tolist()):
+        forecast = {
+            "project_id": project_id,
+            "remaining_hours": round(float(remaining[i]) / 100, 2),
+            "weekly_throughput_hours": round(float(mean[i]) / 100, 2),
+            "history_weeks": int(history[i]),
+        }
+        for p, weeks in quantiles.items():
+            value = weeks[i]
+            finite = np.isfinite(value)
+            forecast[f"p{p}_weeks"] = int(value) if finite else None
+            forecast[f"p{p}_date"] = as_of + datetime.timedelta(weeks=int(value)) if finite else None
+        results[project_id] = forecast
+    return results
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+def _fingerprint(db: Session):
+    return tuple(db.execute(
+        select(func.count(), func.max(models.Task.created_at), func.max(models.Task.updated_at))
+    ).one())
+
+def forecast_portfolio(db: Session, as_of: datetime.date = None, refresh: bool = False):
+    """Forecasts of every project with tasks, from cache when the tasks table is unchanged."""
+    as_of = as_of or datetime.date.today()
+    key = (str(db.get_bind().url), as_of)
+    fingerprint = _fingerprint(db)
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached and cached[0] == fingerprint and not refresh:
+            return cached[1]
+    results = compute(load_burndown(db), as_of)
+    with _cache_lock:
+        # one entry per database; older days are never asked for again
+        for stale in [k for k in _cache if k[0] == key[0]]:
+            del _cache[stale]
+        _cache[key] = (fingerprint, results)
+    return results
+
+def forecast(db: Session, user=None, project_id: int = None, as_of: datetime.date = None):
+    """P50/P85 completion forecasts of the visible projects (plus the burn-down series for one project)."""
+    as_of = as_of or datetime.date.today()
+    criteria = [policy.project_scope(user)] if user is not None else []
+    if project_id is not None:
+        criteria.append(models.Project.id == project_id)
+    projects = db.execute(select(models.Project.id, models.Project.name).where(*criteria).order_by(models.Project.id)).all()
+    results = forecast_portfolio(db, as_of)
+    rows = []
+    for pid, name in projects:
+        forecast = results.get(pid) or {
+            "project_id": pid, "remaining_hours": 0.0, "weekly_throughput_hours": 0.0, "history_weeks": 0,
+            **{f"p{p}_{field}": None for p in PERCENTILES for field in ("weeks", "date")}
+        }
+        rows.append({**forecast, "project_name": name})
+    response = {"as_of": as_of, "projects": rows}
+    if project_id is not None and rows:
+        history = load_burndown(db, models.Task.project_id == project_id)
+        response["burndown"] = burndown_series(history, work_units(history), project_id, as_of)
+    return response
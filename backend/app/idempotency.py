@@ -0,0 +1,203 @@
+"""
+Idempotency-Key support for the create routes.
+
+A client that may retry a POST sends a unique Idempotency-Key header (a UUID
+per logical request). The first request with a key claims it by inserting an
+idempotency_keys row and then runs. Its response body and status are stored on
+that row and replayed, byte for byte and with Idempotent-Replayed: true, to any
+retry with the same key during the next TTL_HOURS. The retry does not run again,
+so it creates nothing twice.
+
+Keys belong to a user. The row also records a hash of the route and its
+parameters:
+- Reusing a key with a different request is a 422.
+- A retry that arrives while the first request is still running is a 409, so
+  it can back off and try again.
+- If the first request fails, its key is released and the retry runs normally.
+- A claim left behind by a crashed worker lapses after LOCK_SECONDS.
+
+The claim is committed on its own, so retries can see it. The handler's writes
+and the stored response are then committed together: commits inside the handler
+only flush until the response is stored. A crash before that commit leaves
+neither the created rows nor the response, so the retry that runs once the
+claim lapses creates them exactly once.
+
+Requests without the header are not affected. purge() deletes expired rows
+through the expires_at index. start_purger() runs it every
+IDEMPOTENCY_PURGE_SECONDS in a daemon thread.
+"""
+
+import os
+import inspect
+import hashlib
+import datetime
+import functools
+import threading
+import orjson
+from typing import Optional
+from fastapi import Header, HTTPException, Response
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import select, insert, update, delete
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from . import models, fast_json
+
+TTL_HOURS = int(os.getenv("IDEMPOTENCY_TTL_HOURS", 24))
+LOCK_SECONDS = int(os.getenv("IDEMPOTENCY_LOCK_SECONDS", 60))
+PURGE_SECONDS = int(os.getenv("IDEMPOTENCY_PURGE_SECONDS", 3600))
+MAX_KEY_LENGTH = 255
+UNHASHED = ("db", "current_user", "idempotency_key")
+
+class KeyInProgress(Exception):
+    pass
+
+class KeyReused(Exception):
+    pass
+
+def request_hash(name: str, params: dict) -> str:
+    """sha256 of the route name and its parameters (bodies included) in canonical JSON."""
+    payload = jsonable_encoder({k: v for k, v in params.items() if k not in UNHASHED})
+    return hashlib.sha256(name.encode() + orjson.dumps(payload, option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+def claim(db: Session, user_id: int, key: str, fingerprint: str, now: datetime.datetime = None):
+    """
+    The stored row to replay, or None after claiming the key for this request.
+    KeyReused when the key was used for another request, KeyInProgress while the
+    request that claimed it is still running.
+    """
+    now = now or datetime.datetime.utcnow()
+    table = models.IdempotencyKey.__table__
+    mine = (table.c.user_id == user_id, table.c.key == key)
+    row = db.execute(select(table).where(*mine)).first()
+    if row is not None and row.expires_at <= now:
+        db.execute(delete(table).where(table.c.id == row.id))
+        row = None
+    if row is not None:
+        if row.request_hash != fingerprint:
+            raise KeyReused(key)
+        if row.status_code is None:
+            raise KeyInProgress(key)
+        return row
+    try:
+        db.execute(insert(table).values(
+            user_id=user_id, key=key, request_hash=fingerprint, created_at=now,
+            expires_at=now + datetime.timedelta(seconds=LOCK_SECONDS)
+        ))
+        db.commit()
+    except IntegrityError:
+        # claimed by a concurrent request between the select and the insert
+        db.rollback()
+        raise KeyInProgress(key)
+    return None
+
+def complete(db: Session, user_id: int, key: str, status_code: int, body: bytes, now: datetime.datetime = None,
+             commit: bool = True):
+    """Store the response of a claimed key for TTL_HOURS."""
+    now = now or datetime.datetime.utcnow()
+    table = models.IdempotencyKey.__table__
+    db.execute(
+        update(table).where(table.c.user_id == user_id, table.c.key == key)
+        .values(status_code=status_code, response_body=body.decode(),
+                expires_at=now + datetime.timedelta(hours=TTL_HOURS))
+    )
+    if commit:
+        db.commit()
+
+def release(db: Session, user_id: int, key: str):
+    """Drop the claim of a request that failed, so a retry runs again."""
+    table = models.IdempotencyKey.__table__
+    db.rollback()
+    db.execute(delete(table).where(table.c.user_id == user_id, table.c.key == key))
+    db.commit()
+
+def replay(row) -> Response:
+    return Response(
+        content=row.response_body, status_code=row.status_code,
+        media_type="application/json", headers={"Idempotent-Replayed": "true"}
+    )
+
+def _as_response(result, schema) -> Response:
+    if isinstance(result, Response):
+        return result
+    return fast_json.ORJSONResponse(fast_json.encode_object(schema, type(result), result))
+
+def idempotent(schema):
+    """
+    Decorator for a sync POST handler whose result is an ORM instance rendered
+    with schema (through fast_json, with or without a key, so first responses and
+    replays are the same bytes). It adds the Idempotency-Key header parameter and
+    replays the stored response to retries.
+    """
+    def decorate(handler):
+        name = f"{handler.__module__}.{handler.__qualname__}"
+
+        @functools.wraps(handler)
+        def wrapper(idempotency_key: Optional[str] = None, **kwargs):
+            if idempotency_key is None:
+                return _as_response(handler(**kwargs), schema)
+            if not idempotency_key or len(idempotency_key) > MAX_KEY_LENGTH:
+                raise HTTPException(status_code=400, detail=f"Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters")
+            db, user_id = kwargs["db"], kwargs["current_user"].id
+            try:
+                stored = claim(db, user_id, idempotency_key, request_hash(name, kwargs))
+            except KeyReused:
+                raise HTTPException(status_code=422, detail="Idempotency-Key was already used for a different request")
+            except KeyInProgress:
+                raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is still in progress")
+            if stored is not None:
+                return replay(stored)
+            commit = db.commit
+            # the crud helpers commit; defer that so the created rows and the stored
+            # response are committed together
+            db.commit = db.flush
+            try:
+                response = _as_response(handler(**kwargs), schema)
+                complete(db, user_id, idempotency_key, response.status_code, response.body, commit=False)
+            except BaseException:
+                db.commit = commit
+                release(db, user_id, idempotency_key)
+                raise
+            db.commit = commit
+            db.commit()
+            return response
+
+        signature = inspect.signature(handler)
+        header = inspect.Parameter(
+            "idempotency_key", inspect.Parameter.KEYWORD_ONLY,
+            default=Header(None), annotation=Optional[str]
+        )
+        parameters = [p for p in signature.parameters.values() if p.kind != inspect.Parameter.VAR_KEYWORD]
+        wrapper.__signature__ = signature.replace(parameters=parameters + [header])
+        return wrapper
+    return decorate
+
+def purge(db: Session, now: datetime.datetime = None) -> int:
+    """Delete expired keys (finished and abandoned); returns how many."""
+    now = now or datetime.datetime.utcnow()
+    table = models.IdempotencyKey.__table__
+    removed = db.execute(delete(table).where(table.c.expires_at <= now)).rowcount
+    db.commit()
+    return removed
+
+def start_purger(session_factory, interval: int = PURGE_SECONDS):
+    """Purge every interval seconds in a daemon thread (disabled when interval <= 0)."""
+    if interval <= 0:
+        return None
+    stop = threading.Event()
+
+    def run():
+        while True:
+            db = session_factory()
+            try:
+                purge(db)
+            except Exception:
+                # expired rows are ignored by claim() anyway; try again next round
+                db.rollback()
+            finally:
+                db.close()
+            if stop.wait(interval):
+                break
+
+    thread = threading.Thread(target=run, name="idempotency-purger", daemon=True)
+    thread.start()
+    return stop
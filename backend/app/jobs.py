@@ -0,0 +1,218 @@
+"""
+Persistent background jobs for work too slow to run inside a request.
+
+A route enqueues a jobs row and answers 202 with the job id. The client then
+polls GET /api/jobs/{id}. Workers claim queued jobs whose run_after has passed,
+highest priority first, then oldest. The claim is the (status, priority DESC,
+run_after) index scan:
+- On PostgreSQL it uses SELECT ... FOR UPDATE SKIP LOCKED, so any number of
+  workers claim distinct jobs without waiting on each other.
+- On SQLite, which has no row locks, claims are serialized by a process lock and
+  guarded by a conditional UPDATE ... WHERE status = 'queued'. A worker in
+  another process that loses the race just looks again.
+
+A job runs HANDLERS[kind](db, payload) and stores its JSON result. A failed
+attempt is queued again after BACKOFF_SECONDS * 2**(attempt - 1) (capped at
+MAX_BACKOFF_SECONDS) until max_attempts is reached. Then the job is failed with
+the last error. A running job whose worker stopped without finishing it is
+queued again once LEASE_SECONDS have passed since it started. Finishing only
+touches the row while it is still running under the same worker, so a worker
+that outlived its lease cannot overwrite the run that took the job over.
+
+Workers run as threads: JOB_WORKER_THREADS of them inside the API process (from
+main.py; set 0 when using dedicated workers), or any number in worker.py
+processes. Work that only fills an in-process cache (the forecast refresh)
+stays in its route, since a job would warm the cache of the worker instead.
+"""
+
+import os
+import socket
+import datetime
+import threading
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import select, insert, update, and_
+from sqlalchemy.orm import Session
+from . import models, earned_value, overdue, fast_json, columnar_export
+
+WORKER_THREADS = int(os.getenv("JOB_WORKER_THREADS", 1))
+POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", 2))
+MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", 3))
+BACKOFF_SECONDS = int(os.getenv("JOB_BACKOFF_SECONDS", 30))
+MAX_BACKOFF_SECONDS = int(os.getenv("JOB_MAX_BACKOFF_SECONDS", 3600))
+LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", 900))
+
+QUEUED, RUNNING, SUCCEEDED, FAILED = "queued", "running", "succeeded", "failed"
+
+HANDLERS = {}
+
+_claim_lock = threading.Lock()
+
+def handler(kind: str):
+    """Register fn(db, payload) -> JSON-able result as the handler of kind."""
+    def register(fn):
+        HANDLERS[kind] = fn
+        return fn
+    return register
+
+def enqueue(db: Session, kind: str, payload: dict = None, user_id: int = None, priority: int = 0,
+            max_attempts: int = MAX_ATTEMPTS, run_after: datetime.datetime = None) -> int:
+    """Queue a job and commit; returns its id."""
+    if kind not in HANDLERS:
+        raise KeyError(kind)
+    now = datetime.datetime.utcnow()
+    job_id = db.execute(insert(models.Job.__table__).values(
+        kind=kind, payload=payload or {}, status=QUEUED, priority=priority, attempts=0,
+        max_attempts=max_attempts, run_after=run_after or now, user_id=user_id, created_at=now
+    )).inserted_primary_key[0]
+    db.commit()
+    return job_id
+
+def accepted(job_id: int) -> fast_json.ORJSONResponse:
+    """The 202 a route answers after enqueueing."""
+    url = f"/api/jobs/{job_id}"
+    return fast_json.ORJSONResponse(
+        {"job_id": job_id, "status": QUEUED, "status_url": url}, status_code=202, headers={"Location": url}
+    )
+
+def backoff(attempts: int) -> datetime.timedelta:
+    return datetime.timedelta(seconds=min(BACKOFF_SECONDS * 2 ** max(attempts - 1, 0), MAX_BACKOFF_SECONDS))
+
+def _next_queued(now: datetime.datetime):
+    job = models.Job.__table__.c
+    return (
+        select(job.id).where(job.status == QUEUED, job.run_after <= now)
+        .order_by(job.priority.desc(), job.run_after, job.id).limit(1)
+    )
+
+def claim(db: Session, worker_id: str, now: datetime.datetime = None):
+    """The next due job as a row, now running under worker_id; None when the queue is idle."""
+    now = now or datetime.datetime.utcnow()
+    table = models.Job.__table__
+    start = dict(status=RUNNING, locked_by=worker_id, started_at=now, attempts=table.c.attempts + 1)
+    if db.get_bind().dialect.name == "postgresql":
+        job_id = db.execute(_next_queued(now).with_for_update(skip_locked=True)).scalar()
+        if job_id is None:
+            db.rollback()
+            return None
+        db.execute(update(table).where(table.c.id == job_id).values(**start))
+    else:
+        with _claim_lock:
+            while True:
+                job_id = db.execute(_next_queued(now)).scalar()
+                if job_id is None:
+                    db.rollback()
+                    return None
+                taken = db.execute(
+                    update(table).where(table.c.id == job_id, table.c.status == QUEUED).values(**start)
+                ).rowcount
+                if taken:
+                    break
+                db.rollback()
+    db.commit()
+    return db.execute(select(table).where(table.c.id == job_id)).first()
+
+def finish(db: Session, job, result=None, error: str = None, now: datetime.datetime = None) -> bool:
+    """Record an attempt: succeeded, queued again after a backoff, or failed for good.
+
+    False (and nothing written) when the job is no longer running under job.locked_by.
+    """
+    now = now or datetime.datetime.utcnow()
+    table = models.Job.__table__
+    if error is None:
+        values = dict(status=SUCCEEDED, result=jsonable_encoder(result), error=None, finished_at=now)
+    elif job.attempts < job.max_attempts:
+        values = dict(status=QUEUED, error=error, run_after=now + backoff(job.attempts))
+    else:
+        values = dict(status=FAILED, error=error, finished_at=now)
+    finished = db.execute(
+        update(table).where(table.c.id == job.id, table.c.status == RUNNING, table.c.locked_by == job.locked_by)
+        .values(locked_by=None, **values)
+    ).rowcount
+    db.commit()
+    return bool(finished)
+
+def run_one(db: Session, worker_id: str, now: datetime.datetime = None):
+    """Claim and run one job; returns its id, or None when nothing was due."""
+    job = claim(db, worker_id, now)
+    if job is None:
+        return None
+    try:
+        result = HANDLERS[job.kind](db, job.payload or {})
+    except Exception as exc:
+        db.rollback()
+        finish(db, job, error=f"{type(exc).__name__}: {exc}", now=now)
+    else:
+        finish(db, job, result=result, now=now)
+    return job.id
+
+def requeue_stale(db: Session, now: datetime.datetime = None) -> int:
+    """Queue again (or fail, when out of attempts) running jobs past their lease."""
+    now = now or datetime.datetime.utcnow()
+    table = models.Job.__table__
+    stale = and_(table.c.status == RUNNING, table.c.started_at < now - datetime.timedelta(seconds=LEASE_SECONDS))
+    lost = "Worker lease expired"
+    failed = db.execute(
+        update(table).where(stale, table.c.attempts >= table.c.max_attempts)
+        .values(status=FAILED, locked_by=None, error=lost, finished_at=now)
+    ).rowcount
+    queued = db.execute(
+        update(table).where(stale).values(status=QUEUED, locked_by=None, error=lost, run_after=now)
+    ).rowcount
+    db.commit()
+    return failed + queued
+
+def get_job(db: Session, job_id: int, user=None):
+    """The job row, if it exists and user (when given) may see it: its owner, admins and managers."""
+    table = models.Job.__table__
+    stmt = select(table).where(table.c.id == job_id)
+    if user is not None and user.role not in ["admin", "manager"]:
+        stmt = stmt.where(table.c.user_id == user.id)
+    return db.execute(stmt).first()
+
+def worker_name(index: int = 0) -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{index}"
+
+def work(session_factory, worker_id: str, stop: threading.Event, poll: float = POLL_SECONDS):
+    """Run jobs until stop is set, sleeping poll seconds whenever the queue is idle."""
+    while not stop.is_set():
+        db = session_factory()
+        try:
+            ran = run_one(db, worker_id)
+            if ran is None:
+                requeue_stale(db)
+        except Exception:
+            # a database hiccup; the claimed job (if any) is recovered by its lease
+            db.rollback()
+            ran = None
+        finally:
+            db.close()
+        if ran is None:
+            stop.wait(poll)
+
+def start_workers(session_factory, count: int = WORKER_THREADS, poll: float = POLL_SECONDS):
+    """Start count worker threads; returns the event that stops them (None when count <= 0)."""
+    if count <= 0:
+        return None
+    stop = threading.Event()
+    for index in range(count):
+        thread = threading.Thread(
+            target=work, args=(session_factory, worker_name(index), stop, poll),
+            name=f"job-worker-{index}", daemon=True
+        )
+        thread.start()
+    return stop
+
+@handler("evm.snapshots")
+def _capture_evm_snapshots(db: Session, payload: dict):
+    return {"date": datetime.date.today(), "captured": earned_value.capture_snapshots(db)}
+
+@handler("overdue.sweep")
+def _sweep_overdue(db: Session, payload: dict):
+    return {"overdue": overdue.sweep(db)}
+
+@handler("export.columnar")
+def _export_columnar(db: Session, payload: dict):
+    return columnar_export.export(
+        db, payload["dataset"], fmt=payload.get("format", "parquet"),
+        partition_by=payload.get("partition_by"), incremental=payload.get("incremental", False)
+    )
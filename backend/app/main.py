@@ -1,15 +1,21 @@
 from fastapi import FastAPI
 from .routers import (
     auth_router, projects_router, tasks_router, profile_router, outlook_router,
-    stores_router, resources_router, budgets_router, risks_router, analytics_router
+    stores_router, resources_router, budgets_router, risks_router, analytics_router,
+    rollouts_router, search_router, sync_router, jobs_router, exports_router
 )
-from . import models
-from .db import engine
+from . import models, store_search, text_search, overdue, earned_value, fast_json, idempotency, jobs
+from .db import engine, SessionLocal
 from fastapi.middleware.cors import CORSMiddleware
 
 models.Base.metadata.create_all(bind=engine)
+store_search.ensure_index(engine)
+text_search.ensure_index(engine)
 
-app = FastAPI(title="Enterprise Project Tracker API", version="2.0.0")
+app = FastAPI(
+    title="Enterprise Project Tracker API", version="2.0.0",
+    default_response_class=fast_json.ORJSONResponse
+)
 
 app.add_middleware(
     CORSMiddleware,
@@ -30,6 +36,27 @@ app.include_router(resources_router.router)
 app.include_router(budgets_router.router)
 app.include_router(risks_router.router)
 app.include_router(analytics_router.router)
+app.include_router(rollouts_router.router)
+app.include_router(search_router.router)
+app.include_router(sync_router.router)
+app.include_router(jobs_router.router)
+app.include_router(exports_router.router)
+
+@app.on_event("startup")
+def start_overdue_sweeper():
+    overdue.start_sweeper(SessionLocal)
+
+@app.on_event("startup")
+def start_evm_snapshotter():
+    earned_value.start_snapshotter(SessionLocal)
+
+@app.on_event("startup")
+def start_idempotency_purger():
+    idempotency.start_purger(SessionLocal)
+
+@app.on_event("startup")
+def start_job_workers():
+    jobs.start_workers(SessionLocal)
 
 @app.get("/")
 def root():
@@ -0,0 +1,214 @@
+"""
+Time-series storage for project metrics.
+
+project_metrics is append-only: points are inserted (singly or in batches) and
+never rewritten. Each new point is also folded into metric_rollups, which keeps
+one row per (bucket, project, metric, bucket_start) for day, week (Monday) and
+month buckets with a point count and the sum, min and max of actual and target
+values. Those aggregates merge by addition/min/max, so a batch only touches the
+buckets it falls into. On PostgreSQL and SQLite the merge is a single
+INSERT ... ON CONFLICT DO UPDATE that adds to the stored row, so concurrent
+batches on the same bucket neither lose points nor collide on the key.
+Downsampled series read the rollup for the requested bucket instead of scanning
+raw points, so their cost depends on the number of buckets, not on how many
+points were recorded.
+
+Points without a measurement_date are kept but have no place on the time axis,
+so they are not rolled up.
+"""
+
+import datetime
+from decimal import Decimal
+from sqlalchemy import select, insert, update, func, tuple_, bindparam, case
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from . import models, policy
+
+BUCKETS = ("day", "week", "month")
+AGGREGATES = ("avg", "sum", "min", "max", "count")
+MAX_BATCH = 10000
+KEY_CHUNK = 500
+
+def bucket_start(day: datetime.date, bucket: str) -> datetime.date:
+    if bucket == "week":
+        return day - datetime.timedelta(days=day.weekday())
+    if bucket == "month":
+        return day.replace(day=1)
+    return day
+
+def _merge(total: dict, actual, target):
+    total["count"] += 1
+    for name, value in (("actual", actual), ("target", target)):
+        if value is None:
+            continue
+        total[name + "_count"] += 1
+        total[name + "_sum"] += value
+        low, high = total[name + "_min"], total[name + "_max"]
+        total[name + "_min"] = value if low is None else min(low, value)
+        total[name + "_max"] = value if high is None else max(high, value)
+
+def _empty():
+    return {
+        "count": 0,
+        "actual_count": 0, "actual_sum": Decimal(0), "actual_min": None, "actual_max": None,
+        "target_count": 0, "target_sum": Decimal(0), "target_min": None, "target_max": None,
+    }
+
+def rollup_deltas(points):
+    """
+    {(bucket, project_id, metric_name, bucket_start): aggregates} for points given
+    as dicts with project_id, metric_name, measurement_date, actual_value and target_value.
+    """
+    deltas = {}
+    for point in points:
+        day = point.get("measurement_date")
+        if day is None:
+            continue
+        for bucket in BUCKETS:
+            key = (bucket, point["project_id"], point["metric_name"], bucket_start(day, bucket))
+            if key not in deltas:
+                deltas[key] = _empty()
+            _merge(deltas[key], point.get("actual_value"), point.get("target_value"))
+    return deltas
+
+def combine(existing: dict, delta: dict) -> dict:
+    """Aggregates of two disjoint sets of points."""
+    merged = {}
+    for name, value in existing.items():
+        other = delta[name]
+        if name.endswith("_min") or name.endswith("_max"):
+            choose = min if name.endswith("_min") else max
+            merged[name] = other if value is None else value if other is None else choose(value, other)
+        else:
+            merged[name] = value + other
+    return merged
+
+def _merged_value(name: str, current, added):
+    """SQL for a rollup column after folding in the excluded (new) row's value."""
+    if not (name.endswith("_min") or name.endswith("_max")):
+        return current + added
+    better = added < current if name.endswith("_min") else added > current
+    # NULL means no value yet on either side
+    return case((current.is_(None), added), (added.is_(None), current), (better, added), else_=current)
+
+def apply_rollups(db: Session, points):
+    """Fold points into metric_rollups (caller commits); returns the number of buckets touched."""
+    deltas = rollup_deltas(points)
+    if not deltas:
+        return 0
+    rollup = models.MetricRollup.__table__
+    key_columns = (rollup.c.bucket, rollup.c.project_id, rollup.c.metric_name, rollup.c.bucket_start)
+    names = list(_empty())
+    rows = [
+        {**dict(zip(("bucket", "project_id", "metric_name", "bucket_start"), key)), **delta}
+        for key, delta in deltas.items()
+    ]
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        # the merge happens in the upsert, so concurrent batches on one bucket add up
+        stmt = (postgresql if dialect == "postgresql" else sqlite).insert(rollup)
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=list(key_columns),
+            set_={name: _merged_value(name, rollup.c[name], stmt.excluded[name]) for name in names}
+        ), rows)
+        return len(deltas)
+
+    keys = list(deltas)
+    existing = {}
+    for i in range(0, len(keys), KEY_CHUNK):
+        for row in db.execute(
+            select(*key_columns, *(rollup.c[name] for name in names))
+            .where(tuple_(*key_columns).in_(keys[i:i + KEY_CHUNK]))
+        ):
+            existing[tuple(row[:4])] = dict(zip(names, row[4:]))
+
+    inserts, updates = [], []
+    for key, delta in deltas.items():
+        values = dict(zip(("bucket", "project_id", "metric_name", "bucket_start"), key))
+        if key in existing:
+            merged = combine(existing[key], delta)
+            updates.append({**{"b_" + k: v for k, v in values.items()}, **merged})
+        else:
+            inserts.append({**values, **delta})
+    if inserts:
+        db.execute(insert(rollup), inserts)
+    if updates:
+        db.execute(
+            update(rollup).where(*(column == bindparam("b_" + column.name) for column in key_columns))
+            .values({name: bindparam(name) for name in names}),
+            updates
+        )
+    return len(deltas)
+
+def missing_projects(db: Session, project_ids, user=None):
+    """Sorted ids among project_ids that do not exist or are not visible to user."""
+    criteria = [models.Project.id.in_(project_ids)]
+    if user is not None:
+        criteria.append(policy.project_scope(user))
+    found = {row[0] for row in db.execute(select(models.Project.id).where(*criteria))}
+    return sorted(set(project_ids) - found)
+
+def ingest(db: Session, points):
+    """Append a batch of points and their rollups in one transaction; returns the rows inserted."""
+    points = list(points)
+    if not points:
+        return 0
+    now = datetime.datetime.utcnow()
+    rows = [{**point, "created_at": now} for point in points]
+    db.execute(insert(models.ProjectMetrics.__table__), rows)
+    apply_rollups(db, rows)
+    db.commit()
+    return len(rows)
+
+def _value(agg: str, count, total, low, high):
+    if agg == "count":
+        return count
+    if not count:
+        return None
+    if agg == "sum":
+        return total
+    if agg == "min":
+        return low
+    if agg == "max":
+        return high
+    return round(Decimal(total) / count, 4)
+
+def series(db: Session, metric_name: str, bucket: str = "day", agg: str = "avg", project_id: int = None,
+           start_date: datetime.date = None, end_date: datetime.date = None, user=None):
+    """
+    Downsampled points of one metric, one per bucket, aggregated across the
+    matching projects. start_date and end_date select the buckets containing them.
+    """
+    rollup = models.MetricRollup
+    stmt = select(
+        rollup.bucket_start,
+        func.sum(rollup.count),
+        func.sum(rollup.actual_count),
+        func.sum(rollup.actual_sum),
+        func.min(rollup.actual_min),
+        func.max(rollup.actual_max),
+        func.sum(rollup.target_count),
+        func.sum(rollup.target_sum),
+        func.min(rollup.target_min),
+        func.max(rollup.target_max)
+    ).where(
+        rollup.bucket == bucket, rollup.metric_name == metric_name
+    ).group_by(rollup.bucket_start).order_by(rollup.bucket_start)
+    if project_id is not None:
+        stmt = stmt.where(rollup.project_id == project_id)
+    if user is not None and not policy.is_privileged(user):
+        stmt = stmt.where(rollup.project_id.in_(policy.visible_project_ids(user)))
+    if start_date:
+        stmt = stmt.where(rollup.bucket_start >= bucket_start(start_date, bucket))
+    if end_date:
+        stmt = stmt.where(rollup.bucket_start <= bucket_start(end_date, bucket))
+    return [
+        {
+            "bucket_start": start,
+            "points": points,
+            "value": _value(agg, actual_count, actual_sum, actual_min, actual_max),
+            "target": _value(agg, target_count, target_sum, target_min, target_max)
+        }
+        for start, points, actual_count, actual_sum, actual_min, actual_max,
+            target_count, target_sum, target_min, target_max in db.execute(stmt)
+    ]
@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Boolean, Date, JSON, Enum as SQLEnum, Numeric
-from sqlalchemy.orm import relationship, declarative_base
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Boolean, Date, JSON, Enum as SQLEnum, Numeric, Index, UniqueConstraint
+from sqlalchemy.orm import relationship, declarative_base, backref
 from enum import Enum
 import datetime
 
@@ -76,10 +76,14 @@ class Project(Base):
     budget_total = Column(Numeric(12,2), default=0)
     actual_cost = Column(Numeric(12,2), default=0)
     completion_percentage = Column(Integer, default=0)
-    user_id = Column(Integer, ForeignKey("users.id"))
+    task_weight = Column(Numeric(12,2), default=0)  # root task hours, maintained by task_rollup
+    task_progress = Column(Numeric(14,2), default=0)  # root task hours x completion %
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
     parent_id = Column(Integer, ForeignKey("projects.id"), nullable=True)  # For portfolio hierarchy
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow, index=True)
+    version = Column(Integer, nullable=False, default=1)  # optimistic concurrency, see app.concurrency
+    __mapper_args__ = {"version_id_col": version}
 
     # Relationships
     user = relationship("User", back_populates="projects")
@@ -89,7 +93,7 @@ class Project(Base):
     metrics = relationship("ProjectMetrics", back_populates="project", cascade="all, delete-orphan")
     project_stores = relationship("ProjectStore", back_populates="project", cascade="all, delete-orphan")
     project_resources = relationship("ProjectResource", back_populates="project", cascade="all, delete-orphan")
-    subprojects = relationship("Project", cascade="all, delete-orphan", backref="parent", remote_side=[id])
+    subprojects = relationship("Project", cascade="all, delete-orphan", backref=backref("parent", remote_side=[id]))
 
 class Task(Base):
     __tablename__ = "tasks"
@@ -105,15 +109,41 @@ class Task(Base):
     assigned_to = Column(Integer, ForeignKey("resources.id"))
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
     completed_at = Column(DateTime, nullable=True)
-    updated_at = Column(DateTime, default=datetime.datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow, index=True)
+    version = Column(Integer, nullable=False, default=1)
+    __mapper_args__ = {"version_id_col": version}
     project_id = Column(Integer, ForeignKey("projects.id"))
     user_id = Column(Integer, ForeignKey("users.id"))
     parent_id = Column(Integer, ForeignKey("tasks.id"), nullable=True)
+    # aggregates of the direct children, maintained by task_rollup
+    child_count = Column(Integer, default=0)
+    child_done = Column(Integer, default=0)
+    child_weight = Column(Numeric(12,2), default=0)  # sum of child estimated hours
+    child_progress = Column(Numeric(14,2), default=0)  # sum of child hours x completion %
+
+    # project_id lookups plus the schedule cache fingerprint (count, max updated_at);
+    # open statuses with a passed deadline for the overdue sweep and paging;
+    # updated_at alone (index=True) for delta sync
+    __table_args__ = (
+        Index("ix_tasks_project_id_updated_at", "project_id", "updated_at"),
+        Index("ix_tasks_status_deadline", "status", "deadline"),
+    )
 
     project = relationship("Project", back_populates="tasks")
     user = relationship("User", back_populates="tasks")
     assigned_resource = relationship("Resource")
-    subtasks = relationship("Task", cascade="all, delete-orphan", backref="parent", remote_side=[id])
+    subtasks = relationship("Task", cascade="all, delete-orphan", backref=backref("parent", remote_side=[id]))
+
+# Finish-to-start edges between tasks of the same project
+class TaskDependency(Base):
+    __tablename__ = "task_dependencies"
+    predecessor_id = Column(Integer, ForeignKey("tasks.id", ondelete="CASCADE"), primary_key=True)
+    successor_id = Column(Integer, ForeignKey("tasks.id", ondelete="CASCADE"), primary_key=True, index=True)
+    project_id = Column(Integer, ForeignKey("projects.id"), nullable=False)  # of both tasks; loads a graph without joins
+    lag_hours = Column(Integer, default=0)  # wait between predecessor finish and successor start
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+    __table_args__ = (Index("ix_task_dependencies_project_id_created_at", "project_id", "created_at"),)
 
 class OutlookToken(Base):
     __tablename__ = "outlook_tokens"
@@ -144,9 +174,9 @@ class Resource(Base):
     __tablename__ = "resources"
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
-    email = Column(String)
+    email = Column(String, index=True)  # bulk import matches resources on email
     role = Column(String)  # Store Manager, IT Tech, Regional Manager
-    store_number = Column(String)  # For store-specific resources
+    store_number = Column(String, index=True)  # For store-specific resources
     availability = Column(Numeric(3,2), default=1.0)  # FTE availability
     hourly_rate = Column(Numeric(10,2))  # For budget tracking
     skills = Column(JSON)  # Skills matrix
@@ -156,10 +186,17 @@ class Resource(Base):
     # Relationships
     project_assignments = relationship("ProjectResource", back_populates="resource")
 
+# Normalized Resource.skills: one row per (resource, skill) for indexed matching
+class ResourceSkill(Base):
+    __tablename__ = "resource_skills"
+    resource_id = Column(Integer, ForeignKey("resources.id"), primary_key=True)
+    skill = Column(String, primary_key=True, index=True)  # lower-cased skill name
+    level = Column(Integer)  # proficiency from the skills matrix, if numeric
+
 class Budget(Base):
     __tablename__ = "budgets"
     id = Column(Integer, primary_key=True, index=True)
-    project_id = Column(Integer, ForeignKey("projects.id"), nullable=False)
+    project_id = Column(Integer, ForeignKey("projects.id"), nullable=False, index=True)
     category = Column(SQLEnum(BudgetCategory), nullable=False)
     planned_amount = Column(Numeric(12,2), nullable=False)
     actual_amount = Column(Numeric(12,2), default=0)
@@ -167,6 +204,9 @@ class Budget(Base):
     fiscal_year = Column(String)
     description = Column(Text)
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow, index=True)
+    version = Column(Integer, nullable=False, default=1)
+    __mapper_args__ = {"version_id_col": version}
 
     # Relationships
     project = relationship("Project", back_populates="budgets")
@@ -174,24 +214,28 @@ class Budget(Base):
 class Risk(Base):
     __tablename__ = "risks"
     id = Column(Integer, primary_key=True, index=True)
-    project_id = Column(Integer, ForeignKey("projects.id"), nullable=False)
+    project_id = Column(Integer, ForeignKey("projects.id"), nullable=False, index=True)
     title = Column(String, nullable=False)
     description = Column(Text)
     category = Column(SQLEnum(RiskCategory), nullable=False)
     probability = Column(Integer)  # 1-5 scale
     impact = Column(Integer)  # 1-5 scale
     mitigation_plan = Column(Text)
-    owner_id = Column(Integer, ForeignKey("users.id"))
+    owner_id = Column(Integer, ForeignKey("users.id"), index=True)
     status = Column(String, default="open")  # open, mitigated, closed
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow, index=True)
+    version = Column(Integer, nullable=False, default=1)
+    __mapper_args__ = {"version_id_col": version}
 
     # Relationships
     project = relationship("Project", back_populates="risks")
     owner = relationship("User")
 
+# Append-only measurements; rolled up into metric_rollups as they are inserted
 class ProjectMetrics(Base):
     __tablename__ = "project_metrics"
+    __table_args__ = (Index("ix_project_metrics_project_name_date", "project_id", "metric_name", "measurement_date"),)
     id = Column(Integer, primary_key=True, index=True)
     project_id = Column(Integer, ForeignKey("projects.id"), nullable=False)
     metric_name = Column(String, nullable=False)  # Sales_Impact, Customer_Satisfaction, etc.
@@ -200,11 +244,102 @@ class ProjectMetrics(Base):
     measurement_date = Column(Date)
     units = Column(String)  # %, $, count, etc.
     notes = Column(Text)
-    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow, index=True)  # export watermark
 
     # Relationships
     project = relationship("Project", back_populates="metrics")
 
+# Day/week/month aggregates of project_metrics, merged incrementally per batch
+class MetricRollup(Base):
+    __tablename__ = "metric_rollups"
+    bucket = Column(String, primary_key=True)  # day, week, month
+    metric_name = Column(String, primary_key=True)
+    bucket_start = Column(Date, primary_key=True)
+    project_id = Column(Integer, ForeignKey("projects.id"), primary_key=True)
+    count = Column(Integer, default=0)
+    actual_count = Column(Integer, default=0)
+    actual_sum = Column(Numeric(18,2), default=0)
+    actual_min = Column(Numeric(12,2))
+    actual_max = Column(Numeric(12,2))
+    target_count = Column(Integer, default=0)
+    target_sum = Column(Numeric(18,2), default=0)
+    target_min = Column(Numeric(12,2))
+    target_max = Column(Numeric(12,2))
+
+# Overdue task counts per project and user, replaced by each sweep; the row with
+# neither project nor user holds the portfolio total and marks when the sweep ran
+class OverdueSummary(Base):
+    __tablename__ = "overdue_summary"
+    id = Column(Integer, primary_key=True, index=True)
+    project_id = Column(Integer, ForeignKey("projects.id"), index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
+    overdue_count = Column(Integer, default=0)
+    oldest_deadline = Column(DateTime)
+    swept_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+# Daily earned value points per project; indices (CPI, SPI, EAC) are derived on read
+class EvmSnapshot(Base):
+    __tablename__ = "evm_snapshots"
+    project_id = Column(Integer, ForeignKey("projects.id"), primary_key=True)
+    snapshot_date = Column(Date, primary_key=True, index=True)
+    bac = Column(Numeric(14,2))  # budget at completion
+    pv = Column(Numeric(14,2))  # planned value; NULL without a baseline
+    ev = Column(Numeric(14,2))  # earned value
+    ac = Column(Numeric(14,2))  # actual cost
+
+# Ids of deleted projects, tasks, budgets and risks for delta sync; pruned after the retention window
+class SyncTombstone(Base):
+    __tablename__ = "sync_tombstones"
+    id = Column(Integer, primary_key=True, index=True)
+    entity = Column(String, nullable=False)  # projects, tasks, budgets, risks
+    entity_id = Column(Integer, nullable=False)
+    deleted_at = Column(DateTime, nullable=False, index=True)
+
+# Responses to POSTs sent with an Idempotency-Key, replayed on retries until expires_at;
+# a row without status_code is a request still in progress
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    key = Column(String(255), nullable=False)
+    request_hash = Column(String(64), nullable=False)  # sha256 of the route and its parameters
+    status_code = Column(Integer)
+    response_body = Column(Text)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+    __table_args__ = (UniqueConstraint("user_id", "key", name="uq_idempotency_keys_user_id_key"),)
+
+# Background jobs; workers claim queued rows whose run_after has passed, highest
+# priority first, and retries wait in run_after with exponential backoff
+class Job(Base):
+    __tablename__ = "jobs"
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, nullable=False)  # a key of jobs.HANDLERS
+    payload = Column(JSON)
+    status = Column(String, nullable=False, default="queued")  # queued, running, succeeded, failed
+    priority = Column(Integer, nullable=False, default=0)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    run_after = Column(DateTime, nullable=False)
+    locked_by = Column(String)  # worker holding a running job
+    started_at = Column(DateTime)  # of the current or last attempt
+    finished_at = Column(DateTime)
+    result = Column(JSON)
+    error = Column(Text)  # of the last failed attempt
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+    __table_args__ = (Index("ix_jobs_status_priority_run_after", status, priority.desc(), run_after),)
+
+# Per dataset, the change timestamp up to which rows have been exported to Parquet/Arrow
+class ExportWatermark(Base):
+    __tablename__ = "export_watermarks"
+    dataset = Column(String, primary_key=True)  # a key of columnar_export.DATASETS
+    watermark = Column(DateTime, nullable=False)
+    exported_at = Column(DateTime)
+    row_count = Column(Integer, default=0)  # of the last run
+
 class AuditLog(Base):
     __tablename__ = "audit_logs"
     id = Column(Integer, primary_key=True, index=True)
@@ -224,7 +359,7 @@ class AuditLog(Base):
 class ProjectStore(Base):
     __tablename__ = "project_stores"
     project_id = Column(Integer, ForeignKey("projects.id"), primary_key=True)
-    store_id = Column(Integer, ForeignKey("stores.id"), primary_key=True)
+    store_id = Column(Integer, ForeignKey("stores.id"), primary_key=True, index=True)
     rollout_phase = Column(Integer, default=1)  # 1, 2, 3 for phased rollouts
     start_date = Column(Date)
     completion_date = Column(Date)
@@ -237,7 +372,7 @@ class ProjectStore(Base):
 class ProjectResource(Base):
     __tablename__ = "project_resources"
     project_id = Column(Integer, ForeignKey("projects.id"), primary_key=True)
-    resource_id = Column(Integer, ForeignKey("resources.id"), primary_key=True)
+    resource_id = Column(Integer, ForeignKey("resources.id"), primary_key=True, index=True)
     allocation_percentage = Column(Numeric(5,2), default=100.0)  # % of resource time
     start_date = Column(Date)
     end_date = Column(Date)
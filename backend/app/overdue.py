@@ -0,0 +1,161 @@
+"""
+Overdue tasks: indexed lookups plus a periodically swept summary.
+
+A task is overdue when its deadline has passed and it is not COMPLETE (the same
+rule as portfolio_analytics.overdue_mask). Both parts of that rule go through the
+(status, deadline) index on tasks: the open statuses are an IN list and the
+deadline a range, so neither paging nor counting scans finished work.
+
+sweep() runs one grouped query over that index and replaces overdue_summary with a
+count per (project, user), plus a marker row (both NULL) holding the portfolio total
+and the sweep time. Dashboards then read their overdue count from a handful of
+summary rows, so the dashboard count lags task edits by up to STALE_AFTER (twice
+OVERDUE_SWEEP_SECONDS, at least two minutes): a task completed just after a sweep
+still counts as overdue until the next one. The task list from overdue_page() is
+always live. If the last sweep is older than STALE_AFTER dashboards fall back to
+the live indexed count, so a stopped sweeper costs speed but never serves older
+counts than that.
+start_sweeper() runs sweep() every OVERDUE_SWEEP_SECONDS in a daemon thread.
+Every API process runs one, and so does the overdue.sweep job. On PostgreSQL a
+sweep holds a transaction-level advisory lock, so overlapping sweeps run one
+after another and the later one replaces the earlier one's rows. SQLite
+serializes the writers anyway.
+"""
+
+import os
+import datetime
+import threading
+from sqlalchemy import select, delete, insert, func, and_, or_
+from sqlalchemy.orm import Session
+from . import models, policy
+
+SWEEP_SECONDS = int(os.getenv("OVERDUE_SWEEP_SECONDS", 300))
+STALE_AFTER = datetime.timedelta(seconds=2 * max(SWEEP_SECONDS, 60))
+PAGE_LIMIT = 100
+SWEEP_LOCK_ID = 0x6F766572  # pg advisory lock key shared by every sweeper
+
+OPEN_STATUSES = [status for status in models.TaskStatus if status != models.TaskStatus.COMPLETE]
+
+def overdue_criteria(now: datetime.datetime):
+    return [models.Task.status.in_(OPEN_STATUSES), models.Task.deadline < now]
+
+def sweep(db: Session, now: datetime.datetime = None):
+    """Recount overdue tasks per project and user into overdue_summary; returns the total."""
+    now = now or datetime.datetime.now()
+    if db.get_bind().dialect.name == "postgresql":
+        # one sweep at a time across processes; otherwise two overlapping sweeps each
+        # delete only the rows they can see and both insert
+        db.execute(select(func.pg_advisory_xact_lock(SWEEP_LOCK_ID)))
+    rows = db.execute(
+        select(models.Task.project_id, models.Task.user_id, func.count(), func.min(models.Task.deadline))
+        .where(*overdue_criteria(now))
+        .group_by(models.Task.project_id, models.Task.user_id)
+    ).all()
+    summary = [
+        {"project_id": project_id, "user_id": user_id, "overdue_count": count,
+         "oldest_deadline": oldest, "swept_at": now}
+        for project_id, user_id, count, oldest in rows
+        if project_id is not None or user_id is not None
+    ]
+    total = sum(row[2] for row in rows)
+    summary.append({
+        "project_id": None, "user_id": None, "overdue_count": total,
+        "oldest_deadline": min((row[3] for row in rows), default=None), "swept_at": now
+    })
+    db.execute(delete(models.OverdueSummary.__table__))
+    db.execute(insert(models.OverdueSummary.__table__), summary)
+    db.commit()
+    return total
+
+def last_sweep(db: Session):
+    return db.execute(
+        select(models.OverdueSummary.swept_at)
+        .where(models.OverdueSummary.project_id == None, models.OverdueSummary.user_id == None)
+    ).scalar()
+
+def count_for_user(db: Session, user_id: int, project_ids, now: datetime.datetime = None):
+    """
+    Overdue tasks of user_id within project_ids (a subquery), as the dashboard
+    counts them: from the summary while it is at most STALE_AFTER old (so up to
+    that much behind task edits), otherwise live.
+    """
+    now = now or datetime.datetime.now()
+    swept_at = last_sweep(db)
+    if swept_at is not None and now - swept_at <= STALE_AFTER:
+        summary = models.OverdueSummary
+        return int(db.execute(
+            select(func.coalesce(func.sum(summary.overdue_count), 0))
+            .where(summary.user_id == user_id, summary.project_id.in_(project_ids))
+        ).scalar())
+    return db.execute(
+        select(func.count()).select_from(models.Task)
+        .where(*overdue_criteria(now), models.Task.user_id == user_id, models.Task.project_id.in_(project_ids))
+    ).scalar()
+
+def encode_cursor(deadline: datetime.datetime, task_id: int) -> str:
+    return f"{deadline.isoformat()}_{task_id}"
+
+def decode_cursor(cursor: str):
+    """(deadline, id) of the last item of the previous page; ValueError when malformed."""
+    deadline, _, task_id = cursor.rpartition("_")
+    return datetime.datetime.fromisoformat(deadline), int(task_id)
+
+def overdue_page(db: Session, user=None, project_id: int = None, cursor: str = None,
+                 limit: int = 50, now: datetime.datetime = None):
+    """Overdue tasks oldest deadline first, keyset-paged on (deadline, id)."""
+    now = now or datetime.datetime.now()
+    task = models.Task
+    stmt = select(
+        task.id, task.title, task.description, task.project_id, task.user_id,
+        task.status, task.priority, task.deadline
+    ).where(*overdue_criteria(now))
+    if user is not None:
+        stmt = stmt.where(policy.task_scope(user))
+    if project_id is not None:
+        stmt = stmt.where(task.project_id == project_id)
+    if cursor:
+        after_deadline, after_id = decode_cursor(cursor)
+        stmt = stmt.where(or_(
+            task.deadline > after_deadline,
+            and_(task.deadline == after_deadline, task.id > after_id)
+        ))
+    rows = db.execute(stmt.order_by(task.deadline, task.id).limit(limit + 1)).all()
+    items = [
+        {
+            "id": row.id,
+            "title": row.title,
+            "description": row.description,
+            "project_id": row.project_id,
+            "user_id": row.user_id,
+            "status": row.status.value,
+            "priority": row.priority.name.lower() if row.priority else None,
+            "deadline": row.deadline,
+            "days_overdue": (now - row.deadline).days
+        }
+        for row in rows[:limit]
+    ]
+    next_cursor = encode_cursor(rows[limit - 1].deadline, rows[limit - 1].id) if len(rows) > limit else None
+    return {"items": items, "next_cursor": next_cursor}
+
+def start_sweeper(session_factory, interval: int = SWEEP_SECONDS):
+    """Sweep every interval seconds in a daemon thread (disabled when interval <= 0)."""
+    if interval <= 0:
+        return None
+    stop = threading.Event()
+
+    def run():
+        while True:
+            db = session_factory()
+            try:
+                sweep(db)
+            except Exception:
+                # keep sweeping; dashboards fall back to live counts meanwhile
+                db.rollback()
+            finally:
+                db.close()
+            if stop.wait(interval):
+                break
+
+    thread = threading.Thread(target=run, name="overdue-sweeper", daemon=True)
+    thread.start()
+    return stop
@@ -0,0 +1,92 @@
+"""
+Row-level authorization compiled into SQL.
+
+Each *_scope(user) helper returns a SQLAlchemy boolean clause that restricts a
+query to the rows the user may see, so authorization is applied by the database
+as an indexed predicate instead of filtering loaded rows in Python.
+
+Rules:
+- admin and manager roles see every row.
+- other users see projects they own, plus projects rolled out to their store
+  (project_stores joined to stores on the user's store_number).
+- tasks, budgets and risks follow project visibility; tasks created by and
+  risks owned by the user are always visible.
+- stores and resources are limited to the user's store and to those taking part
+  in projects the user owns.
+"""
+
+from sqlalchemy import select, true, or_
+from . import models
+
+PRIVILEGED_ROLES = ("admin", "manager")
+
+def is_privileged(user) -> bool:
+    return getattr(user, "role", None) in PRIVILEGED_ROLES
+
+def _owned_project_ids(user):
+    return select(models.Project.id).where(models.Project.user_id == user.id)
+
+def _store_project_ids(user):
+    return (
+        select(models.ProjectStore.project_id)
+        .join(models.Store, models.Store.id == models.ProjectStore.store_id)
+        .where(models.Store.store_number == user.store_number)
+    )
+
+def visible_project_ids(user):
+    """Subquery of project ids visible to a non-privileged user."""
+    query = _owned_project_ids(user)
+    if user.store_number:
+        query = query.union(_store_project_ids(user))
+    return query
+
+def project_scope(user):
+    if is_privileged(user):
+        return true()
+    clause = models.Project.user_id == user.id
+    if user.store_number:
+        clause = or_(clause, models.Project.id.in_(_store_project_ids(user)))
+    return clause
+
+def task_scope(user):
+    if is_privileged(user):
+        return true()
+    return or_(
+        models.Task.user_id == user.id,
+        models.Task.project_id.in_(visible_project_ids(user))
+    )
+
+def budget_scope(user):
+    if is_privileged(user):
+        return true()
+    return models.Budget.project_id.in_(visible_project_ids(user))
+
+def risk_scope(user):
+    if is_privileged(user):
+        return true()
+    return or_(
+        models.Risk.owner_id == user.id,
+        models.Risk.project_id.in_(visible_project_ids(user))
+    )
+
+def store_scope(user):
+    if is_privileged(user):
+        return true()
+    owned_store_ids = select(models.ProjectStore.store_id).where(
+        models.ProjectStore.project_id.in_(_owned_project_ids(user))
+    )
+    clause = models.Store.id.in_(owned_store_ids)
+    if user.store_number:
+        clause = or_(models.Store.store_number == user.store_number, clause)
+    return clause
+
+def resource_scope(user):
+    if is_privileged(user):
+        return true()
+    assigned_resource_ids = select(models.ProjectResource.resource_id).where(
+        models.ProjectResource.project_id.in_(_owned_project_ids(user))
+    )
+    clause = models.Resource.id.in_(assigned_resource_ids)
+    if user.store_number:
+        clause = or_(models.Resource.store_number == user.store_number, clause)
+    return clause
@@ -0,0 +1,197 @@
+"""
+Columnar portfolio analytics.
+
+Loaders run a lightweight select() for just the needed columns and return them as
+NumPy arrays (money as int64 cents, enums as fixed-width upper-case name strings,
+deadlines as datetime64). The summary functions then aggregate with vectorized operations, so
+dashboard cost no longer grows with per-row Python and Decimal arithmetic.
+"""
+
+import datetime
+from decimal import Decimal
+import numpy as np
+from sqlalchemy import select, cast, func, String, BigInteger
+from sqlalchemy.orm import Session
+from . import models
+
+COMPLETE = models.TaskStatus.COMPLETE.name
+CANCELLED = models.TaskStatus.CANCELLED.name
+HIGH_RISK_SCORE = 15
+
+def cents(column):
+    """SQL expression for a Numeric(…, 2) money column as integer cents."""
+    return cast(func.round(func.coalesce(column, 0) * 100), BigInteger)
+
+def to_money(value_cents) -> Decimal:
+    return Decimal(int(value_cents)).scaleb(-2)
+
+def load_columns(db: Session, stmt, dtypes: dict):
+    """Execute stmt and return {column name: ndarray} using the given dtypes."""
+    rows = db.execute(stmt).all()
+    columns = list(zip(*rows)) if rows else [()] * len(dtypes)
+    return {
+        name: np.array(values, dtype=dtype)
+        for (name, dtype), values in zip(dtypes.items(), columns)
+    }
+
+def user_project_ids(user_id: int):
+    return select(models.Project.id).where(models.Project.user_id == user_id)
+
+def load_projects(db: Session, user_id: int, project_id: int = None):
+    stmt = select(
+        models.Project.id,
+        models.Project.name,
+        cast(models.Project.status, String),
+        func.coalesce(models.Project.completion_percentage, 0)
+    ).where(models.Project.user_id == user_id)
+    if project_id is not None:
+        stmt = stmt.where(models.Project.id == project_id)
+    return load_columns(db, stmt.order_by(models.Project.id), {
+        "id": np.int64, "name": object, "status": "U", "completion": np.int64
+    })
+
+def load_budgets(db: Session, *criteria):
+    stmt = select(
+        models.Budget.project_id,
+        cast(models.Budget.category, String),
+        cents(models.Budget.planned_amount),
+        cents(models.Budget.actual_amount)
+    ).where(*criteria)
+    return load_columns(db, stmt, {
+        "project_id": np.int64, "category": "U", "planned": np.int64, "actual": np.int64
+    })
+
+def load_tasks(db: Session, *criteria):
+    stmt = select(
+        func.coalesce(models.Task.project_id, 0),
+        cast(models.Task.status, String),
+        models.Task.deadline
+    ).where(*criteria)
+    return load_columns(db, stmt, {
+        "project_id": np.int64, "status": "U", "deadline": "datetime64[us]"
+    })
+
+def load_risks(db: Session, *criteria):
+    stmt = select(
+        models.Risk.project_id,
+        func.coalesce(models.Risk.probability, 0),
+        func.coalesce(models.Risk.impact, 0),
+        models.Risk.status
+    ).where(*criteria)
+    return load_columns(db, stmt, {
+        "project_id": np.int64, "probability": np.int64, "impact": np.int64, "status": "U"
+    })
+
+def percentage(part, whole):
+    return float(part) / float(whole) * 100 if whole else 0
+
+def completed_mask(status):
+    return status == COMPLETE
+
+def overdue_mask(deadline, status, now: datetime.datetime):
+    # NaT deadlines compare False, so tasks without a deadline are never overdue
+    return (deadline < np.datetime64(now, "us")) & (status != COMPLETE)
+
+def risk_scores(probability, impact):
+    return probability * impact
+
+def group_sum(keys, values, groups):
+    """Exact int64 per-group sums of values, aligned to the sorted unique groups array."""
+    out = np.zeros(len(groups), dtype=np.int64)
+    if len(keys) and len(groups):
+        idx = np.searchsorted(groups, keys).clip(max=len(groups) - 1)
+        known = groups[idx] == keys
+        values = np.broadcast_to(values, keys.shape)
+        np.add.at(out, idx[known], values[known])
+    return out
+
+def budget_summary(budgets):
+    planned = int(budgets["planned"].sum())
+    actual = int(budgets["actual"].sum())
+    categories = {}
+    names, inverse = np.unique(budgets["category"], return_inverse=True)
+    if len(names):
+        cat_planned = np.zeros(len(names), dtype=np.int64)
+        cat_actual = np.zeros(len(names), dtype=np.int64)
+        np.add.at(cat_planned, inverse, budgets["planned"])
+        np.add.at(cat_actual, inverse, budgets["actual"])
+        for name, p, a in zip(names, cat_planned, cat_actual):
+            categories[name.lower()] = {
+                "planned": to_money(p), "actual": to_money(a), "variance": to_money(p - a)
+            }
+    return {
+        "total_planned": to_money(planned),
+        "total_actual": to_money(actual),
+        "variance": to_money(planned - actual),
+        "categories": categories
+    }
+
+def dashboard_summary(projects, budgets, tasks, risks, now: datetime.datetime, overdue_tasks: int = None):
+    total_projects = len(projects["id"])
+    completed_projects = int(np.count_nonzero(projects["status"] == COMPLETE))
+    active_projects = total_projects - int(np.count_nonzero(np.isin(projects["status"], [COMPLETE, CANCELLED])))
+
+    total_budget = int(budgets["planned"].sum())
+    total_spent = int(budgets["actual"].sum())
+    variance = total_budget - total_spent
+
+    total_tasks = len(tasks["status"])
+    completed_tasks = int(np.count_nonzero(completed_mask(tasks["status"])))
+    if overdue_tasks is None:
+        overdue_tasks = int(np.count_nonzero(overdue_mask(tasks["deadline"], tasks["status"], now)))
+
+    scores = risk_scores(risks["probability"], risks["impact"])
+    return {
+        "projects": {
+            "total": total_projects,
+            "active": active_projects,
+            "completed": completed_projects,
+            "completion_rate": percentage(completed_projects, total_projects)
+        },
+        "budget": {
+            "total_planned": to_money(total_budget),
+            "total_spent": to_money(total_spent),
+            "variance": to_money(variance),
+            "variance_percentage": percentage(variance, total_budget)
+        },
+        "tasks": {
+            "total": total_tasks,
+            "completed": completed_tasks,
+            "overdue": overdue_tasks,
+            "completion_rate": percentage(completed_tasks, total_tasks)
+        },
+        "risks": {
+            "total": len(scores),
+            "high_risk": int(np.count_nonzero(scores >= HIGH_RISK_SCORE)),
+            "open": int(np.count_nonzero(risks["status"] == "open"))
+        }
+    }
+
+def project_performance(projects, budgets, tasks, risks):
+    ids = projects["id"]  # sorted by load_projects
+    task_total = group_sum(tasks["project_id"], 1, ids)
+    task_done = group_sum(tasks["project_id"], completed_mask(tasks["status"]).astype(np.int64), ids)
+    budget_count = group_sum(budgets["project_id"], 1, ids)
+    planned = group_sum(budgets["project_id"], budgets["planned"], ids)
+    actual = group_sum(budgets["project_id"], budgets["actual"], ids)
+    risk_count = group_sum(risks["project_id"], 1, ids)
+    risk_total = group_sum(risks["project_id"], risk_scores(risks["probability"], risks["impact"]), ids)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        task_completion = np.where(task_total > 0, task_done / task_total * 100, 0.0)
+        budget_performance = np.where((budget_count > 0) & (planned != 0), (planned - actual) / planned * 100, 0.0)
+        risk_score = np.where(risk_count > 0, risk_total / risk_count, 0.0)
+    overall_health = (task_completion + np.maximum(0, budget_performance) - risk_score * 5) / 2
+
+    return [
+        {
+            "project_id": int(ids[i]),
+            "project_name": projects["name"][i],
+            "completion_percentage": int(projects["completion"][i]),
+            "task_completion_rate": float(task_completion[i]),
+            "budget_performance": float(budget_performance[i]),
+            "risk_score": float(risk_score[i]),
+            "overall_health": float(overall_health[i])
+        }
+        for i in range(len(ids))
+    ]
@@ -0,0 +1,140 @@
+"""
+Resource capacity and over-allocation.
+
+Assignments (project_resources rows) are intervals carrying an allocation
+percentage. capacity_matrix() sweeps them in one vectorized pass: each interval adds
+its allocation at its first day and removes it the day after its last, and a
+cumulative sum along the day axis gives every resource's daily load. Weeks are
+then the mean of their seven days, and a week is over-allocated when that load
+exceeds the resource's availability (FTE x 100%).
+
+Assignments without a start date count from the beginning of the range, and
+assignments without an end date run to its end.
+"""
+
+import datetime
+import numpy as np
+from sqlalchemy import select, func, or_
+from sqlalchemy.orm import Session
+from . import models, policy
+from .portfolio_analytics import cents, load_columns
+
+MAX_WEEKS = 104
+
+def week_start(day: datetime.date) -> datetime.date:
+    return day - datetime.timedelta(days=day.weekday())
+
+def capacity_matrix(resource_ids, availability, assignment_resource, assignment_start,
+                    assignment_end, allocation, start_date: datetime.date, weeks: int):
+    """
+    Weekly load for each resource over [start_date, start_date + weeks).
+
+    resource_ids must be sorted. availability and allocation are integer hundredths
+    of a percent (1.0 FTE = 10000, a 50% assignment = 5000); dates are datetime64[D]
+    with NaT for open ends. Returns (load, over): load is the mean allocated percent per
+    week (float, shape resources x weeks), over flags weeks above availability.
+    """
+    days = weeks * 7
+    origin = np.datetime64(start_date, "D")
+    first = (assignment_start - origin).astype(np.int64)
+    first = np.where(np.isnat(assignment_start), 0, first).clip(0, days)
+    after_last = (assignment_end - origin).astype(np.int64) + 1
+    after_last = np.where(np.isnat(assignment_end), days, after_last).clip(0, days)
+
+    rows = np.searchsorted(resource_ids, assignment_resource)
+    rows = rows.clip(max=max(len(resource_ids) - 1, 0))
+    valid = (after_last > first)
+    if len(resource_ids):
+        valid &= resource_ids[rows] == assignment_resource
+
+    sweep = np.zeros((len(resource_ids), days + 1), dtype=np.int64)
+    np.add.at(sweep, (rows[valid], first[valid]), allocation[valid])
+    np.add.at(sweep, (rows[valid], after_last[valid]), -allocation[valid])
+    daily = np.cumsum(sweep[:, :days], axis=1)
+
+    weekly_total = daily.reshape(len(resource_ids), weeks, 7).sum(axis=2)
+    # compare exact integer day-sums so rounding never flips a flag
+    over = weekly_total > (availability * 7)[:, None]
+    return weekly_total / 700.0, over
+
+def resource_criteria(user=None, role: str = None, store_number: str = None):
+    criteria = [models.Resource.is_active == True]
+    if user is not None:
+        criteria.append(policy.resource_scope(user))
+    if role:
+        criteria.append(models.Resource.role == role)
+    if store_number:
+        criteria.append(models.Resource.store_number == store_number)
+    return criteria
+
+def load_resources(db: Session, *criteria):
+    stmt = select(
+        models.Resource.id,
+        models.Resource.name,
+        models.Resource.role,
+        # FTE as hundredths of a percent; unset means full-time, as the column default
+        cents(func.coalesce(models.Resource.availability, 1) * 100)
+    ).where(*criteria)
+    return load_columns(db, stmt.order_by(models.Resource.id), {
+        "id": np.int64, "name": object, "role": object, "availability": np.int64
+    })
+
+def load_assignments(db: Session, start_date: datetime.date, end_date: datetime.date, *criteria):
+    """Assignments of the matching resources overlapping [start_date, end_date)."""
+    stmt = select(
+        models.ProjectResource.resource_id,
+        models.ProjectResource.start_date,
+        models.ProjectResource.end_date,
+        cents(models.ProjectResource.allocation_percentage)
+    ).join(models.Resource, models.Resource.id == models.ProjectResource.resource_id).where(
+        or_(models.ProjectResource.start_date == None, models.ProjectResource.start_date < end_date),
+        or_(models.ProjectResource.end_date == None, models.ProjectResource.end_date >= start_date),
+        *criteria
+    )
+    return load_columns(db, stmt, {
+        "resource_id": np.int64, "start": "datetime64[D]", "end": "datetime64[D]", "allocation": np.int64
+    })
+
+def resource_capacity(db: Session, start_date: datetime.date = None, weeks: int = 13, user=None,
+                      role: str = None, store_number: str = None, over_allocated_only: bool = False):
+    start_date = week_start(start_date or datetime.date.today())
+    weeks = max(1, min(weeks, MAX_WEEKS))
+    end_date = start_date + datetime.timedelta(weeks=weeks)
+
+    criteria = resource_criteria(user=user, role=role, store_number=store_number)
+    resources = load_resources(db, *criteria)
+    assignments = load_assignments(db, start_date, end_date, *criteria)
+    load, over = capacity_matrix(
+        resources["id"], resources["availability"],
+        assignments["resource_id"], assignments["start"], assignments["end"], assignments["allocation"],
+        start_date, weeks
+    )
+
+    flagged = over.any(axis=1)
+    capacity = resources["availability"] / 10000
+    with np.errstate(divide="ignore", invalid="ignore"):
+        utilization = np.round(load / (capacity * 100)[:, None], 3)
+    selected = np.flatnonzero(flagged) if over_allocated_only else np.arange(len(resources["id"]))
+    allocated = np.round(load, 2)[selected].tolist()
+    utilization = utilization[selected].tolist()
+    peaks = load.max(axis=1)[selected].tolist()
+    rows = []
+    for n, i in enumerate(selected.tolist()):
+        rows.append({
+            "resource_id": int(resources["id"][i]),
+            "name": resources["name"][i],
+            "role": resources["role"][i],
+            "capacity": float(capacity[i]),
+            "allocated": allocated[n],
+            # zero-availability resources have no meaningful utilization ratio
+            "utilization": utilization[n] if capacity[i] else None,
+            "over_allocated_weeks": np.flatnonzero(over[i]).tolist(),
+            "peak": round(peaks[n], 2)
+        })
+    return {
+        "start_date": start_date,
+        "end_date": end_date,
+        "weeks": [start_date + datetime.timedelta(weeks=w) for w in range(weeks)],
+        "resources": rows,
+        "over_allocated_resources": int(np.count_nonzero(flagged))
+    }
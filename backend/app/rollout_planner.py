@@ -0,0 +1,160 @@
+"""
+Phased store rollout planning over ProjectStore.
+
+plan_rollouts() selects each project's target stores with one query, spreads
+them over weeks so that no district exceeds its weekly capacity (counting stores
+already scheduled by other projects and earlier projects in the same batch), and
+writes the resulting project_stores rows with a single batched insert. rollout_progress() reports per-phase status counts with
+one grouped query.
+"""
+
+import datetime
+from collections import defaultdict, deque
+from sqlalchemy import select, insert, func
+from sqlalchemy.orm import Session
+from . import models
+
+def build_schedule(stores, start_date: datetime.date, weekly_capacity: int,
+                   district_capacity: dict = None, existing_load: dict = None,
+                   weeks_per_phase: int = 1):
+    """
+    Assign stores to weeks round-robin across districts.
+
+    stores: iterable of (store_id, district) in the order they should roll out.
+    existing_load: {(district, week_index): stores already starting that week};
+    it is updated in place so consecutive projects share the same capacity.
+    Returns (scheduled, unscheduled) where scheduled is a list of
+    (store_id, rollout_phase, start_date) and unscheduled lists store ids whose
+    district has no capacity. Phases count from the project's first rollout week.
+    """
+    district_capacity = district_capacity or {}
+    existing_load = existing_load if existing_load is not None else defaultdict(int)
+    queues = defaultdict(deque)
+    for store_id, district in stores:
+        queues[district].append(store_id)
+
+    unscheduled = []
+    for district in list(queues):
+        if district_capacity.get(district, weekly_capacity) <= 0:
+            unscheduled.extend(queues.pop(district))
+
+    scheduled = []
+    week = 0
+    first_week = None
+    while queues:
+        week_start = start_date + datetime.timedelta(weeks=week)
+        for district in list(queues):
+            free = district_capacity.get(district, weekly_capacity) - existing_load.get((district, week), 0)
+            queue = queues[district]
+            take = min(free, len(queue))
+            if take > 0:
+                if first_week is None:
+                    first_week = week
+                phase = (week - first_week) // weeks_per_phase + 1
+                for _ in range(take):
+                    scheduled.append((queue.popleft(), phase, week_start))
+                existing_load[(district, week)] = existing_load.get((district, week), 0) + take
+            if not queue:
+                del queues[district]
+        week += 1
+    return scheduled, unscheduled
+
+def _existing_load(db: Session, start_date: datetime.date):
+    """Stores already starting per (district, week index) from start_date on, across all projects."""
+    rows = db.execute(
+        select(models.Store.district, models.ProjectStore.start_date, func.count())
+        .join(models.Store, models.Store.id == models.ProjectStore.store_id)
+        .where(models.ProjectStore.start_date >= start_date)
+        .group_by(models.Store.district, models.ProjectStore.start_date)
+    ).all()
+    load = defaultdict(int)
+    for district, day, count in rows:
+        load[(district, (day - start_date).days // 7)] += count
+    return load
+
+def _candidate_stores(db: Session, project_id: int, regions: list = None, districts: list = None, formats: list = None):
+    already_assigned = select(models.ProjectStore.store_id).where(models.ProjectStore.project_id == project_id)
+    query = select(models.Store.id, models.Store.district).where(
+        models.Store.is_active == True,
+        models.Store.id.not_in(already_assigned)
+    )
+    if regions:
+        query = query.where(models.Store.region.in_(regions))
+    if districts:
+        query = query.where(models.Store.district.in_(districts))
+    if formats:
+        query = query.where(models.Store.format.in_(formats))
+    return db.execute(query.order_by(models.Store.district, models.Store.store_number)).all()
+
+def plan_rollouts(db: Session, project_ids: list, start_date: datetime.date, weekly_capacity: int,
+                  district_capacity: dict = None, weeks_per_phase: int = 1,
+                  regions: list = None, districts: list = None, formats: list = None):
+    """Plan several projects against one shared capacity picture and insert all rows in one batch."""
+    load = _existing_load(db, start_date)
+    rows = []
+    plans = []
+    # a repeated id would plan the same stores twice and break the (project_id, store_id) key
+    for project_id in dict.fromkeys(project_ids):
+        stores = _candidate_stores(db, project_id, regions, districts, formats)
+        scheduled, unscheduled = build_schedule(
+            stores, start_date, weekly_capacity,
+            district_capacity=district_capacity,
+            existing_load=load,
+            weeks_per_phase=weeks_per_phase
+        )
+        rows.extend(
+            {"project_id": project_id, "store_id": store_id, "rollout_phase": phase,
+             "start_date": week_start, "status": "planned"}
+            for store_id, phase, week_start in scheduled
+        )
+        phases = defaultdict(int)
+        for _, phase, _ in scheduled:
+            phases[phase] += 1
+        plans.append({
+            "project_id": project_id,
+            "scheduled": len(scheduled),
+            "unscheduled_store_ids": unscheduled,
+            "phases": [{"phase": phase, "stores": count} for phase, count in sorted(phases.items())],
+            "start_date": min((s[2] for s in scheduled), default=None),
+            "end_date": max((s[2] for s in scheduled), default=None)
+        })
+    if rows:
+        db.execute(insert(models.ProjectStore.__table__), rows)
+        db.commit()
+    return plans
+
+def plan_rollout(db: Session, project_id: int, start_date: datetime.date, weekly_capacity: int, **options):
+    return plan_rollouts(db, [project_id], start_date, weekly_capacity, **options)[0]
+
+def rollout_progress(db: Session, project_id: int):
+    rows = db.execute(
+        select(
+            models.ProjectStore.rollout_phase,
+            models.ProjectStore.status,
+            func.count(),
+            func.min(models.ProjectStore.start_date),
+            func.max(models.ProjectStore.completion_date)
+        )
+        .where(models.ProjectStore.project_id == project_id)
+        .group_by(models.ProjectStore.rollout_phase, models.ProjectStore.status)
+    ).all()
+    phases = {}
+    for phase, status, count, first_start, last_completion in rows:
+        entry = phases.setdefault(phase, {
+            "phase": phase, "total": 0, "completed": 0, "by_status": {},
+            "start_date": first_start, "completion_date": None
+        })
+        entry["total"] += count
+        entry["by_status"][status] = count
+        if status == "complete":
+            entry["completed"] += count
+        if first_start and (entry["start_date"] is None or first_start < entry["start_date"]):
+            entry["start_date"] = first_start
+        if last_completion and (entry["completion_date"] is None or last_completion > entry["completion_date"]):
+            entry["completion_date"] = last_completion
+    result = []
+    for phase in sorted(phases, key=lambda p: (p is None, p)):
+        entry = phases[phase]
+        entry["completion_rate"] = entry["completed"] / entry["total"] * 100 if entry["total"] else 0
+        result.append(entry)
+    return result
@@ -1,133 +1,190 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from typing import List, Optional
 from sqlalchemy.orm import Session
 import datetime
-from .. import db, crud, schemas
-from ..auth import get_current_user
+from .. import db, crud, schemas, models, portfolio_analytics, earned_value, metric_series, forecasting, overdue, analytics_overview, single_flight, concurrency, jobs
+from ..auth import get_token_user
+from ..single_flight import coalesce, user_scope, visibility_scope
 
 router = APIRouter(prefix="/api/analytics", tags=["analytics"])
 
 @router.get("/dashboard")
+@coalesce(scope=user_scope)
 def dashboard_analytics(
-    current_user=Depends(get_current_user),
+    current_user=Depends(get_token_user),
     db: Session = Depends(db.get_db)
 ):
     """Get dashboard analytics data"""
-    # Get user's projects
-    projects = crud.list_projects(db, current_user.id)
-    
-    # Calculate metrics
-    total_projects = len(projects)
-    active_projects = len([p for p in projects if p.status not in ["complete", "cancelled"]])
-    completed_projects = len([p for p in projects if p.status == "complete"])
-    
-    # Budget analysis
-    all_budgets = []
-    for project in projects:
-        budgets = crud.get_budgets(db, project.id)
-        all_budgets.extend(budgets)
-    
-    total_budget = sum(b.planned_amount for b in all_budgets)
-    total_spent = sum(b.actual_amount for b in all_budgets)
-    budget_variance = total_budget - total_spent
-    
-    # Task analysis
-    all_tasks = []
-    for project in projects:
-        tasks = crud.list_tasks(db, current_user.id, project.id)
-        all_tasks.extend(tasks)
-    
-    total_tasks = len(all_tasks)
-    completed_tasks = len([t for t in all_tasks if t.status == "complete"])
-    overdue_tasks = len([t for t in all_tasks if t.deadline and t.deadline < datetime.datetime.now() and t.status != "complete"])
-    
-    # Risk analysis
-    all_risks = []
-    for project in projects:
-        risks = crud.get_risks(db, project.id)
-        all_risks.extend(risks)
-    
-    high_risks = len([r for r in all_risks if r.probability and r.impact and r.probability * r.impact >= 15])
-    open_risks = len([r for r in all_risks if r.status == "open"])
-    
-    return {
-        "projects": {
-            "total": total_projects,
-            "active": active_projects,
-            "completed": completed_projects,
-            "completion_rate": (completed_projects / total_projects * 100) if total_projects > 0 else 0
-        },
-        "budget": {
-            "total_planned": total_budget,
-            "total_spent": total_spent,
-            "variance": budget_variance,
-            "variance_percentage": (budget_variance / total_budget * 100) if total_budget > 0 else 0
-        },
-        "tasks": {
-            "total": total_tasks,
-            "completed": completed_tasks,
-            "overdue": overdue_tasks,
-            "completion_rate": (completed_tasks / total_tasks * 100) if total_tasks > 0 else 0
-        },
-        "risks": {
-            "total": len(all_risks),
-            "high_risk": high_risks,
-            "open": open_risks
-        }
-    }
+    project_ids = portfolio_analytics.user_project_ids(current_user.id)
+    now = datetime.datetime.now()
+    return portfolio_analytics.dashboard_summary(
+        portfolio_analytics.load_projects(db, current_user.id),
+        portfolio_analytics.load_budgets(db, models.Budget.project_id.in_(project_ids)),
+        portfolio_analytics.load_tasks(
+            db, models.Task.user_id == current_user.id, models.Task.project_id.in_(project_ids)
+        ),
+        portfolio_analytics.load_risks(db, models.Risk.project_id.in_(project_ids)),
+        now,
+        overdue_tasks=overdue.count_for_user(db, current_user.id, project_ids, now)
+    )
 
 @router.get("/project-performance")
+@coalesce(scope=user_scope)
 def project_performance(
     project_id: Optional[int] = None,
-    current_user=Depends(get_current_user),
+    current_user=Depends(get_token_user),
     db: Session = Depends(db.get_db)
 ):
     """Get project performance metrics"""
-    if project_id:
-        projects = [crud.get_project(db, project_id, current_user.id)]
-        if not projects[0]:
-            raise HTTPException(status_code=404, detail="Project not found")
-    else:
-        projects = crud.list_projects(db, current_user.id)
-    
-    performance_data = []
-    for project in projects:
-        tasks = crud.list_tasks(db, current_user.id, project.id)
-        budgets = crud.get_budgets(db, project.id)
-        risks = crud.get_risks(db, project.id)
-        metrics = crud.get_metrics(db, project.id)
-        
-        # Calculate performance scores
-        task_completion = (len([t for t in tasks if t.status == "complete"]) / len(tasks) * 100) if tasks else 0
-        budget_performance = ((sum(b.planned_amount for b in budgets) - sum(b.actual_amount for b in budgets)) / sum(b.planned_amount for b in budgets) * 100) if budgets else 0
-        risk_score = sum(r.probability * r.impact for r in risks if r.probability and r.impact) / len(risks) if risks else 0
-        
-        performance_data.append({
-            "project_id": project.id,
-            "project_name": project.name,
-            "completion_percentage": project.completion_percentage,
-            "task_completion_rate": task_completion,
-            "budget_performance": budget_performance,
-            "risk_score": risk_score,
-            "overall_health": (task_completion + max(0, budget_performance) - (risk_score * 5)) / 2
-        })
-    
-    return performance_data
+    projects = portfolio_analytics.load_projects(db, current_user.id, project_id)
+    if project_id and not len(projects["id"]):
+        raise HTTPException(status_code=404, detail="Project not found")
+    project_ids = projects["id"].tolist()
+
+    return portfolio_analytics.project_performance(
+        projects,
+        portfolio_analytics.load_budgets(db, models.Budget.project_id.in_(project_ids)),
+        portfolio_analytics.load_tasks(
+            db, models.Task.user_id == current_user.id, models.Task.project_id.in_(project_ids)
+        ),
+        portfolio_analytics.load_risks(db, models.Risk.project_id.in_(project_ids))
+    )
+
+@router.get("/overview")
+def analytics_overview_report(
+    response: Response,
+    current_user=Depends(get_token_user),
+    db: Session = Depends(db.get_db)
+):
+    """Dashboard and project performance from one concurrent load; section timings in Server-Timing"""
+    key = single_flight.request_key("analytics.overview", {}, current_user)
+    payload, timings = single_flight.flights.do(key, lambda: analytics_overview.overview(db, current_user.id))
+    response.headers["Server-Timing"] = analytics_overview.server_timing(timings)
+    return payload
+
+@router.get("/conflicts")
+def update_conflicts(current_user=Depends(get_token_user)):
+    """Updates and optimistic-locking conflicts per entity since startup (admin/manager only)"""
+    if current_user.role not in ["admin", "manager"]:
+        raise HTTPException(status_code=403, detail="Insufficient permissions")
+    return concurrency.stats.snapshot()
+
+@router.get("/evm")
+@coalesce(scope=visibility_scope)
+def earned_value_report(
+    project_id: Optional[int] = None,
+    current_user=Depends(get_token_user),
+    db: Session = Depends(db.get_db)
+):
+    """PV, EV, AC, CPI, SPI and EAC per project and for the portfolio"""
+    report = earned_value.evm_report(db, user=current_user, project_id=project_id)
+    if project_id and not report["projects"]:
+        raise HTTPException(status_code=404, detail="Project not found")
+    return report
+
+@router.get("/evm/trend")
+@coalesce(scope=visibility_scope)
+def earned_value_trend(
+    project_id: Optional[int] = None,
+    start_date: Optional[datetime.date] = None,
+    end_date: Optional[datetime.date] = None,
+    current_user=Depends(get_token_user),
+    db: Session = Depends(db.get_db)
+):
+    """Daily EVM points from the snapshot table"""
+    return earned_value.trend(db, user=current_user, project_id=project_id, start=start_date, end=end_date)
+
+@router.post("/evm/snapshots", status_code=202)
+def capture_evm_snapshots(
+    current_user=Depends(get_token_user),
+    db: Session = Depends(db.get_db)
+):
+    """Queue recording today's EVM point for every project that has none yet (admin/manager only)"""
+    if current_user.role not in ["admin", "manager"]:
+        raise HTTPException(status_code=403, detail="Insufficient permissions")
+    return jobs.accepted(jobs.enqueue(db, "evm.snapshots", user_id=current_user.id))
+
+@router.get("/forecast")
+@coalesce(scope=visibility_scope)
+def completion_forecast(
+    project_id: Optional[int] = None,
+    current_user=Depends(get_token_user),
+    db: Session = Depends(db.get_db)
+):
+    """P50/P85 completion dates from Monte Carlo sampling of weekly throughput"""
+    report = forecasting.forecast(db, user=current_user, project_id=project_id)
+    if project_id and not report["projects"]:
+        raise HTTPException(status_code=404, detail="Project not found")
+    return report
+
+@router.post("/forecast/refresh")
+def refresh_forecasts(
+    current_user=Depends(get_token_user),
+    db: Session = Depends(db.get_db)
+):
+    """Recompute and cache forecasts for the whole portfolio (admin/manager only)"""
+    if current_user.role not in ["admin", "manager"]:
+        raise HTTPException(status_code=403, detail="Insufficient permissions")
+    return {"as_of": datetime.date.today(), "projects": len(forecasting.forecast_portfolio(db, refresh=True))}
 
 @router.post("/metrics", response_model=schemas.MetricsOut)
 def create_metric(
     metric_data: schemas.MetricsCreate,
-    current_user=Depends(get_current_user),
+    current_user=Depends(get_token_user),
     db: Session = Depends(db.get_db)
 ):
     """Create a new project metric"""
     return crud.create_metric(db, metric_data)
 
+@router.post("/metrics/batch")
+def ingest_metrics(
+    batch: schemas.MetricsBatch,
+    current_user=Depends(get_token_user),
+    db: Session = Depends(db.get_db)
+):
+    """Append a batch of metric points and update their rollups"""
+    if len(batch.points) > metric_series.MAX_BATCH:
+        raise HTTPException(status_code=400, detail=f"At most {metric_series.MAX_BATCH} points per batch")
+    missing = metric_series.missing_projects(db, {point.project_id for point in batch.points}, user=current_user)
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Projects not found: {missing}")
+    return {"inserted": metric_series.ingest(db, (point.dict() for point in batch.points))}
+
+@router.get("/metrics/series")
+@coalesce(scope=visibility_scope)
+def metric_series_points(
+    metric_name: str,
+    bucket: str = "day",
+    agg: str = "avg",
+    project_id: Optional[int] = None,
+    start_date: Optional[datetime.date] = None,
+    end_date: Optional[datetime.date] = None,
+    current_user=Depends(get_token_user),
+    db: Session = Depends(db.get_db)
+):
+    """Downsampled metric values per day, week or month from the rollup table"""
+    if bucket not in metric_series.BUCKETS:
+        raise HTTPException(status_code=400, detail=f"bucket must be one of {', '.join(metric_series.BUCKETS)}")
+    if agg not in metric_series.AGGREGATES:
+        raise HTTPException(status_code=400, detail=f"agg must be one of {', '.join(metric_series.AGGREGATES)}")
+    return metric_series.series(
+        db, metric_name, bucket=bucket, agg=agg, project_id=project_id,
+        start_date=start_date, end_date=end_date, user=current_user
+    )
+
 @router.get("/metrics", response_model=List[schemas.MetricsOut])
 def list_metrics(
     project_id: Optional[int] = None,
-    current_user=Depends(get_current_user),
+    metric_name: Optional[str] = None,
+    start_date: Optional[datetime.date] = None,
+    end_date: Optional[datetime.date] = None,
+    skip: int = 0,
+    limit: Optional[int] = None,
+    current_user=Depends(get_token_user),
     db: Session = Depends(db.get_db)
 ):
-    """List project metrics"""
-    return crud.get_metrics(db, project_id=project_id)
\ No newline at end of file
+    """List project metrics, optionally within a measurement date range"""
+    return crud.get_metrics(
+        db, project_id=project_id, metric_name=metric_name, start_date=start_date,
+        end_date=end_date, skip=skip, limit=limit, user=current_user
+    )
\ No newline at end of file
@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 from .. import db, crud, schemas
-from ..auth import create_access_token
+from ..auth import create_user_tokens, refresh_tokens, revoke_refresh_token
 
 router = APIRouter(prefix="/api/auth", tags=["auth"])
 
@@ -19,5 +19,13 @@ def login_for_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Sessio
     user = crud.authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(status_code=400, detail="Incorrect username or password")
-    access_token = create_access_token({"sub": user.username})
-    return {"access_token": access_token, "token_type": "bearer"}
\ No newline at end of file
+    return create_user_tokens(user)
+
+@router.post("/refresh", response_model=schemas.Token)
+def refresh_access_token(body: schemas.RefreshRequest, db: Session = Depends(db.get_db)):
+    return refresh_tokens(db, body.refresh_token)
+
+@router.post("/logout")
+def logout(body: schemas.RefreshRequest):
+    revoke_refresh_token(body.refresh_token)
+    return {"ok": True}
\ No newline at end of file
@@ -1,15 +1,18 @@
 from fastapi import APIRouter, Depends, HTTPException
 from typing import List, Optional
 from sqlalchemy.orm import Session
-from .. import db, crud, schemas
-from ..auth import get_current_user
+from .. import db, crud, schemas, models, policy, portfolio_analytics, fast_json, idempotency
+from ..auth import get_token_user
 
 router = APIRouter(prefix="/api/budgets", tags=["budgets"])
 
+BUDGET_FIELDS = fast_json.fieldset(schemas.BudgetOut, models.Budget)
+
 @router.post("/", response_model=schemas.BudgetOut)
+@idempotency.idempotent(schemas.BudgetOut)
 def create_budget(
     budget_data: schemas.BudgetCreate,
-    current_user=Depends(get_current_user),
+    current_user=Depends(get_token_user),
     db: Session = Depends(db.get_db)
 ):
     """Create a new budget entry"""
@@ -21,34 +24,23 @@ def create_budget(
 @router.get("/", response_model=List[schemas.BudgetOut])
 def list_budgets(
     project_id: Optional[int] = None,
-    current_user=Depends(get_current_user),
+    fieldset=Depends(BUDGET_FIELDS),
+    current_user=Depends(get_token_user),
     db: Session = Depends(db.get_db)
 ):
-    """List budgets with optional project filtering"""
-    return crud.get_budgets(db, project_id=project_id)
+    """List budgets with optional project filtering (fields= selects columns)"""
+    names, _ = fieldset
+    rows = crud.budget_rows(db, fast_json.columns(models.Budget, names), project_id=project_id, user=current_user)
+    return fast_json.rows_response(rows, fast_json.encoder(schemas.BudgetOut, names))
 
 @router.get("/summary")
 def budget_summary(
     project_id: Optional[int] = None,
-    current_user=Depends(get_current_user),
+    current_user=Depends(get_token_user),
     db: Session = Depends(db.get_db)
 ):
     """Get budget summary with variance analysis"""
-    budgets = crud.get_budgets(db, project_id=project_id)
-    
-    summary = {
-        "total_planned": sum(b.planned_amount for b in budgets),
-        "total_actual": sum(b.actual_amount for b in budgets),
-        "variance": sum(b.planned_amount - b.actual_amount for b in budgets),
-        "categories": {}
-    }
-    
-    for budget in budgets:
-        cat = budget.category.value
-        if cat not in summary["categories"]:
-            summary["categories"][cat] = {"planned": 0, "actual": 0, "variance": 0}
-        summary["categories"][cat]["planned"] += budget.planned_amount
-        summary["categories"][cat]["actual"] += budget.actual_amount
-        summary["categories"][cat]["variance"] += budget.planned_amount - budget.actual_amount
-    
-    return summary
\ No newline at end of file
+    criteria = [policy.budget_scope(current_user)]
+    if project_id:
+        criteria.append(models.Budget.project_id == project_id)
+    return portfolio_analytics.budget_summary(portfolio_analytics.load_budgets(db, *criteria))
\ No newline at end of file
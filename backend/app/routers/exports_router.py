@@ -0,0 +1,57 @@
+import os
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
+from typing import Optional
+from sqlalchemy.orm import Session
+from .. import db, jobs, columnar_export
+from ..auth import get_token_user
+
+router = APIRouter(prefix="/api/exports", tags=["exports"])
+
+def _require_manager(user):
+    if user.role not in ["admin", "manager"]:
+        raise HTTPException(status_code=403, detail="Insufficient permissions")
+
+@router.get("/")
+def list_datasets(current_user=Depends(get_token_user), db: Session = Depends(db.get_db)):
+    """Exportable datasets with their partitionings and last watermark (admin/manager only)"""
+    _require_manager(current_user)
+    return [
+        {
+            "dataset": name,
+            "partitions": list(spec["partitions"]),
+            "incremental": spec["watermark"] is not None,
+            "watermark": columnar_export.get_watermark(db, name)
+        }
+        for name, spec in columnar_export.DATASETS.items()
+    ]
+
+@router.post("/{dataset}", status_code=202)
+def start_export(
+    dataset: str,
+    format: str = "parquet",
+    partition_by: Optional[str] = None,
+    incremental: bool = False,
+    current_user=Depends(get_token_user),
+    db: Session = Depends(db.get_db)
+):
+    """Queue a Parquet/Arrow export of a dataset; the job result lists the files (admin/manager only)"""
+    _require_manager(current_user)
+    if dataset not in columnar_export.DATASETS:
+        raise HTTPException(status_code=404, detail="Unknown dataset")
+    try:
+        columnar_export.validate(dataset, format, partition_by, incremental)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    payload = {"dataset": dataset, "format": format, "partition_by": partition_by, "incremental": incremental}
+    return jobs.accepted(jobs.enqueue(db, "export.columnar", payload, user_id=current_user.id))
+
+@router.get("/files/{path:path}")
+def download_export(path: str, current_user=Depends(get_token_user)):
+    """Download one exported file, by the path listed in the job result (admin/manager only)"""
+    _require_manager(current_user)
+    root = os.path.realpath(columnar_export.EXPORT_DIR)
+    full = os.path.realpath(os.path.join(root, path))
+    if not full.startswith(root + os.sep) or not os.path.isfile(full):
+        raise HTTPException(status_code=404, detail="Export file not found")
+    return FileResponse(full, filename=os.path.basename(full), media_type="application/octet-stream")
@@ -0,0 +1,16 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from .. import db, schemas, models, jobs, fast_json
+from ..auth import get_token_user
+
+router = APIRouter(prefix="/api/jobs", tags=["jobs"])
+
+JOB_FIELDS = fast_json.field_names(schemas.JobOut, models.Job)
+
+@router.get("/{job_id}", response_model=schemas.JobOut)
+def get_job(job_id: int, current_user=Depends(get_token_user), db: Session = Depends(db.get_db)):
+    """Status of a background job (its owner, admins and managers)"""
+    job = jobs.get_job(db, job_id, current_user)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return fast_json.ORJSONResponse(fast_json.encoder(schemas.JobOut, JOB_FIELDS)([job._mapping[name] for name in JOB_FIELDS]))
@@ -1,15 +1,60 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Header
 from sqlalchemy.orm import Session
-from typing import List
-from .. import db, crud, schemas
-from ..auth import get_current_user
+from typing import List, Optional
+from .. import db, crud, schemas, models, scheduling, fast_json, concurrency, idempotency
+from ..auth import get_token_user
 
 router = APIRouter(prefix="/api/projects", tags=["projects"])
 
+PROJECT_FIELDS = fast_json.fieldset(schemas.ProjectOut, models.Project)
+
 @router.post("/", response_model=schemas.ProjectOut)
-def create_project(project_in: schemas.ProjectCreate, current_user=Depends(get_current_user), db: Session = Depends(db.get_db)):
-    return crud.create_project(db, current_user.id, project_in.name)
+@idempotency.idempotent(schemas.ProjectOut)
+def create_project(project_in: schemas.ProjectCreate, current_user=Depends(get_token_user), db: Session = Depends(db.get_db)):
+    return crud.create_project(db, current_user.id, project_in)
 
 @router.get("/", response_model=List[schemas.ProjectOut])
-def list_projects(current_user=Depends(get_current_user), db: Session = Depends(db.get_db)):
-    return crud.list_projects(db, current_user.id)
\ No newline at end of file
+def list_projects(fieldset=Depends(PROJECT_FIELDS), current_user=Depends(get_token_user), db: Session = Depends(db.get_db)):
+    """The user's projects (fields= selects columns)"""
+    names, _ = fieldset
+    rows = crud.project_rows(db, fast_json.columns(models.Project, names), current_user.id)
+    return fast_json.rows_response(rows, fast_json.encoder(schemas.ProjectOut, names))
+
+@router.patch("/{project_id}", response_model=schemas.ProjectOut)
+def update_project(
+    project_id: int, project_in: schemas.ProjectUpdate, if_match: Optional[str] = Header(None),
+    current_user=Depends(get_token_user), db: Session = Depends(db.get_db)
+):
+    """Update a project; with If-Match only if it is still at that version (409 otherwise)"""
+    try:
+        expected = concurrency.parse_if_match(if_match)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid If-Match header")
+    try:
+        project = crud.update_project(db, project_id, current_user.id, project_in, expected_version=expected)
+    except concurrency.VersionConflict as exc:
+        raise HTTPException(status_code=409, detail={"message": "Version conflict", "current_version": exc.current_version})
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    return fast_json.ORJSONResponse(
+        fast_json.encode_object(schemas.ProjectOut, models.Project, project), headers={"ETag": concurrency.etag(project.version)}
+    )
+
+@router.get("/{project_id}/schedule")
+def project_schedule(project_id: int, critical_only: bool = False, current_user=Depends(get_token_user), db: Session = Depends(db.get_db)):
+    """Earliest/latest start and finish, slack and critical path over the task dependency graph"""
+    project = crud.get_visible_project(db, project_id, current_user)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    try:
+        schedule = scheduling.project_schedule(db, project)
+    except scheduling.CycleError as exc:
+        raise HTTPException(status_code=409, detail={"message": "Dependency cycle", "task_ids": exc.task_ids})
+    return {
+        "project_id": project.id,
+        "origin": schedule["origin"],
+        "finish_hours": schedule["finish"],
+        "finish_date": schedule["finish_date"],
+        "critical_path": schedule["critical_path"],
+        "tasks": scheduling.schedule_rows(schedule, critical_only=critical_only)
+    }
@@ -1,15 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
 from typing import List, Optional
 from sqlalchemy.orm import Session
-from .. import db, crud, schemas
-from ..auth import get_current_user
+import datetime
+from .. import db, crud, schemas, models, resource_capacity, skill_matching, fast_json, idempotency, bulk_import
+from ..auth import get_token_user
 
 router = APIRouter(prefix="/api/resources", tags=["resources"])
 
+RESOURCE_FIELDS = fast_json.fieldset(schemas.ResourceOut, models.Resource)
+
 @router.post("/", response_model=schemas.ResourceOut)
+@idempotency.idempotent(schemas.ResourceOut)
 def create_resource(
     resource_data: schemas.ResourceCreate,
-    current_user=Depends(get_current_user),
+    current_user=Depends(get_token_user),
     db: Session = Depends(db.get_db)
 ):
     """Create a new resource (admin/manager only)"""
@@ -18,34 +22,95 @@ def create_resource(
     
     return crud.create_resource(db, resource_data)
 
+@router.post("/import")
+def import_resources(
+    file: UploadFile = File(...),
+    dry_run: bool = False,
+    current_user=Depends(get_token_user),
+    db: Session = Depends(db.get_db)
+):
+    """Upsert resources from a CSV or XLSX upload, with a per-row error report"""
+    if current_user.role not in ["admin", "manager"]:
+        raise HTTPException(status_code=403, detail="Insufficient permissions")
+    try:
+        return bulk_import.import_file(db, "resources", file.file, file.filename, dry_run=dry_run)
+    except bulk_import.ImportFileError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
 @router.get("/", response_model=List[schemas.ResourceOut])
 def list_resources(
     skip: int = 0,
     limit: int = 100,
     role: Optional[str] = None,
-    current_user=Depends(get_current_user),
+    fieldset=Depends(RESOURCE_FIELDS),
+    current_user=Depends(get_token_user),
+    db: Session = Depends(db.get_db)
+):
+    """List all resources with optional filtering (fields= selects columns)"""
+    names, _ = fieldset
+    rows = crud.resource_rows(
+        db, fast_json.columns(models.Resource, names), skip=skip, limit=limit, role=role, user=current_user
+    )
+    return fast_json.rows_response(rows, fast_json.encoder(schemas.ResourceOut, names))
+
+@router.get("/capacity")
+def resource_capacity_matrix(
+    start_date: Optional[datetime.date] = None,
+    weeks: int = 13,
+    role: Optional[str] = None,
+    store_number: Optional[str] = None,
+    over_allocated_only: bool = False,
+    current_user=Depends(get_token_user),
+    db: Session = Depends(db.get_db)
+):
+    """Per-resource weekly utilization with over-allocation flags"""
+    return resource_capacity.resource_capacity(
+        db, start_date=start_date, weeks=weeks, user=current_user,
+        role=role, store_number=store_number, over_allocated_only=over_allocated_only
+    )
+
+@router.get("/match")
+def match_resources(
+    skills: str,
+    region: Optional[str] = None,
+    store_number: Optional[str] = None,
+    role: Optional[str] = None,
+    min_level: Optional[int] = None,
+    start_date: Optional[datetime.date] = None,
+    weeks: int = 4,
+    available_only: bool = True,
+    limit: int = 20,
+    current_user=Depends(get_token_user),
     db: Session = Depends(db.get_db)
 ):
-    """List all resources with optional filtering"""
-    return crud.get_resources(db, skip=skip, limit=limit, role=role)
+    """Rank resources by skill overlap, availability and remaining capacity"""
+    return skill_matching.match_resources(
+        db, skills.split(","), start_date=start_date, weeks=weeks, region=region,
+        store_number=store_number, role=role, min_level=min_level,
+        available_only=available_only, limit=min(limit, 100), user=current_user
+    )
 
 @router.get("/{resource_id}", response_model=schemas.ResourceOut)
 def get_resource(
     resource_id: int,
-    current_user=Depends(get_current_user),
+    fieldset=Depends(RESOURCE_FIELDS),
+    current_user=Depends(get_token_user),
     db: Session = Depends(db.get_db)
 ):
-    """Get resource details by ID"""
-    resource = crud.get_resource(db, resource_id)
-    if not resource:
+    """Get resource details by ID (fields= selects columns)"""
+    names, _ = fieldset
+    row = crud.resource_rows(
+        db, fast_json.columns(models.Resource, names), user=current_user, resource_id=resource_id
+    ).first()
+    if not row:
         raise HTTPException(status_code=404, detail="Resource not found")
-    return resource
+    return fast_json.ORJSONResponse(fast_json.encoder(schemas.ResourceOut, names)(row))
 
 @router.post("/{resource_id}/projects")
 def assign_resource_to_project(
     resource_id: int,
     assignment_data: schemas.ProjectResourceCreate,
-    current_user=Depends(get_current_user),
+    current_user=Depends(get_token_user),
     db: Session = Depends(db.get_db)
 ):
     """Assign a resource to a project"""
@@ -1,15 +1,19 @@
 from fastapi import APIRouter, Depends, HTTPException
 from typing import List, Optional
 from sqlalchemy.orm import Session
-from .. import db, crud, schemas
-from ..auth import get_current_user
+from .. import db, crud, schemas, models, fast_json, idempotency
+from ..auth import get_token_user
+from ..single_flight import coalesce, visibility_scope
 
 router = APIRouter(prefix="/api/risks", tags=["risks"])
 
+RISK_FIELDS = fast_json.fieldset(schemas.RiskOut, models.Risk)
+
 @router.post("/", response_model=schemas.RiskOut)
+@idempotency.idempotent(schemas.RiskOut)
 def create_risk(
     risk_data: schemas.RiskCreate,
-    current_user=Depends(get_current_user),
+    current_user=Depends(get_token_user),
     db: Session = Depends(db.get_db)
 ):
     """Create a new risk entry"""
@@ -19,20 +23,24 @@ def create_risk(
 def list_risks(
     project_id: Optional[int] = None,
     status: Optional[str] = None,
-    current_user=Depends(get_current_user),
+    fieldset=Depends(RISK_FIELDS),
+    current_user=Depends(get_token_user),
     db: Session = Depends(db.get_db)
 ):
-    """List risks with optional filtering"""
-    return crud.get_risks(db, project_id=project_id, status=status)
+    """List risks with optional filtering (fields= selects columns)"""
+    names, _ = fieldset
+    rows = crud.risk_rows(db, fast_json.columns(models.Risk, names), project_id=project_id, status=status, user=current_user)
+    return fast_json.rows_response(rows, fast_json.encoder(schemas.RiskOut, names))
 
 @router.get("/risk-matrix")
+@coalesce(scope=visibility_scope)
 def risk_matrix(
     project_id: Optional[int] = None,
-    current_user=Depends(get_current_user),
+    current_user=Depends(get_token_user),
     db: Session = Depends(db.get_db)
 ):
     """Generate risk matrix data for visualization"""
-    risks = crud.get_risks(db, project_id=project_id)
+    risks = crud.get_risks(db, project_id=project_id, user=current_user)
     
     matrix = {}
     for risk in risks:
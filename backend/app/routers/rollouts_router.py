@@ -0,0 +1,44 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from .. import db, crud, schemas, rollout_planner
+from ..auth import get_token_user
+
+router = APIRouter(prefix="/api/rollouts", tags=["rollouts"])
+
+@router.post("/plan")
+def plan_rollout(
+    plan: schemas.RolloutPlanRequest,
+    current_user=Depends(get_token_user),
+    db: Session = Depends(db.get_db)
+):
+    """Schedule store rollouts for one or more projects within per-district weekly capacity"""
+    if current_user.role not in ["admin", "manager"]:
+        raise HTTPException(status_code=403, detail="Insufficient permissions")
+    if plan.weeks_per_phase < 1:
+        raise HTTPException(status_code=400, detail="weeks_per_phase must be at least 1")
+    for project_id in plan.project_ids:
+        if not crud.get_visible_project(db, project_id, current_user):
+            raise HTTPException(status_code=404, detail=f"Project {project_id} not found")
+
+    return rollout_planner.plan_rollouts(
+        db,
+        project_ids=plan.project_ids,
+        start_date=plan.start_date,
+        weekly_capacity=plan.weekly_capacity,
+        district_capacity=plan.district_capacity,
+        weeks_per_phase=plan.weeks_per_phase,
+        regions=plan.regions,
+        districts=plan.districts,
+        formats=plan.formats
+    )
+
+@router.get("/{project_id}/progress")
+def rollout_progress(
+    project_id: int,
+    current_user=Depends(get_token_user),
+    db: Session = Depends(db.get_db)
+):
+    """Per-phase rollout progress for a project"""
+    if not crud.get_visible_project(db, project_id, current_user):
+        raise HTTPException(status_code=404, detail="Project not found")
+    return rollout_planner.rollout_progress(db, project_id)
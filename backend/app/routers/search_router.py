@@ -0,0 +1,29 @@
+from fastapi import APIRouter, Depends, HTTPException
+from typing import Optional
+from sqlalchemy.orm import Session
+from .. import db, text_search
+from ..auth import get_token_user
+
+router = APIRouter(prefix="/api/search", tags=["search"])
+
+@router.get("/")
+def search(
+    q: str,
+    types: Optional[str] = None,
+    project_id: Optional[int] = None,
+    limit: int = 20,
+    current_user=Depends(get_token_user),
+    db: Session = Depends(db.get_db)
+):
+    """Ranked full-text search over tasks, projects and risks visible to the user"""
+    selected = [t.strip() for t in types.split(",") if t.strip()] if types else None
+    unknown = set(selected or []) - set(text_search.SEARCHABLE)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown search types: {', '.join(sorted(unknown))}")
+    return {
+        "query": q,
+        "results": text_search.search(
+            db, q, types=selected, project_id=project_id,
+            limit=min(limit, 100), user=current_user
+        )
+    }
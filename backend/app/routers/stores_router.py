@@ -1,15 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
 from typing import List, Optional
 from sqlalchemy.orm import Session
-from .. import db, crud, schemas
-from ..auth import get_current_user
+from .. import db, crud, schemas, models, store_search, fast_json, idempotency, bulk_import
+from ..auth import get_token_user
 
 router = APIRouter(prefix="/api/stores", tags=["stores"])
 
+STORE_FIELDS = fast_json.fieldset(schemas.StoreOut, models.Store)
+
 @router.post("/", response_model=schemas.StoreOut)
+@idempotency.idempotent(schemas.StoreOut)
 def create_store(
     store_data: schemas.StoreCreate,
-    current_user=Depends(get_current_user),
+    current_user=Depends(get_token_user),
     db: Session = Depends(db.get_db)
 ):
     """Create a new store (admin only)"""
@@ -18,34 +21,72 @@ def create_store(
     
     return crud.create_store(db, store_data)
 
+@router.post("/import")
+def import_stores(
+    file: UploadFile = File(...),
+    dry_run: bool = False,
+    current_user=Depends(get_token_user),
+    db: Session = Depends(db.get_db)
+):
+    """Upsert stores from a CSV or XLSX upload, with a per-row error report"""
+    if current_user.role not in ["admin", "manager"]:
+        raise HTTPException(status_code=403, detail="Insufficient permissions")
+    try:
+        return bulk_import.import_file(db, "stores", file.file, file.filename, dry_run=dry_run)
+    except bulk_import.ImportFileError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
 @router.get("/", response_model=List[schemas.StoreOut])
 def list_stores(
     skip: int = 0,
     limit: int = 100,
     region: Optional[str] = None,
-    current_user=Depends(get_current_user),
+    fieldset=Depends(STORE_FIELDS),
+    current_user=Depends(get_token_user),
+    db: Session = Depends(db.get_db)
+):
+    """List all stores with optional filtering (fields= selects columns)"""
+    names, _ = fieldset
+    rows = crud.store_rows(
+        db, fast_json.columns(models.Store, names), skip=skip, limit=limit, region=region, user=current_user
+    )
+    return fast_json.rows_response(rows, fast_json.encoder(schemas.StoreOut, names))
+
+@router.get("/search", response_model=List[schemas.StoreOut])
+def search_stores(
+    q: Optional[str] = None,
+    region: Optional[str] = None,
+    district: Optional[str] = None,
+    format: Optional[str] = None,
+    limit: int = 20,
+    current_user=Depends(get_token_user),
     db: Session = Depends(db.get_db)
 ):
-    """List all stores with optional filtering"""
-    return crud.get_stores(db, skip=skip, limit=limit, region=region)
+    """Ranked lookup by store number prefix or name substring, filtered by region/district/format"""
+    return store_search.search_stores(
+        db, q=q, region=region, district=district, format=format,
+        limit=min(limit, 100), user=current_user
+    )
 
 @router.get("/{store_id}", response_model=schemas.StoreOut)
 def get_store(
     store_id: int,
-    current_user=Depends(get_current_user),
+    fieldset=Depends(STORE_FIELDS),
+    current_user=Depends(get_token_user),
     db: Session = Depends(db.get_db)
 ):
-    """Get store details by ID"""
-    store = crud.get_store(db, store_id)
-    if not store:
+    """Get store details by ID (fields= selects columns)"""
+    names, _ = fieldset
+    row = crud.store_rows(db, fast_json.columns(models.Store, names), user=current_user, store_id=store_id).first()
+    if not row:
         raise HTTPException(status_code=404, detail="Store not found")
-    return store
+    return fast_json.ORJSONResponse(fast_json.encoder(schemas.StoreOut, names)(row))
 
 @router.post("/{store_id}/projects")
 def assign_project_to_store(
     store_id: int,
     assignment_data: schemas.ProjectStoreCreate,
-    current_user=Depends(get_current_user),
+    current_user=Depends(get_token_user),
     db: Session = Depends(db.get_db)
 ):
     """Assign a project to a store"""
@@ -0,0 +1,17 @@
+from fastapi import APIRouter, Depends, HTTPException
+from typing import Optional
+from sqlalchemy.orm import Session
+from .. import db, delta_sync
+from ..auth import get_token_user
+
+router = APIRouter(prefix="/api/sync", tags=["sync"])
+
+@router.get("/")
+def sync_changes(since: Optional[str] = None, current_user=Depends(get_token_user), db: Session = Depends(db.get_db)):
+    """Projects, tasks, budgets and risks changed or deleted since a sync token (everything without one)"""
+    try:
+        return delta_sync.changes(db, current_user, since=since)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid sync token")
+    except delta_sync.TokenExpired:
+        raise HTTPException(status_code=410, detail="Sync token expired; sync again without since")
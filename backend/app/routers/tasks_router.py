@@ -1,41 +1,137 @@
-from fastapi import APIRouter, Depends, HTTPException
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Header
+from typing import List, Optional
 from sqlalchemy.orm import Session
-from .. import db, crud, schemas
-from ..auth import get_current_user
+from .. import db, crud, schemas, models, scheduling, overdue, task_batch, fast_json, concurrency, idempotency, jobs
+from ..auth import get_token_user
 
 router = APIRouter(prefix="/api/tasks", tags=["tasks"])
 
 @router.post("/", response_model=schemas.TaskOut)
-def create_task(task_in: schemas.TaskCreate, current_user=Depends(get_current_user), db: Session = Depends(db.get_db)):
-    return crud.create_task(db, current_user.id, task_in.description, task_in.project_id, task_in.priority, task_in.deadline, task_in.parent_id)
+@idempotency.idempotent(schemas.TaskOut)
+def create_task(task_in: schemas.TaskCreate, current_user=Depends(get_token_user), db: Session = Depends(db.get_db)):
+    return crud.create_task(db, current_user.id, task_in)
+
+TASK_FIELDS = fast_json.fieldset(schemas.TaskOut, models.Task, relations=("subtasks",))
 
 @router.get("/", response_model=List[schemas.TaskOut])
-def list_tasks(project_id: int = None, parent_id: int | None = None, current_user=Depends(get_current_user), db: Session = Depends(db.get_db)):
-    tasks = crud.list_tasks(db, current_user.id, project_id=project_id, parent_id=parent_id)
-    # populate nested subtasks for parent-level requests
-    out = []
-    for t in tasks:
-        def map_task(task):
-            subt = crud.list_tasks(db, current_user.id, project_id=task.project_id, parent_id=task.id)
-            mapped = schemas.TaskOut.from_orm(task)
-            mapped.subtasks = [map_task(s) for s in subt]
-            return mapped
-        out.append(map_task(t))
-    return out
-
-@router.patch("/{task_id}")
-def update_task(task_id: int, payload: dict, current_user=Depends(get_current_user), db: Session = Depends(db.get_db)):
-    task = crud.get_task(db, current_user.id, task_id)
+def list_tasks(project_id: int = None, parent_id: int | None = None, fieldset=Depends(TASK_FIELDS), current_user=Depends(get_token_user), db: Session = Depends(db.get_db)):
+    """Tasks with nested subtasks (fields=/include= select columns and relations), from one select"""
+    names, include = fieldset
+    nested = "subtasks" in include
+    encode = fast_json.encoder(schemas.TaskOut, names)
+    rows = crud.task_tree_rows(
+        db, fast_json.columns(models.Task, names), current_user.id,
+        project_id=project_id, parent_id=parent_id, tree=nested
+    )
+    children = {}
+    for row in rows:
+        children.setdefault(row[-1], []).append(row)
+
+    def map_task(row, path):
+        task_id, task_project = row[-3], row[-2]
+        item = encode(row)
+        if nested:
+            item["subtasks"] = [
+                map_task(child, path | {task_id}) for child in children.get(task_id, [])
+                if child[-3] not in path and (not task_project or child[-2] == task_project)
+            ]
+        return item
+    return fast_json.ORJSONResponse([map_task(row, set()) for row in children.get(parent_id, [])])
+
+@router.get("/overdue")
+def list_overdue(project_id: int = None, cursor: str = None, limit: int = 50, current_user=Depends(get_token_user), db: Session = Depends(db.get_db)):
+    """Overdue tasks, oldest deadline first; pass next_cursor back to get the following page"""
+    try:
+        return overdue.overdue_page(
+            db, user=current_user, project_id=project_id, cursor=cursor,
+            limit=max(1, min(limit, overdue.PAGE_LIMIT))
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+@router.post("/overdue/sweep", status_code=202)
+def sweep_overdue(current_user=Depends(get_token_user), db: Session = Depends(db.get_db)):
+    """Queue a recount of the overdue summary (admin/manager only)"""
+    if current_user.role not in ["admin", "manager"]:
+        raise HTTPException(status_code=403, detail="Insufficient permissions")
+    return jobs.accepted(jobs.enqueue(db, "overdue.sweep", user_id=current_user.id, priority=1))
+
+@router.patch("/batch")
+def batch_update_tasks(batch: schemas.TaskBatchUpdate, current_user=Depends(get_token_user), db: Session = Depends(db.get_db)):
+    """Apply per-task updates, or one change to every task matching a filter, in a single transaction"""
+    if batch.updates and (batch.filter or batch.changes):
+        raise HTTPException(status_code=400, detail="Send either updates or filter with changes, not both")
+    if batch.updates:
+        if len(batch.updates) > task_batch.MAX_TASKS:
+            raise HTTPException(status_code=400, detail=f"At most {task_batch.MAX_TASKS} tasks per batch")
+        groups = task_batch.group_updates(batch.updates)
+    elif batch.filter and batch.changes:
+        criteria = batch.filter.dict(exclude_unset=True)
+        if not any(value is not None for value in criteria.values()):
+            raise HTTPException(status_code=400, detail="Filter must not be empty")
+        ids = task_batch.matching_ids(db, current_user.id, **criteria)
+        if len(ids) > task_batch.MAX_TASKS:
+            raise HTTPException(status_code=400, detail=f"Filter matches more than {task_batch.MAX_TASKS} tasks")
+        groups = [(ids, batch.changes.dict(exclude_unset=True))]
+    else:
+        raise HTTPException(status_code=400, detail="Send updates, or filter with changes")
+    return task_batch.apply(db, current_user.id, groups)
+
+@router.patch("/{task_id}", response_model=schemas.TaskOut)
+def update_task(
+    task_id: int, task_in: schemas.TaskUpdate, if_match: Optional[str] = Header(None),
+    current_user=Depends(get_token_user), db: Session = Depends(db.get_db)
+):
+    """Update a task; with If-Match only if it is still at that version (409 otherwise)"""
+    try:
+        expected = concurrency.parse_if_match(if_match)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid If-Match header")
+    try:
+        task = crud.update_task(db, task_id, current_user.id, task_in, expected_version=expected)
+    except concurrency.VersionConflict as exc:
+        raise HTTPException(status_code=409, detail={"message": "Version conflict", "current_version": exc.current_version})
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
-    updated = crud.update_task(db, task, **payload)
-    return updated
+    return fast_json.ORJSONResponse(
+        fast_json.encode_object(schemas.TaskOut, models.Task, task), headers={"ETag": concurrency.etag(task.version)}
+    )
 
 @router.delete("/{task_id}")
-def delete_task(task_id: int, current_user=Depends(get_current_user), db: Session = Depends(db.get_db)):
+def delete_task(task_id: int, current_user=Depends(get_token_user), db: Session = Depends(db.get_db)):
     task = crud.get_task(db, current_user.id, task_id)
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
     crud.delete_task(db, task)
-    return {"ok": True}
\ No newline at end of file
+    return {"ok": True}
+
+@router.get("/{task_id}/dependencies", response_model=List[schemas.TaskDependencyOut])
+def list_dependencies(task_id: int, current_user=Depends(get_token_user), db: Session = Depends(db.get_db)):
+    """Predecessor and successor edges of a task"""
+    if not crud.get_task(db, current_user.id, task_id):
+        raise HTTPException(status_code=404, detail="Task not found")
+    return crud.get_task_dependencies(db, task_id)
+
+@router.post("/{task_id}/dependencies", response_model=schemas.TaskDependencyOut)
+def add_dependency(task_id: int, dependency_in: schemas.TaskDependencyCreate, current_user=Depends(get_token_user), db: Session = Depends(db.get_db)):
+    """Make task_id start after predecessor_id finishes (plus lag_hours)"""
+    task = crud.get_task(db, current_user.id, task_id)
+    predecessor = crud.get_task(db, current_user.id, dependency_in.predecessor_id)
+    if not task or not predecessor:
+        raise HTTPException(status_code=404, detail="Task not found")
+    if task.project_id != predecessor.project_id:
+        raise HTTPException(status_code=400, detail="Dependencies must link tasks of the same project")
+    if crud.get_task_dependency(db, predecessor.id, task.id):
+        raise HTTPException(status_code=409, detail="Dependency already exists")
+    if scheduling.would_create_cycle(db, task.project_id, predecessor.id, task.id):
+        raise HTTPException(status_code=409, detail="Dependency would create a cycle")
+    return crud.add_task_dependency(db, task, dependency_in)
+
+@router.delete("/{task_id}/dependencies/{predecessor_id}")
+def remove_dependency(task_id: int, predecessor_id: int, current_user=Depends(get_token_user), db: Session = Depends(db.get_db)):
+    """Remove the edge predecessor_id -> task_id"""
+    if not crud.get_task(db, current_user.id, task_id):
+        raise HTTPException(status_code=404, detail="Task not found")
+    if not crud.remove_task_dependency(db, predecessor_id, task_id):
+        raise HTTPException(status_code=404, detail="Dependency not found")
+    return {"ok": True}
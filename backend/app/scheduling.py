@@ -0,0 +1,266 @@
+"""
+Critical path scheduling over a project's task dependency graph.
+
+Durations come from Task.estimated_hours (unestimated tasks are zero-length
+milestones) and edges from task_dependencies (finish-to-start with an optional
+lag). compute_schedule() runs a level-by-level topological sort (Kahn) on NumPy
+arrays. The forward pass for earliest start/finish is folded into it, and the
+backward pass for latest start/finish replays the same levels in reverse. Every
+edge is touched a constant number of times, so the whole run is O(V + E).
+Latest finish is bounded by the project finish and by the task's own deadline,
+so slack goes negative for tasks that cannot make their deadline. Parent tasks
+also report the span of their subtree.
+
+Results are cached per project and keyed by a fingerprint of the project's tasks and edges
+(row counts plus the newest updated_at/created_at, both served by indexes), so
+any create, update or delete of a task or dependency in the project recomputes
+on the next request, in every worker process.
+"""
+
+import datetime
+import threading
+from collections import OrderedDict
+import numpy as np
+from sqlalchemy import select, func
+from sqlalchemy.orm import Session
+from . import models
+
+HOURS_PER_DAY = 8
+CACHE_SIZE = 64
+EPSILON = 1e-9
+
+class CycleError(ValueError):
+    def __init__(self, task_ids):
+        self.task_ids = sorted(task_ids)
+        super().__init__(f"Dependency cycle among tasks {self.task_ids[:20]}")
+
+def _gather(pointers, nodes):
+    """Edge positions of the CSR rows of nodes, concatenated."""
+    starts = pointers[nodes]
+    counts = pointers[nodes + 1] - starts
+    total = int(counts.sum())
+    if not total:
+        return np.empty(0, dtype=np.int64)
+    offsets = np.repeat(starts - np.cumsum(counts) + counts, counts)
+    return offsets + np.arange(total)
+
+def compute_schedule(tasks, edges):
+    """
+    tasks: iterable of (task_id, duration_hours, deadline_hours or None, parent_id)
+    with deadlines as hours after the schedule origin; edges: iterable of
+    (predecessor_id, successor_id, lag_hours). Edges touching unknown tasks are ignored.
+
+    Returns a dict of arrays aligned with "ids" plus "finish" (hours) and
+    "critical_path" (task ids, first to last).
+    """
+    tasks = list(tasks)
+    count = len(tasks)
+    ids = np.array([t[0] for t in tasks], dtype=np.int64)
+    duration = np.array([float(t[1] or 0) for t in tasks], dtype=np.float64)
+    deadline = np.array([np.nan if t[2] is None else float(t[2]) for t in tasks], dtype=np.float64)
+    parent_ids = np.array([-1 if t[3] is None else t[3] for t in tasks], dtype=np.int64)
+
+    order = np.argsort(ids, kind="stable")
+    def to_index(values):
+        if not count:
+            return np.full(len(values), -1, dtype=np.int64)
+        pos = np.searchsorted(ids, values, sorter=order).clip(max=count - 1)
+        return np.where(ids[order[pos]] == values, order[pos], -1)
+
+    edges = list(edges)
+    pred = to_index(np.array([e[0] for e in edges], dtype=np.int64))
+    succ = to_index(np.array([e[1] for e in edges], dtype=np.int64))
+    lag = np.array([float(e[2] or 0) for e in edges], dtype=np.float64)
+    known = (pred >= 0) & (succ >= 0)
+    pred, succ, lag = pred[known], succ[known], lag[known]
+
+    # out-edges in CSR form, grouped by predecessor
+    by_pred = np.argsort(pred, kind="stable")
+    pred, succ, lag = pred[by_pred], succ[by_pred], lag[by_pred]
+    pointers = np.zeros(count + 1, dtype=np.int64)
+    np.cumsum(np.bincount(pred, minlength=count), out=pointers[1:])
+
+    in_degree = np.bincount(succ, minlength=count)
+    earliest_start = np.zeros(count)
+    frontier = np.flatnonzero(in_degree == 0)
+    levels = []
+    visited = 0
+    while frontier.size:
+        visited += frontier.size
+        out = _gather(pointers, frontier)
+        if not out.size:
+            break
+        levels.append(out)
+        # frontier tasks are final, so push their finish to their successors
+        np.maximum.at(earliest_start, succ[out], earliest_start[pred[out]] + duration[pred[out]] + lag[out])
+        targets, hits = np.unique(succ[out], return_counts=True)
+        in_degree[targets] -= hits
+        frontier = targets[in_degree[targets] == 0]
+    if visited != count:
+        raise CycleError(ids[in_degree > 0].tolist())
+
+    earliest_finish = earliest_start + duration
+    finish = float(earliest_finish.max()) if count else 0.0
+
+    latest_finish = np.fmin(np.full(count, finish), deadline)
+    for out in reversed(levels):
+        np.minimum.at(latest_finish, pred[out], latest_finish[succ[out]] - duration[succ[out]] - lag[out])
+    latest_start = latest_finish - duration
+    slack = latest_start - earliest_start
+    # the tightest chain is critical: zero slack, or the most negative when deadlines are missed
+    critical = slack <= min(float(slack.min()) if count else 0.0, 0.0) + EPSILON
+
+    # longest chain, walked back from the task that finishes last through driving predecessors
+    driver = np.full(count, -1, dtype=np.int64)
+    tight = np.abs(earliest_start[pred] + duration[pred] + lag - earliest_start[succ]) <= EPSILON
+    driver[succ[tight]] = pred[tight]
+    critical_path = []
+    node = int(np.argmax(earliest_finish)) if count else -1
+    while node >= 0 and len(critical_path) <= count:
+        critical_path.append(int(ids[node]))
+        node = int(driver[node])
+    critical_path.reverse()
+
+    # subtree spans for parent tasks: fold each task into its parent, deepest first
+    parent = to_index(parent_ids)
+    depth = np.zeros(count, dtype=np.int64)
+    ancestor = parent.copy()
+    for _ in range(count):  # bounded, so a corrupt parent cycle cannot loop forever
+        has_ancestor = ancestor >= 0
+        if not has_ancestor.any():
+            break
+        depth += has_ancestor
+        ancestor = np.where(has_ancestor, parent[ancestor], -1)
+    span_start = earliest_start.copy()
+    span_finish = earliest_finish.copy()
+    for level in range(int(depth.max()) if count else 0, 0, -1):
+        nodes = np.flatnonzero(depth == level)
+        np.minimum.at(span_start, parent[nodes], span_start[nodes])
+        np.maximum.at(span_finish, parent[nodes], span_finish[nodes])
+    has_children = np.zeros(count, dtype=bool)
+    has_children[parent[parent >= 0]] = True
+
+    return {
+        "ids": ids,
+        "earliest_start": earliest_start,
+        "earliest_finish": earliest_finish,
+        "latest_start": latest_start,
+        "latest_finish": latest_finish,
+        "slack": slack,
+        "critical": critical,
+        "has_children": has_children,
+        "span_start": span_start,
+        "span_finish": span_finish,
+        "finish": finish,
+        "critical_path": critical_path
+    }
+
+def would_create_cycle(db: Session, project_id: int, predecessor_id: int, successor_id: int) -> bool:
+    """True if successor already reaches predecessor (or they are the same task)."""
+    if predecessor_id == successor_id:
+        return True
+    successors = {}
+    for pred, succ in db.execute(
+        select(models.TaskDependency.predecessor_id, models.TaskDependency.successor_id)
+        .where(models.TaskDependency.project_id == project_id)
+    ):
+        successors.setdefault(pred, []).append(succ)
+    seen = {successor_id}
+    stack = [successor_id]
+    while stack:
+        for succ in successors.get(stack.pop(), ()):
+            if succ == predecessor_id:
+                return True
+            if succ not in seen:
+                seen.add(succ)
+                stack.append(succ)
+    return False
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+def _fingerprint(db: Session, project_id: int):
+    tasks = db.execute(
+        select(func.count(), func.max(models.Task.updated_at)).where(models.Task.project_id == project_id)
+    ).one()
+    edges = db.execute(
+        select(func.count(), func.max(models.TaskDependency.created_at))
+        .where(models.TaskDependency.project_id == project_id)
+    ).one()
+    return tuple(tasks) + tuple(edges)
+
+def _hours_since(origin: datetime.date, moment):
+    """Deadline as hours after origin; a deadline day allows work through its end."""
+    if moment is None:
+        return None
+    day = moment.date() if isinstance(moment, datetime.datetime) else moment
+    return (day - origin).days * HOURS_PER_DAY + HOURS_PER_DAY
+
+def project_schedule(db: Session, project: models.Project):
+    """Cached schedule of a project; the origin is its start_date (or today)."""
+    origin = project.start_date or datetime.date.today()
+    key = (str(db.get_bind().url), project.id, origin)
+    fingerprint = _fingerprint(db, project.id)
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached and cached[0] == fingerprint:
+            _cache.move_to_end(key)
+            return cached[1]
+
+    connection = db.connection()
+    rows = connection.execute(
+        select(models.Task.id, models.Task.estimated_hours, models.Task.deadline, models.Task.parent_id)
+        .where(models.Task.project_id == project.id)
+    ).all()
+    edges = connection.execute(
+        select(models.TaskDependency.predecessor_id, models.TaskDependency.successor_id, models.TaskDependency.lag_hours)
+        .where(models.TaskDependency.project_id == project.id)
+    ).all()
+    schedule = compute_schedule(
+        ((task_id, hours, _hours_since(origin, due), parent_id) for task_id, hours, due, parent_id in rows),
+        edges
+    )
+    schedule["origin"] = origin
+    schedule["finish_date"] = to_dates(origin, schedule["finish"], finish=True)
+
+    with _cache_lock:
+        _cache[key] = (fingerprint, schedule)
+        _cache.move_to_end(key)
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return schedule
+
+def to_dates(origin: datetime.date, hours, finish: bool = False):
+    """
+    Calendar day(s) of schedule offsets at HOURS_PER_DAY working hours per day. A
+    finish that lands exactly on a day boundary belongs to the day that just ended.
+    """
+    hours = np.asarray(hours, dtype=np.float64)
+    days = np.ceil(hours / HOURS_PER_DAY) - 1 if finish else np.floor(hours / HOURS_PER_DAY)
+    return (np.datetime64(origin, "D") + days.astype(np.int64)).tolist()
+
+def schedule_rows(schedule, critical_only: bool = False):
+    """Per-task rows of a schedule, earliest first; with calendar dates once it has an origin."""
+    selected = np.flatnonzero(schedule["critical"]) if critical_only else np.arange(len(schedule["ids"]))
+    selected = selected[np.lexsort((schedule["ids"][selected], schedule["earliest_start"][selected]))]
+    names = ["earliest_start", "earliest_finish", "latest_start", "latest_finish", "slack", "critical"]
+    columns = {name: schedule[name][selected].tolist() for name in names}
+    origin = schedule.get("origin")
+    if origin is not None:
+        for name, finish in (("earliest_start", False), ("earliest_finish", True),
+                             ("latest_start", False), ("latest_finish", True)):
+            columns[name + "_date"] = to_dates(origin, schedule[name][selected], finish=finish)
+    ids = schedule["ids"][selected].tolist()
+    has_children = schedule["has_children"][selected].tolist()
+    span_start = schedule["span_start"][selected].tolist()
+    span_finish = schedule["span_finish"][selected].tolist()
+    rows = []
+    for i, task_id in enumerate(ids):
+        row = {"task_id": task_id}
+        for name, values in columns.items():
+            row[name] = values[i]
+        if has_children[i]:
+            row["span_start"] = span_start[i]
+            row["span_finish"] = span_finish[i]
+        rows.append(row)
+    return rows
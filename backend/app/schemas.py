@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Optional, List, Dict, Any
 from decimal import Decimal
 from enum import Enum
 import datetime
@@ -116,6 +116,7 @@ class ProjectOut(BaseModel):
     parent_id: Optional[int] = None
     created_at: Optional[datetime.datetime] = None
     updated_at: Optional[datetime.datetime] = None
+    version: Optional[int] = None
     
     class Config:
         orm_mode = True
@@ -142,6 +143,20 @@ class TaskUpdate(BaseModel):
     completion_percentage: Optional[int] = None
     assigned_to: Optional[int] = None
 
+class TaskBatchItem(TaskUpdate):
+    id: int
+
+class TaskBatchFilter(BaseModel):
+    ids: Optional[List[int]] = None
+    project_id: Optional[int] = None
+    parent_id: Optional[int] = None
+    status: Optional[TaskStatusEnum] = None
+
+class TaskBatchUpdate(BaseModel):
+    updates: List[TaskBatchItem] = []
+    filter: Optional[TaskBatchFilter] = None
+    changes: Optional[TaskUpdate] = None
+
 class TaskOut(BaseModel):
     id: int
     description: str
@@ -157,11 +172,25 @@ class TaskOut(BaseModel):
     created_at: Optional[datetime.datetime] = None
     completed_at: Optional[datetime.datetime] = None
     updated_at: Optional[datetime.datetime] = None
+    version: Optional[int] = None
     subtasks: List["TaskOut"] = []
     
     class Config:
         orm_mode = True
 
+class TaskDependencyCreate(BaseModel):
+    predecessor_id: int
+    lag_hours: int = 0
+
+class TaskDependencyOut(BaseModel):
+    predecessor_id: int
+    successor_id: int
+    lag_hours: int = 0
+    created_at: Optional[datetime.datetime] = None
+
+    class Config:
+        orm_mode = True
+
 # Store schemas
 class StoreCreate(BaseModel):
     store_number: str
@@ -227,6 +256,7 @@ class BudgetOut(BaseModel):
     fiscal_year: Optional[str] = None
     description: Optional[str] = None
     created_at: Optional[datetime.datetime] = None
+    version: Optional[int] = None
     
     class Config:
         orm_mode = True
@@ -255,6 +285,7 @@ class RiskOut(BaseModel):
     status: str
     created_at: Optional[datetime.datetime] = None
     updated_at: Optional[datetime.datetime] = None
+    version: Optional[int] = None
     
     class Config:
         orm_mode = True
@@ -269,6 +300,9 @@ class MetricsCreate(BaseModel):
     units: Optional[str] = None
     notes: Optional[str] = None
 
+class MetricsBatch(BaseModel):
+    points: List[MetricsCreate]
+
 class MetricsOut(BaseModel):
     id: int
     project_id: int
@@ -299,9 +333,40 @@ class ProjectResourceCreate(BaseModel):
     end_date: Optional[datetime.date] = None
     role_in_project: Optional[str] = None
 
+class RolloutPlanRequest(BaseModel):
+    project_ids: List[int]  # planned in order against shared district capacity
+    start_date: datetime.date
+    weekly_capacity: int = 10  # stores per district per week
+    district_capacity: Optional[Dict[str, int]] = None  # per-district overrides
+    weeks_per_phase: int = 1
+    regions: Optional[List[str]] = None
+    districts: Optional[List[str]] = None
+    formats: Optional[List[str]] = None
+
+class JobOut(BaseModel):
+    id: int
+    kind: str
+    status: str
+    priority: int
+    attempts: int
+    max_attempts: int
+    run_after: datetime.datetime
+    started_at: Optional[datetime.datetime] = None
+    finished_at: Optional[datetime.datetime] = None
+    result: Optional[Any] = None
+    error: Optional[str] = None
+    created_at: Optional[datetime.datetime] = None
+
+    class Config:
+        orm_mode = True
+
 # Update forward references
 TaskOut.update_forward_refs()
 
 class Token(BaseModel):
     access_token: str
-    token_type: str
\ No newline at end of file
+    token_type: str
+    refresh_token: Optional[str] = None
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
\ No newline at end of file
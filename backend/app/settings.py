@@ -4,7 +4,8 @@ from pydantic import BaseSettings, AnyUrl
 class Settings(BaseSettings):
     DATABASE_URL: str = "sqlite:///./dev.db"
     SECRET_KEY: str = "dev-secret"
-    ACCESS_TOKEN_EXPIRE_MINUTES: int = 10080
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
+    REFRESH_TOKEN_EXPIRE_MINUTES: int = 10080
     AZURE_CLIENT_ID: str | None = None
     AZURE_CLIENT_SECRET: str | None = None
     AZURE_TENANT_ID: str | None = None
@@ -0,0 +1,150 @@
+"""
+Single-flight request coalescing for expensive read endpoints.
+
+When identical requests arrive together (same endpoint, same parameters, same
+data scope), only the first one computes. The others wait for it and receive
+the same result, or the same exception. A successful result is also served for
+GRACE_SECONDS after it completes (SINGLE_FLIGHT_GRACE_SECONDS, default 1, 0
+disables), which absorbs the stragglers of a burst. Failures are never kept.
+
+@coalesce(scope=...) wraps a route handler, sync or async:
+- Sync handlers run in FastAPI's thread pool, so followers block on an event
+  until the leader finishes.
+- Async handlers share an asyncio task. A disconnecting leader does not cancel
+  the work the followers are waiting on.
+
+The key is the handler, its query parameters (everything except the session,
+the user and the response) and the scope of the user:
+- user_scope: one user's own data (results computed from current_user.id).
+- visibility_scope: results that depend only on what policy lets the user see.
+  All admins and managers share a key, other users share one per (id, store).
+"""
+
+import os
+import time
+import asyncio
+import inspect
+import functools
+import threading
+from . import policy
+
+GRACE_SECONDS = float(os.getenv("SINGLE_FLIGHT_GRACE_SECONDS", 1))
+UNKEYED = ("db", "current_user", "response", "request")
+
+def user_scope(user):
+    return ("user", user.id)
+
+def visibility_scope(user):
+    if policy.is_privileged(user):
+        return ("privileged",)
+    return ("user", user.id, user.store_number)
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """In-flight calls and recently completed results, by key."""
+
+    def __init__(self, grace: float = GRACE_SECONDS):
+        self.grace = grace
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._tasks = {}
+        self._recent = {}
+
+    def _cached(self, key, now: float):
+        """Result completed within the grace window, else a miss; prunes expired entries."""
+        for stale in [k for k, (expires, _) in self._recent.items() if expires <= now]:
+            del self._recent[stale]
+        return self._recent.get(key)
+
+    def _remember(self, key, result):
+        if self.grace > 0:
+            self._recent[key] = (time.monotonic() + self.grace, result)
+
+    def do(self, key, fn):
+        """fn() once for all concurrent callers with the same key."""
+        with self._lock:
+            cached = self._cached(key, time.monotonic())
+            if cached is not None:
+                return cached[1]
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn()
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                if call.error is None:
+                    self._remember(key, call.result)
+            call.done.set()
+        return call.result
+
+    async def do_async(self, key, fn):
+        """await fn() once for all concurrent callers with the same key."""
+        with self._lock:
+            cached = self._cached(key, time.monotonic())
+            if cached is not None:
+                return cached[1]
+            task = self._tasks.get(key)
+            if task is None:
+                task = self._tasks[key] = asyncio.ensure_future(fn())
+                task.add_done_callback(functools.partial(self._finished, key))
+        return await asyncio.shield(task)
+
+    def _finished(self, key, task):
+        with self._lock:
+            if self._tasks.get(key) is task:
+                del self._tasks[key]
+            if not task.cancelled() and task.exception() is None:
+                self._remember(key, task.result())
+
+    def clear(self):
+        with self._lock:
+            self._recent.clear()
+
+flights = SingleFlight()
+
+def _freeze(value):
+    if isinstance(value, (list, tuple, set)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    return value
+
+def request_key(name: str, params: dict, user, scope=user_scope):
+    return (name, _freeze({k: v for k, v in params.items() if k not in UNKEYED}), scope(user))
+
+def coalesce(scope=user_scope, group: SingleFlight = None):
+    """Decorator sharing one computation among concurrent identical requests to a handler."""
+    def decorate(handler):
+        name = f"{handler.__module__}.{handler.__qualname__}"
+
+        if inspect.iscoroutinefunction(handler):
+            @functools.wraps(handler)
+            async def async_wrapper(**kwargs):
+                key = request_key(name, kwargs, kwargs["current_user"], scope)
+                return await (group or flights).do_async(key, lambda: handler(**kwargs))
+            return async_wrapper
+
+        @functools.wraps(handler)
+        def wrapper(**kwargs):
+            key = request_key(name, kwargs, kwargs["current_user"], scope)
+            return (group or flights).do(key, lambda: handler(**kwargs))
+        return wrapper
+    return decorate
@@ -0,0 +1,150 @@
+"""
+Skill-based resource matching over the normalized resource_skills index.
+
+Resource.skills stays the source of truth (a {skill: level} matrix); every
+resource also gets one resource_skills row per skill, written by crud.create_resource
+and backfilled by migration 0006. match_resources() intersects the requested skills
+with that index in one grouped, indexed query (skill IN (...) GROUP BY resource), so
+only resources holding at least one requested skill are ever loaded. It then ranks them by
+skill overlap, FTE availability and capacity remaining in the requested window.
+"""
+
+import datetime
+import numpy as np
+from sqlalchemy import select, delete, insert, func
+from sqlalchemy.orm import Session
+from . import models, resource_capacity
+from .portfolio_analytics import cents, load_columns
+
+OVERLAP_WEIGHT = 0.6
+AVAILABILITY_WEIGHT = 0.2
+REMAINING_WEIGHT = 0.2
+
+def normalize_skill(name) -> str:
+    return " ".join(str(name).split()).lower()
+
+def normalize_skills(skills) -> dict:
+    """{skill: level or None} from a skills matrix dict (or a plain list of names)."""
+    if not skills:
+        return {}
+    if not isinstance(skills, dict):
+        skills = dict.fromkeys(skills)
+    normalized = {}
+    for name, level in skills.items():
+        key = normalize_skill(name)
+        if not key or level is False:
+            continue
+        normalized[key] = int(level) if isinstance(level, (int, float)) and not isinstance(level, bool) else None
+    return normalized
+
+def sync_resource_skills(db: Session, resource_id: int, skills):
+    """Rewrite the index rows of one resource from its skills matrix (caller commits)."""
+    sync_skills(db, {resource_id: skills})
+
+def sync_skills(db: Session, skills_by_resource: dict):
+    """sync_resource_skills for many resources in one delete and one insert (caller commits)."""
+    if not skills_by_resource:
+        return
+    db.execute(delete(models.ResourceSkill.__table__).where(models.ResourceSkill.resource_id.in_(list(skills_by_resource))))
+    rows = [
+        {"resource_id": resource_id, "skill": skill, "level": level}
+        for resource_id, skills in skills_by_resource.items()
+        for skill, level in normalize_skills(skills).items()
+    ]
+    if rows:
+        db.execute(insert(models.ResourceSkill.__table__), rows)
+
+def rank_candidates(required: int, matched, availability, remaining):
+    """
+    Score arrays for candidates: matched skill count, FTE availability and
+    remaining capacity (hundredths of a percent). Returns the scores and the
+    candidate order, best first.
+    """
+    overlap = matched / required if required else np.zeros(len(matched))
+    fte = np.minimum(availability / 10000, 1.0)
+    free = np.clip(remaining / 10000, 0.0, 1.0)
+    score = OVERLAP_WEIGHT * overlap + AVAILABILITY_WEIGHT * fte + REMAINING_WEIGHT * free
+    # more matched skills always wins; score breaks ties
+    order = np.lexsort((-score, -matched))
+    return score, order
+
+def match_resources(db: Session, skills: list, start_date: datetime.date = None, weeks: int = 4,
+                    region: str = None, store_number: str = None, role: str = None,
+                    min_level: int = None, available_only: bool = True, limit: int = 20, user=None):
+    required = sorted({normalize_skill(s) for s in skills if normalize_skill(s)})
+    if not required:
+        return {"skills": [], "resources": []}
+    start_date = resource_capacity.week_start(start_date or datetime.date.today())
+    weeks = max(1, min(weeks, resource_capacity.MAX_WEEKS))
+    end_date = start_date + datetime.timedelta(weeks=weeks)
+
+    criteria = resource_capacity.resource_criteria(user=user, role=role, store_number=store_number)
+    if region:
+        criteria.append(models.Resource.store_number.in_(
+            select(models.Store.store_number).where(models.Store.region == region)
+        ))
+    skill_criteria = [models.ResourceSkill.skill.in_(required)]
+    if min_level is not None:
+        skill_criteria.append(models.ResourceSkill.level >= min_level)
+
+    stmt = (
+        select(
+            models.Resource.id,
+            models.Resource.name,
+            models.Resource.role,
+            models.Resource.store_number,
+            cents(func.coalesce(models.Resource.availability, 1) * 100),
+            func.count(models.ResourceSkill.skill)
+        )
+        .join(models.ResourceSkill, models.ResourceSkill.resource_id == models.Resource.id)
+        .where(*skill_criteria, *criteria)
+        .group_by(models.Resource.id, models.Resource.name, models.Resource.role,
+                  models.Resource.store_number, models.Resource.availability)
+        .order_by(models.Resource.id)
+    )
+    candidates = load_columns(db, stmt, {
+        "id": np.int64, "name": object, "role": object, "store_number": object,
+        "availability": np.int64, "matched": np.int64
+    })
+    if not len(candidates["id"]):
+        return {"skills": required, "resources": []}
+
+    # capacity over the window for the candidates only
+    assignments = resource_capacity.load_assignments(
+        db, start_date, end_date, *criteria,
+        models.Resource.id.in_(select(models.ResourceSkill.resource_id).where(*skill_criteria))
+    )
+    load, over = resource_capacity.capacity_matrix(
+        candidates["id"], candidates["availability"],
+        assignments["resource_id"], assignments["start"], assignments["end"], assignments["allocation"],
+        start_date, weeks
+    )
+    remaining = candidates["availability"] - np.round(load.mean(axis=1) * 100).astype(np.int64)
+    score, order = rank_candidates(len(required), candidates["matched"], candidates["availability"], remaining)
+    if available_only:
+        order = order[(candidates["availability"][order] > 0) & (remaining[order] > 0)]
+
+    top = order[:limit].tolist()
+    matched = {}
+    for resource_id, skill in db.execute(
+        select(models.ResourceSkill.resource_id, models.ResourceSkill.skill)
+        .where(models.ResourceSkill.resource_id.in_(candidates["id"][top].tolist()), *skill_criteria)
+    ):
+        matched.setdefault(resource_id, set()).add(skill)
+
+    results = []
+    for i in top:
+        held = matched.get(int(candidates["id"][i]), set())
+        results.append({
+            "resource_id": int(candidates["id"][i]),
+            "name": candidates["name"][i],
+            "role": candidates["role"][i],
+            "store_number": candidates["store_number"][i],
+            "matched_skills": [s for s in required if s in held],
+            "missing_skills": [s for s in required if s not in held],
+            "availability": int(candidates["availability"][i]) / 10000,
+            "remaining_capacity": round(int(remaining[i]) / 100, 2),
+            "over_allocated": bool(over[i].any()),
+            "score": round(float(score[i]), 4)
+        })
+    return {"skills": required, "start_date": start_date, "end_date": end_date, "resources": results}
@@ -0,0 +1,263 @@
+"""
+Ranked store lookup by store_number prefix, name substring, region, district and format.
+
+The backend is chosen per database:
+- SQLite: an external-content FTS5 table (trigram tokenizer) kept in sync by triggers.
+- PostgreSQL: pg_trgm GIN index on stores.name plus a text_pattern_ops index on
+  store_number.
+- Anything else (or SQLite without the FTS table): an in-memory index that is
+  loaded once and then extended incrementally by crud.create_store and the bulk
+  import, and by catching up on rows with a higher id than it has seen.
+
+store_number prefix matching always uses a range predicate on the unique
+store_number index, so it is served by a B-tree on every backend.
+"""
+
+import bisect
+import threading
+from collections import defaultdict
+from sqlalchemy import select, text, func, and_, Integer, Float
+from sqlalchemy.orm import Session
+from . import models, policy
+
+SQLITE_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS stores_fts USING fts5(
+        store_number, name, region, district, format,
+        content='stores', content_rowid='id', tokenize='trigram'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS stores_fts_ai AFTER INSERT ON stores BEGIN
+        INSERT INTO stores_fts(rowid, store_number, name, region, district, format)
+        VALUES (new.id, new.store_number, new.name, new.region, new.district, new.format);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS stores_fts_ad AFTER DELETE ON stores BEGIN
+        INSERT INTO stores_fts(stores_fts, rowid, store_number, name, region, district, format)
+        VALUES ('delete', old.id, old.store_number, old.name, old.region, old.district, old.format);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS stores_fts_au AFTER UPDATE ON stores BEGIN
+        INSERT INTO stores_fts(stores_fts, rowid, store_number, name, region, district, format)
+        VALUES ('delete', old.id, old.store_number, old.name, old.region, old.district, old.format);
+        INSERT INTO stores_fts(rowid, store_number, name, region, district, format)
+        VALUES (new.id, new.store_number, new.name, new.region, new.district, new.format);
+    END""",
+]
+SQLITE_REBUILD = "INSERT INTO stores_fts(stores_fts) VALUES ('rebuild')"
+
+POSTGRES_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_stores_name_trgm ON stores USING gin (name gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_stores_store_number_pattern ON stores (store_number text_pattern_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_stores_district ON stores (district)",
+    "CREATE INDEX IF NOT EXISTS ix_stores_format ON stores (format)",
+]
+
+_backends = {}
+_memory_indexes = {}
+_lock = threading.Lock()
+
+def ensure_index(bind):
+    """Create the dialect's search structures if missing (used alongside create_all)."""
+    ddl = {"sqlite": SQLITE_DDL, "postgresql": POSTGRES_DDL}.get(bind.dialect.name)
+    if not ddl:
+        return
+    try:
+        with bind.begin() as conn:
+            fresh = bind.dialect.name == "sqlite" and conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE name = 'stores_fts'")
+            ).first() is None
+            for statement in ddl:
+                conn.execute(text(statement))
+            if fresh:
+                # index stores that existed before the FTS table
+                conn.execute(text(SQLITE_REBUILD))
+    except Exception:
+        # e.g. SQLite built without FTS5 or no privilege to create pg_trgm:
+        # searches fall back to the in-memory index
+        pass
+    _backends.pop(str(bind.url), None)
+
+def backend_for(db: Session) -> str:
+    bind = db.get_bind()
+    key = str(bind.url)
+    if key not in _backends:
+        dialect = bind.dialect.name
+        backend = "memory"
+        if dialect == "sqlite":
+            found = db.execute(text("SELECT 1 FROM sqlite_master WHERE name = 'stores_fts'")).first()
+            backend = "fts5" if found else "memory"
+        elif dialect == "postgresql":
+            found = db.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")).first()
+            backend = "trigram" if found else "memory"
+        _backends[key] = backend
+    return _backends[key]
+
+class StoreSearchIndex:
+    """In-memory fallback: sorted store numbers for prefixes, name trigrams for substrings."""
+
+    def __init__(self):
+        self.records = {}
+        self.numbers = []  # sorted (store_number, id)
+        self.trigrams = defaultdict(set)
+        self.max_id = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _grams(value: str):
+        return {value[i:i + 3] for i in range(len(value) - 2)}
+
+    def add(self, store_id, store_number, name, region=None, district=None, format=None, is_active=True):
+        with self._lock:
+            if store_id in self.records:
+                self.remove(store_id)
+            name_key = (name or "").lower()
+            self.records[store_id] = (store_number or "", name_key, region, district, format, is_active)
+            bisect.insort(self.numbers, (store_number or "", store_id))
+            for gram in self._grams(name_key):
+                self.trigrams[gram].add(store_id)
+            self.max_id = max(self.max_id, store_id)
+
+    def remove(self, store_id):
+        record = self.records.pop(store_id, None)
+        if record is None:
+            return
+        pos = bisect.bisect_left(self.numbers, (record[0], store_id))
+        if pos < len(self.numbers) and self.numbers[pos] == (record[0], store_id):
+            del self.numbers[pos]
+        for gram in self._grams(record[1]):
+            self.trigrams[gram].discard(store_id)
+
+    def catch_up(self, db: Session):
+        """Load stores created since the last seen id (e.g. by another worker)."""
+        rows = db.execute(
+            select(models.Store.id, models.Store.store_number, models.Store.name, models.Store.region,
+                   models.Store.district, models.Store.format, models.Store.is_active)
+            .where(models.Store.id > self.max_id)
+        ).all()
+        for row in rows:
+            self.add(*row)
+
+    def search(self, q: str = None, region=None, district=None, format=None, limit: int = 20):
+        """Return store ids ranked: exact number, number prefix, name prefix, name substring."""
+        ranked = {}
+        q = (q or "").strip()
+        if q:
+            pos = bisect.bisect_left(self.numbers, (q, 0))
+            while pos < len(self.numbers) and self.numbers[pos][0].startswith(q):
+                number, store_id = self.numbers[pos]
+                ranked[store_id] = 0 if number == q else 1
+                pos += 1
+            needle = q.lower()
+            grams = self._grams(needle)
+            if grams:
+                candidates = set.intersection(*(self.trigrams.get(g, set()) for g in grams))
+            else:
+                candidates = self.records.keys()
+            for store_id in candidates:
+                name = self.records[store_id][1]
+                if store_id not in ranked and needle in name:
+                    ranked[store_id] = 2 if name.startswith(needle) else 3
+        else:
+            ranked = dict.fromkeys(self.records, 4)
+
+        def matches(store_id):
+            _, _, r, d, f, active = self.records[store_id]
+            return active and (region is None or r == region) and \
+                (district is None or d == district) and (format is None or f == format)
+
+        hits = [store_id for store_id in ranked if matches(store_id)]
+        hits.sort(key=lambda store_id: (ranked[store_id], len(self.records[store_id][1]), self.records[store_id][0]))
+        return hits[:limit]
+
+def memory_index(db: Session) -> StoreSearchIndex:
+    key = str(db.get_bind().url)
+    with _lock:
+        index = _memory_indexes.get(key)
+        if index is None:
+            index = _memory_indexes[key] = StoreSearchIndex()
+    index.catch_up(db)
+    return index
+
+def index_store(db: Session, store: models.Store):
+    """Incrementally add a newly created store to a loaded in-memory index."""
+    index = _memory_indexes.get(str(db.get_bind().url))
+    if index is not None:
+        index.add(store.id, store.store_number, store.name, store.region,
+                  store.district, store.format, store.is_active)
+
+def index_stores(db: Session, store_numbers):
+    """Refresh stores inserted or updated in bulk in a loaded in-memory index."""
+    index = _memory_indexes.get(str(db.get_bind().url))
+    if index is None or not store_numbers:
+        return
+    rows = db.execute(
+        select(models.Store.id, models.Store.store_number, models.Store.name, models.Store.region,
+               models.Store.district, models.Store.format, models.Store.is_active)
+        .where(models.Store.store_number.in_(list(store_numbers)))
+    ).all()
+    for row in rows:
+        index.add(*row)
+
+def _number_prefix(q: str):
+    # range predicate so the unique store_number B-tree serves the prefix match
+    return and_(models.Store.store_number >= q, models.Store.store_number < q + "\uffff")
+
+def _fts_phrase(q: str):
+    return '"' + q.replace('"', '""') + '"'
+
+def _ranked_ids(db: Session, backend: str, q: str, filters: list, limit: int):
+    """(tier, score, store_id) candidates: number prefix from the B-tree, names from the text index."""
+    prefix_rows = db.execute(
+        select(models.Store.id, models.Store.store_number)
+        .where(_number_prefix(q), *filters)
+        .order_by(models.Store.store_number)
+        .limit(limit)
+    ).all()
+    ranked = [(0 if number == q else 1, 0.0, store_id) for store_id, number in prefix_rows]
+
+    needle = q.lower()
+    if backend == "fts5" and len(q) >= 3:
+        fts = text(
+            "SELECT rowid AS store_id, bm25(stores_fts) AS score FROM stores_fts WHERE stores_fts MATCH :match"
+        ).bindparams(match="name : " + _fts_phrase(q)).columns(store_id=Integer, score=Float).subquery()
+        name_query = select(models.Store.id, models.Store.name, fts.c.score).join(fts, fts.c.store_id == models.Store.id)
+    elif backend == "trigram":
+        name_query = select(
+            models.Store.id, models.Store.name, -func.similarity(models.Store.name, q)
+        ).where(models.Store.name.ilike("%" + q + "%"))
+    else:
+        # shorter than a trigram: name prefix only
+        name_query = select(models.Store.id, models.Store.name, func.length(models.Store.name)).where(
+            func.lower(models.Store.name).like(needle + "%")
+        )
+    for store_id, name, score in db.execute(name_query.where(*filters).order_by(name_query.selected_columns[2]).limit(limit)):
+        ranked.append((2 if (name or "").lower().startswith(needle) else 3, score or 0.0, store_id))
+    return ranked
+
+def search_stores(db: Session, q: str = None, region: str = None, district: str = None,
+                  format: str = None, limit: int = 20, user=None):
+    q = (q or "").strip()
+    backend = backend_for(db)
+    filters = [models.Store.is_active == True]
+    if region:
+        filters.append(models.Store.region == region)
+    if district:
+        filters.append(models.Store.district == district)
+    if format:
+        filters.append(models.Store.format == format)
+    if user is not None:
+        filters.append(policy.store_scope(user))
+
+    if not q:
+        return db.query(models.Store).filter(*filters).order_by(models.Store.store_number).limit(limit).all()
+
+    if backend == "memory":
+        ids = memory_index(db).search(q, region, district, format, limit=limit if user is None else None)
+    else:
+        best = {}
+        for tier, score, store_id in _ranked_ids(db, backend, q, filters, limit):
+            best[store_id] = min(best.get(store_id, (tier, score)), (tier, score))
+        ids = sorted(best, key=best.get)[:limit]
+    if not ids:
+        return []
+    stores = db.query(models.Store).filter(models.Store.id.in_(ids), *filters).all()
+    order = {store_id: pos for pos, store_id in enumerate(ids)}
+    return sorted(stores, key=lambda store: order[store.id])[:limit]
@@ -0,0 +1,114 @@
+"""
+Batch task updates.
+
+Updates arrive either as a list of per-task changes or as one change applied to
+every task matching a filter. Per-task changes with identical values are grouped,
+so marking a whole phase complete is a single UPDATE ... WHERE id IN (...). The
+status side effects (status_effects(), shared with crud.update_task) are applied
+in the same statement: COMPLETE sets completion_percentage to 100 and stamps
+completed_at (kept when the task was already complete), and leaving COMPLETE
+clears completed_at. Parents of the updated tasks are then updated incrementally
+by task_rollup, all in one transaction.
+"""
+
+import datetime
+from sqlalchemy import select, update, case
+from sqlalchemy.orm import Session
+from . import models, task_rollup
+
+MAX_TASKS = 1000
+
+def model_values(changes: dict) -> dict:
+    """Schema enums (status, priority, project_type) of a change set as model enums."""
+    values = dict(changes)
+    if values.get("project_type") is not None:
+        values["project_type"] = models.ProjectType[values["project_type"].name]
+    if values.get("status") is not None:
+        values["status"] = models.TaskStatus[values["status"].name]
+    if values.get("priority") is not None:
+        values["priority"] = models.Priority[values["priority"].name]
+    return values
+
+def status_effects(status, now: datetime.datetime, current=None) -> dict:
+    """
+    Columns that setting status also sets. current is the task as loaded, or
+    None for a set-based UPDATE, where the kept completed_at is a CASE on the row.
+    """
+    task = models.Task
+    if status != models.TaskStatus.COMPLETE:
+        return {"completed_at": None}
+    if current is None:
+        completed_at = case((task.status == models.TaskStatus.COMPLETE, task.completed_at), else_=now)
+    elif current.status == models.TaskStatus.COMPLETE and current.completed_at:
+        completed_at = current.completed_at
+    else:
+        completed_at = now
+    return {"completion_percentage": 100, "completed_at": completed_at}
+
+def _side_effects(values: dict, now: datetime.datetime) -> dict:
+    values = {**values, "updated_at": now, "version": models.Task.version + 1}
+    if "status" in values:
+        values.update(status_effects(values["status"], now))
+    return values
+
+def group_updates(updates):
+    """[(ids, changes)] with one entry per distinct change set, in first-seen order."""
+    groups = {}
+    for item in updates:
+        changes = item.dict(exclude_unset=True)
+        task_id = changes.pop("id")
+        key = tuple(sorted((name, repr(value)) for name, value in changes.items()))
+        groups.setdefault(key, (changes, []))[1].append(task_id)
+    return [(ids, changes) for changes, ids in groups.values() if changes]
+
+def matching_ids(db: Session, user_id: int, ids=None, project_id: int = None, parent_id: int = None, status=None):
+    task = models.Task
+    stmt = select(task.id).where(task.user_id == user_id)
+    if ids:
+        stmt = stmt.where(task.id.in_(ids))
+    if project_id is not None:
+        stmt = stmt.where(task.project_id == project_id)
+    if parent_id is not None:
+        stmt = stmt.where(task.parent_id == parent_id)
+    if status is not None:
+        stmt = stmt.where(task.status == models.TaskStatus[status.name])
+    return [row[0] for row in db.execute(stmt.order_by(task.id).limit(MAX_TASKS + 1))]
+
+def apply(db: Session, user_id: int, groups, now: datetime.datetime = None):
+    """
+    Apply [(ids, changes)] to the user's tasks in one transaction. Returns
+    per-id results (unknown or foreign ids as not_found) and the parents updated.
+    """
+    now = now or datetime.datetime.utcnow()
+    task = models.Task
+    requested = list(dict.fromkeys(task_id for ids, _ in groups for task_id in ids))
+    owned = {
+        row[0] for row in db.execute(select(task.id).where(task.id.in_(requested), task.user_id == user_id))
+    }
+    before = task_rollup.snapshot(db, owned)
+    for ids, changes in groups:
+        targets = [task_id for task_id in ids if task_id in owned]
+        if targets:
+            db.execute(
+                update(task.__table__).where(task.__table__.c.id.in_(targets))
+                .values(_side_effects(model_values(changes), now))
+            )
+    parents = task_rollup.propagate(db, before, now)
+    db.commit()
+
+    state = {
+        row[0]: row[1:] for row in db.execute(
+            select(task.id, task.status, task.completion_percentage, task.completed_at).where(task.id.in_(owned))
+        )
+    }
+    results = []
+    for task_id in requested:
+        if task_id not in state:
+            results.append({"id": task_id, "result": "not_found"})
+            continue
+        status, percent, completed_at = state[task_id]
+        results.append({
+            "id": task_id, "result": "updated", "status": status.value,
+            "completion_percentage": percent, "completed_at": completed_at
+        })
+    return {"results": results, "parents_updated": parents}
@@ -0,0 +1,183 @@
+"""
+Roll child task progress up into parent tasks (and optionally projects).
+
+A parent's completion_percentage is the hour-weighted average of its children
+(estimated_hours, one hour when unestimated; CANCELLED children are left out,
+and COMPLETE children count as 100%). A parent whose children are all COMPLETE
+becomes COMPLETE itself, and a COMPLETE parent that gains an open child goes
+back to IN_PROGRESS.
+
+Every task stores the aggregates of its direct children (child_count,
+child_done, child_weight and child_progress = sum of weight x completion), so a
+change never rereads siblings. The caller snapshots the changed tasks before and
+after (snapshot()), and the difference of their contributions is added to their
+parents' aggregates. Each parent's new completion and status then yield its own
+contribution delta for the next level. A change therefore costs O(depth), with
+two updates and one select per level for a whole batch. Deltas are additive, so a
+parent reached again from a deeper branch just receives another delta.
+
+The deltas are added in SQL (child_count = child_count + :delta, ...), and that
+update locks the parent rows until commit. Completion and status are then
+derived from a re-read of the locked rows. Concurrent changes to siblings
+therefore add up instead of overwriting each other.
+
+Root tasks contribute the same way to Project.task_weight/task_progress. With
+PROJECT_COMPLETION_FROM_TASKS=1 the project's completion_percentage follows them too.
+Project.version only changes when completion_percentage does, so task edits do
+not make a project editor's If-Match stale.
+"""
+
+import os
+import datetime
+from decimal import Decimal
+from sqlalchemy import select, update, bindparam, func, case, cast, Integer
+from sqlalchemy.orm import Session
+from . import models
+
+COMPLETE = models.TaskStatus.COMPLETE
+CANCELLED = models.TaskStatus.CANCELLED
+REOPENED = models.TaskStatus.IN_PROGRESS
+MAX_LEVELS = 100  # guards against corrupt parent cycles
+PROJECT_COMPLETION_FROM_TASKS = os.getenv("PROJECT_COMPLETION_FROM_TASKS", "0") == "1"
+
+ZERO = (0, 0, Decimal(0), Decimal(0))
+AGGREGATES = ("child_count", "child_done", "child_weight", "child_progress")
+
+def contribution(status, completion, estimated_hours):
+    """(count, done, weight, weight x completion) a task adds to its parent's aggregates."""
+    if status == CANCELLED:
+        return ZERO
+    weight = Decimal(estimated_hours) if estimated_hours and estimated_hours > 0 else Decimal(1)
+    percent = 100 if status == COMPLETE else (completion or 0)
+    return (1, 1 if status == COMPLETE else 0, weight, weight * percent)
+
+def _add(left, right, sign=1):
+    return tuple(a + sign * b for a, b in zip(left, right))
+
+def parent_state(total_weight, weighted, children, done, status, percent, completed_at, now):
+    """New (completion, status, completed_at) of a parent from its children's aggregates."""
+    if not children:
+        return percent, status, completed_at
+    if done == children:
+        return 100, COMPLETE, completed_at if status == COMPLETE else now
+    percent = int(round(Decimal(weighted) / Decimal(total_weight))) if total_weight else 0
+    if status == COMPLETE:
+        return min(percent, 99), REOPENED, None
+    return percent, status, completed_at
+
+def snapshot(db: Session, task_ids):
+    """{id: (parent_id, project_id, contribution)} of the given tasks as currently stored."""
+    task = models.Task
+    if not task_ids:
+        return {}
+    return {
+        task_id: (parent_id, project_id, contribution(status, percent, hours))
+        for task_id, parent_id, project_id, status, percent, hours in db.execute(
+            select(task.id, task.parent_id, task.project_id, task.status, task.completion_percentage, task.estimated_hours)
+            .where(task.id.in_(list(task_ids)))
+        )
+    }
+
+def deltas(before: dict, after: dict):
+    """Aggregate deltas ({parent_id: delta}, {project_id: delta}) between two snapshots."""
+    parents, projects = {}, {}
+    for task_id in set(before) | set(after):
+        for state, sign in ((before.get(task_id), -1), (after.get(task_id), 1)):
+            if state is None:
+                continue
+            parent_id, project_id, contrib = state
+            if parent_id is not None:
+                parents[parent_id] = _add(parents.get(parent_id, ZERO), contrib, sign)
+            elif project_id is not None:
+                projects[project_id] = _add(projects.get(project_id, ZERO), contrib, sign)
+    drop = lambda d: {key: value for key, value in d.items() if any(value)}
+    return drop(parents), drop(projects)
+
+def _increments(table, names):
+    """UPDATE adding :d_<name> to each named column of the row with id :b_id."""
+    return update(table).where(table.c.id == bindparam("b_id")).values(
+        {name: func.coalesce(table.c[name], 0) + bindparam("d_" + name) for name in names}
+    )
+
+def apply(db: Session, parents: dict, projects: dict = None, now: datetime.datetime = None):
+    """Add deltas to parent aggregates, level by level up to the roots (caller commits)."""
+    now = now or datetime.datetime.utcnow()
+    task = models.Task
+    table = task.__table__
+    projects = dict(projects or {})
+    changed = {}
+    for _ in range(MAX_LEVELS):
+        if not parents:
+            break
+        # increment in place first: concurrent deltas to one parent add up, and the
+        # update holds the parent rows until commit, so the read below is current
+        db.execute(_increments(table, AGGREGATES), [
+            {"b_id": parent_id, **{"d_" + name: value for name, value in zip(AGGREGATES, parents[parent_id])}}
+            for parent_id in sorted(parents)
+        ])
+        updates, next_level = [], {}
+        for row in db.execute(
+            select(
+                task.id, task.parent_id, task.project_id, task.status, task.completion_percentage,
+                task.completed_at, task.estimated_hours,
+                task.child_count, task.child_done, task.child_weight, task.child_progress
+            ).where(task.id.in_(list(parents))).order_by(task.id)
+        ):
+            percent, status, completed_at = parent_state(
+                row.child_weight, row.child_progress, row.child_count, row.child_done,
+                row.status, row.completion_percentage, row.completed_at, now
+            )
+            if (percent, status) != (row.completion_percentage, row.status):
+                changed[row.id] = True
+            updates.append({
+                "b_id": row.id, "completion_percentage": percent, "status": status, "completed_at": completed_at
+            })
+            delta = _add(
+                contribution(status, percent, row.estimated_hours),
+                contribution(row.status, row.completion_percentage, row.estimated_hours), -1
+            )
+            if not any(delta):
+                continue
+            if row.parent_id is not None:
+                next_level[row.parent_id] = _add(next_level.get(row.parent_id, ZERO), delta)
+            elif row.project_id is not None:
+                projects[row.project_id] = _add(projects.get(row.project_id, ZERO), delta)
+        if updates:
+            db.execute(
+                update(table).where(table.c.id == bindparam("b_id")).values(
+                    completion_percentage=bindparam("completion_percentage"), status=bindparam("status"),
+                    completed_at=bindparam("completed_at"), updated_at=now, version=table.c.version + 1
+                ),
+                updates
+            )
+        parents = next_level
+    if projects:
+        _apply_projects(db, projects)
+    return list(changed)
+
+def _apply_projects(db: Session, projects: dict):
+    table = models.Project.__table__
+    db.execute(_increments(table, ("task_weight", "task_progress")), [
+        {"b_id": project_id, "d_task_weight": delta[2], "d_task_progress": delta[3]}
+        for project_id, delta in sorted(projects.items())
+    ])
+    if not PROJECT_COMPLETION_FROM_TASKS:
+        return
+    # the counters are internal; only a rewritten completion is a new project version
+    completion = case(
+        (table.c.task_weight > 0, cast(func.round(table.c.task_progress / table.c.task_weight), Integer)),
+        else_=table.c.completion_percentage
+    )
+    db.execute(
+        update(table)
+        .where(table.c.id.in_(list(projects)), completion.is_distinct_from(table.c.completion_percentage))
+        .values(completion_percentage=completion, version=table.c.version + 1)
+    )
+
+def propagate(db: Session, before: dict, now: datetime.datetime = None):
+    """
+    Apply the changes of the tasks in a before-snapshot, as they are stored now
+    (caller flushes and commits). New tasks appear in before with a None state.
+    """
+    parents, projects = deltas(before, snapshot(db, list(before)))
+    return apply(db, parents, projects, now)
@@ -0,0 +1,272 @@
+"""
+Ranked, highlighted full-text search over tasks, projects and risks.
+
+Each searchable entity has a label column (shown highlighted as the result title)
+and body columns (summarized as a highlighted snippet). The index is dialect-aware:
+- SQLite: one external-content FTS5 table per entity (porter stemming), kept in sync
+  with the base table by insert/update/delete triggers, ranked by weighted bm25.
+- PostgreSQL: an expression GIN index over a weighted tsvector of the same columns,
+  so there is nothing to keep in sync; ranked by ts_rank.
+- Anything else (or SQLite built without FTS5): a case-insensitive LIKE scan.
+
+A search runs in two steps per entity: the ranked ids are selected through the
+index with the user's row-level scope applied and a LIMIT, then labels and
+snippets are computed for just those rows. Highlighting therefore costs the
+same no matter how many rows match.
+
+Titles and snippets are HTML: the stored text is escaped and only the <mark>
+tags are markup. The database highlighters mark matches with private-use
+characters, which are swapped for the tags after escaping.
+"""
+
+import re
+import html
+from collections import namedtuple
+from sqlalchemy import select, text, func, or_, literal_column, bindparam, table, column
+from sqlalchemy.orm import Session
+from . import models, policy
+
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_END = "</mark>"
+# what highlight()/snippet()/ts_headline() put around matches, before escaping
+_MATCH_START = "\ue000"
+_MATCH_END = "\ue001"
+SNIPPET_WORDS = 16
+PREFIX_MIN_LENGTH = 3
+
+Searchable = namedtuple("Searchable", "table model label body weights scope")
+
+SEARCHABLE = {
+    "task": Searchable("tasks", models.Task, "title", ("description",), (4.0, 1.0), policy.task_scope),
+    "project": Searchable("projects", models.Project, "name", ("description",), (4.0, 1.0), policy.project_scope),
+    "risk": Searchable("risks", models.Risk, "title", ("description", "mitigation_plan"), (4.0, 1.0, 1.0), policy.risk_scope),
+}
+
+def _columns(entity: Searchable):
+    return (entity.label,) + entity.body
+
+def _sqlite_ddl(entity: Searchable):
+    fts = entity.table + "_fts"
+    columns = ", ".join(_columns(entity))
+    new_values = ", ".join("new." + c for c in _columns(entity))
+    old_values = ", ".join("old." + c for c in _columns(entity))
+    return [
+        f"""CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+            {columns}, content='{entity.table}', content_rowid='id', tokenize='porter unicode61'
+        )""",
+        f"""CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {entity.table} BEGIN
+            INSERT INTO {fts}(rowid, {columns}) VALUES (new.id, {new_values});
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {entity.table} BEGIN
+            INSERT INTO {fts}({fts}, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+        END""",
+        # only edits of indexed text reindex, not status, rollup or version updates
+        f"DROP TRIGGER IF EXISTS {fts}_au",
+        f"""CREATE TRIGGER {fts}_au AFTER UPDATE OF {columns} ON {entity.table} BEGIN
+            INSERT INTO {fts}({fts}, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+            INSERT INTO {fts}(rowid, {columns}) VALUES (new.id, {new_values});
+        END""",
+    ]
+
+def _document(entity: Searchable, qualify: bool = False):
+    """Weighted tsvector expression; must stay identical to the GIN index expression."""
+    prefix = entity.table + "." if qualify else ""
+    parts = [
+        f"setweight(to_tsvector('english', coalesce({prefix}{column}, '')), '{weight}')"
+        for column, weight in zip(_columns(entity), "ABCD")
+    ]
+    return " || ".join(parts)
+
+def _postgres_ddl(entity: Searchable):
+    return [
+        f"CREATE INDEX IF NOT EXISTS ix_{entity.table}_fts ON {entity.table} USING gin (({_document(entity)}))"
+    ]
+
+_backends = {}
+
+def ensure_index(bind):
+    """Create the dialect's full-text structures if missing (used alongside create_all)."""
+    dialect = bind.dialect.name
+    if dialect not in ("sqlite", "postgresql"):
+        return
+    try:
+        with bind.begin() as conn:
+            for entity in SEARCHABLE.values():
+                if dialect == "sqlite":
+                    fresh = conn.execute(
+                        text("SELECT 1 FROM sqlite_master WHERE name = :name"), {"name": entity.table + "_fts"}
+                    ).first() is None
+                    for statement in _sqlite_ddl(entity):
+                        conn.execute(text(statement))
+                    if fresh:
+                        # index rows that existed before the FTS table
+                        conn.execute(text(f"INSERT INTO {entity.table}_fts({entity.table}_fts) VALUES ('rebuild')"))
+                else:
+                    for statement in _postgres_ddl(entity):
+                        conn.execute(text(statement))
+    except Exception:
+        # e.g. SQLite built without FTS5: searches fall back to LIKE
+        pass
+    _backends.pop(str(bind.url), None)
+
+def backend_for(db: Session) -> str:
+    bind = db.get_bind()
+    key = str(bind.url)
+    if key not in _backends:
+        backend = "like"
+        if bind.dialect.name == "sqlite":
+            found = db.execute(text("SELECT 1 FROM sqlite_master WHERE name = 'tasks_fts'")).first()
+            backend = "fts5" if found else "like"
+        elif bind.dialect.name == "postgresql":
+            backend = "tsvector"
+        _backends[key] = backend
+    return _backends[key]
+
+def terms(q: str):
+    return re.findall(r"\w+", q or "")
+
+def fts5_query(q: str) -> str:
+    """
+    All words must match; the last one also as a prefix so results appear while
+    typing, but only from PREFIX_MIN_LENGTH characters (short prefixes expand to
+    most of the vocabulary and make ranking scan nearly every row).
+    """
+    words = terms(q)
+    phrases = ['"' + word + '"' for word in words]
+    if words and len(words[-1]) >= PREFIX_MIN_LENGTH:
+        phrases[-1] += "*"
+    return " ".join(phrases)
+
+def highlight(value: str, words) -> str:
+    """Python-side highlighting for the LIKE fallback; value is HTML-escaped."""
+    if not value or not words:
+        return html.escape(value) if value else value
+    pattern = re.compile("(" + "|".join(re.escape(w) for w in words) + ")", re.IGNORECASE)
+    # split on the raw text so words never match inside an escaped entity
+    parts = pattern.split(value)
+    return "".join(
+        HIGHLIGHT_START + html.escape(part) + HIGHLIGHT_END if index % 2 else html.escape(part)
+        for index, part in enumerate(parts)
+    )
+
+def _marked(value: str) -> str:
+    """Database highlighter output as escaped HTML with <mark> tags."""
+    if not value:
+        return value
+    return html.escape(value).replace(_MATCH_START, HIGHLIGHT_START).replace(_MATCH_END, HIGHLIGHT_END)
+
+def excerpt(value: str, words, width: int = 120) -> str:
+    """Window of value around the first matched word."""
+    if not value:
+        return value
+    lowered = value.lower()
+    positions = [lowered.find(w.lower()) for w in words if w.lower() in lowered]
+    start = max(0, min(positions) - width // 3) if positions else 0
+    clip = value[start:start + width]
+    return ("…" if start else "") + clip + ("…" if start + width < len(value) else "")
+
+def _project_column(entity: Searchable):
+    return entity.model.id if entity.model is models.Project else entity.model.project_id
+
+def _fts_table(entity: Searchable):
+    return table(entity.table + "_fts", column("rowid"))
+
+def _fts_match(fts, q: str):
+    return literal_column(fts.name).op("MATCH")(bindparam("match", fts5_query(q)))
+
+def _ranked(db: Session, backend: str, entity: Searchable, q: str, criteria: list, limit: int):
+    """[(id, score)] best first, selected through the full-text index."""
+    model = entity.model
+    if backend == "fts5":
+        fts = _fts_table(entity)
+        # bm25 is lower-is-better; negate so every backend ranks higher-is-better
+        score = -func.bm25(literal_column(fts.name), *entity.weights)
+        stmt = (
+            select(model.id, score)
+            .select_from(fts)
+            .join(model.__table__, model.id == fts.c.rowid)
+            .where(_fts_match(fts, q))
+        )
+    elif backend == "tsvector":
+        query = func.websearch_to_tsquery(literal_column("'english'"), q)
+        document = literal_column(_document(entity, qualify=True))
+        score = func.ts_rank(document, query)
+        stmt = select(model.id, score).where(document.op("@@")(query))
+    else:
+        words = terms(q)
+        score = literal_column("0.0")
+        stmt = select(model.id, score).where(*(
+            or_(*(getattr(model, column).icontains(word, autoescape=True) for column in _columns(entity)))
+            for word in words
+        ))
+    stmt = stmt.where(*criteria).order_by(score.desc(), model.id.desc()).limit(limit)
+    return [(row[0], float(row[1] or 0)) for row in db.execute(stmt)]
+
+def _highlights(db: Session, backend: str, entity: Searchable, q: str, ids: list):
+    """{id: (project_id, title, snippet)} for the already ranked ids only."""
+    model = entity.model
+    label = getattr(model, entity.label)
+    if backend == "fts5":
+        fts = _fts_table(entity)
+        stmt = (
+            select(
+                model.id,
+                _project_column(entity),
+                func.highlight(literal_column(fts.name), 0, _MATCH_START, _MATCH_END),
+                func.snippet(literal_column(fts.name), 1 if len(entity.body) == 1 else -1, _MATCH_START, _MATCH_END, "…", SNIPPET_WORDS),
+            )
+            .select_from(fts)
+            .join(model.__table__, model.id == fts.c.rowid)
+            .where(_fts_match(fts, q), model.id.in_(ids))
+        )
+        return {row[0]: (row[1], _marked(row[2]), _marked(row[3])) for row in db.execute(stmt)}
+    if backend == "tsvector":
+        query = func.websearch_to_tsquery(literal_column("'english'"), q)
+        body = func.concat_ws(" ", *(getattr(model, column) for column in entity.body))
+        options = f"StartSel={_MATCH_START}, StopSel={_MATCH_END}"
+        stmt = select(
+            model.id,
+            _project_column(entity),
+            func.ts_headline(literal_column("'english'"), func.coalesce(label, ""), query, options + ", HighlightAll=true"),
+            func.ts_headline(literal_column("'english'"), body, query, f"{options}, MaxWords={SNIPPET_WORDS}, MinWords=8"),
+        ).where(model.id.in_(ids))
+        return {row[0]: (row[1], _marked(row[2]), _marked(row[3])) for row in db.execute(stmt)}
+    words = terms(q)
+    stmt = select(model.id, _project_column(entity), label, *(getattr(model, c) for c in entity.body)).where(model.id.in_(ids))
+    results = {}
+    for row in db.execute(stmt):
+        body = " ".join(value for value in row[3:] if value)
+        results[row[0]] = (row[1], highlight(row[2], words), highlight(excerpt(body, words), words))
+    return results
+
+def search(db: Session, q: str, types: list = None, project_id: int = None, limit: int = 20, user=None):
+    """Best matches across the requested entity types, highest score first."""
+    if not terms(q):
+        return []
+    backend = backend_for(db)
+    results = []
+    for name in types or SEARCHABLE:
+        entity = SEARCHABLE[name]
+        criteria = []
+        if user is not None:
+            criteria.append(entity.scope(user))
+        if project_id is not None:
+            criteria.append(_project_column(entity) == project_id)
+        ranked = _ranked(db, backend, entity, q, criteria, limit)
+        if not ranked:
+            continue
+        details = _highlights(db, backend, entity, q, [entity_id for entity_id, _ in ranked])
+        for entity_id, score in ranked:
+            if entity_id not in details:
+                continue
+            entity_project_id, title, snippet = details[entity_id]
+            results.append({
+                "type": name,
+                "id": entity_id,
+                "project_id": entity_project_id,
+                "title": title or snippet,
+                "snippet": snippet,
+                "score": score
+            })
+    results.sort(key=lambda r: -r["score"])
+    return results[:limit]
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Benchmark: JSON list responses vs. Parquet exports, for size and load time.
+
+Fills an in-memory SQLite database with N budgets and tasks (default 50k each,
+as in bench_serialization.py). For each table it compares:
+- the body /api/budgets/ or /api/tasks/ returns (fast_json rows into orjson)
+  with the file app.columnar_export writes;
+- json.loads of that body with pyarrow.parquet.read_table of the file, which is
+  what a BI tool pays to get the data.
+
+Requires pyarrow.
+
+    SECRET_KEY=bench python benchmarks/bench_export.py --rows 50000
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+import pyarrow.parquet as pq
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SECRET_KEY", "bench")
+from app import models, schemas, fast_json, columnar_export  # noqa: E402
+from bench_serialization import build, best_of  # noqa: E402
+
+def json_body(db, model, schema):
+    names = fast_json.field_names(schema, model)
+    return fast_json.rows_response(db.execute(select(*fast_json.columns(model, names))), fast_json.encoder(schema, names)).body
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://")
+    models.Base.metadata.create_all(engine)
+    db = Session(engine)
+    build(db, args.rows)
+    columnar_export.SETTLE_SECONDS = 0  # rows stamped by build() a moment ago belong in the export
+    out_dir = tempfile.mkdtemp(prefix="bench-export-")
+
+    print(f"rows={args.rows:,} per table")
+    for dataset, model, schema in [("budgets", models.Budget, schemas.BudgetOut), ("tasks", models.Task, schemas.TaskOut)]:
+        json_time, body = best_of(lambda: json_body(db, model, schema), args.repeat)
+        export_time, manifest = best_of(lambda: columnar_export.export(db, dataset, out_dir=out_dir), args.repeat)
+        path = os.path.join(out_dir, manifest["files"][0]["path"])
+        json_load, _ = best_of(lambda: json.loads(body), args.repeat)
+        parquet_load, table = best_of(lambda: pq.read_table(path), args.repeat)
+        assert table.num_rows == args.rows, dataset
+        size = os.path.getsize(path)
+        print(f"{dataset:8} json {len(body) / 1e6:7.2f} MB  write {json_time * 1000:7.1f} ms  load {json_load * 1000:7.1f} ms   "
+              f"parquet {size / 1e6:6.2f} MB  write {export_time * 1000:7.1f} ms  load {parquet_load * 1000:6.1f} ms   "
+              f"size {len(body) / size:5.1f}x  load {json_load / parquet_load:5.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-row Python analytics vs. columnar NumPy analytics.
+
+Builds a synthetic portfolio of N tasks (default 1M) plus budgets and risks,
+then times the dashboard aggregation the old way (iterating objects, summing
+Decimals) against app.portfolio_analytics on column arrays.
+
+    SECRET_KEY=bench python benchmarks/bench_portfolio_analytics.py --tasks 1000000
+"""
+
+import argparse
+import datetime
+import os
+import random
+import sys
+import time
+from decimal import Decimal
+from types import SimpleNamespace
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SECRET_KEY", "bench")
+from app import portfolio_analytics as pa  # noqa: E402
+
+STATUSES = ["BACKLOG", "IN_PROGRESS", "UAT", "COMPLETE", "ON_HOLD"]
+
+def build(n_tasks, n_budgets, n_risks, seed=7):
+    rnd = random.Random(seed)
+    base = datetime.datetime(2026, 1, 1)
+    tasks = [
+        SimpleNamespace(
+            status=rnd.choice(STATUSES),
+            deadline=base + datetime.timedelta(days=rnd.randint(-200, 200)) if rnd.random() < 0.8 else None
+        )
+        for _ in range(n_tasks)
+    ]
+    budgets = [
+        SimpleNamespace(
+            planned_amount=Decimal(rnd.randint(0, 10_000_000)).scaleb(-2),
+            actual_amount=Decimal(rnd.randint(0, 10_000_000)).scaleb(-2)
+        )
+        for _ in range(n_budgets)
+    ]
+    risks = [
+        SimpleNamespace(probability=rnd.randint(1, 5), impact=rnd.randint(1, 5), status=rnd.choice(["open", "closed"]))
+        for _ in range(n_risks)
+    ]
+    return tasks, budgets, risks
+
+def python_dashboard(tasks, budgets, risks, now):
+    total_budget = sum(b.planned_amount for b in budgets)
+    total_spent = sum(b.actual_amount for b in budgets)
+    completed = len([t for t in tasks if t.status == "COMPLETE"])
+    overdue = len([t for t in tasks if t.deadline and t.deadline < now and t.status != "COMPLETE"])
+    high = len([r for r in risks if r.probability * r.impact >= 15])
+    open_risks = len([r for r in risks if r.status == "open"])
+    return total_budget, total_spent, completed, overdue, high, open_risks
+
+def to_columns(tasks, budgets, risks):
+    """Shape the synthetic data as the loaders return it from the database."""
+    return (
+        {
+            "project_id": np.ones(len(tasks), dtype=np.int64),
+            "status": np.array([t.status for t in tasks], dtype="U"),
+            "deadline": np.array([t.deadline for t in tasks], dtype="datetime64[us]"),
+        },
+        {
+            "project_id": np.ones(len(budgets), dtype=np.int64),
+            "category": np.array(["CAPITAL"] * len(budgets), dtype="U"),
+            "planned": np.array([int(b.planned_amount * 100) for b in budgets], dtype=np.int64),
+            "actual": np.array([int(b.actual_amount * 100) for b in budgets], dtype=np.int64),
+        },
+        {
+            "project_id": np.ones(len(risks), dtype=np.int64),
+            "probability": np.array([r.probability for r in risks], dtype=np.int64),
+            "impact": np.array([r.impact for r in risks], dtype=np.int64),
+            "status": np.array([r.status for r in risks], dtype="U"),
+        },
+    )
+
+def best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=1_000_000)
+    parser.add_argument("--budgets", type=int, default=100_000)
+    parser.add_argument("--risks", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    now = datetime.datetime(2026, 1, 1)
+    tasks, budgets, risks = build(args.tasks, args.budgets, args.risks)
+    task_cols, budget_cols, risk_cols = to_columns(tasks, budgets, risks)
+    projects = {
+        "id": np.array([1], dtype=np.int64), "name": np.array(["bench"], dtype=object),
+        "status": np.array(["IN_PROGRESS"], dtype=object), "completion": np.array([0], dtype=np.int64),
+    }
+
+    py_time, py_result = best_of(lambda: python_dashboard(tasks, budgets, risks, now), args.repeat)
+    np_time, np_result = best_of(lambda: pa.dashboard_summary(projects, budget_cols, task_cols, risk_cols, now), args.repeat)
+
+    assert py_result[0] == np_result["budget"]["total_planned"]
+    assert py_result[1] == np_result["budget"]["total_spent"]
+    assert py_result[2] == np_result["tasks"]["completed"]
+    assert py_result[3] == np_result["tasks"]["overdue"]
+    assert py_result[4] == np_result["risks"]["high_risk"]
+
+    print(f"tasks={args.tasks:,} budgets={args.budgets:,} risks={args.risks:,}")
+    print(f"python objects : {py_time * 1000:9.1f} ms")
+    print(f"numpy columns  : {np_time * 1000:9.1f} ms")
+    print(f"speedup        : {py_time / np_time:9.1f}x")
+
+if __name__ == "__main__":
+    main()
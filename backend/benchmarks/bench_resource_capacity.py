@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-assignment Python loop vs. the vectorized capacity sweep.
+
+Builds R resources (default 10k) with A assignments each over a year and times
+the weekly load matrix the naive way (for every assignment, add its overlap to
+each week) against app.resource_capacity.capacity_matrix.
+
+    SECRET_KEY=bench python benchmarks/bench_resource_capacity.py --resources 10000 --weeks 52
+"""
+
+import argparse
+import datetime
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SECRET_KEY", "bench")
+from app import resource_capacity as rc  # noqa: E402
+
+def build(n_resources, per_resource, start, seed=7):
+    rnd = random.Random(seed)
+    assignments = []
+    for resource_id in range(1, n_resources + 1):
+        for _ in range(per_resource):
+            first = start + datetime.timedelta(days=rnd.randint(-60, 330))
+            last = first + datetime.timedelta(days=rnd.randint(7, 120))
+            assignments.append((resource_id, first, last, rnd.choice([25, 50, 75, 100]) * 100))
+    return assignments
+
+def python_matrix(n_resources, assignments, start, weeks):
+    """Weekly totals of allocation x overlapping days, one assignment and week at a time."""
+    totals = [[0] * weeks for _ in range(n_resources)]
+    for resource_id, first, last, allocation in assignments:
+        row = totals[resource_id - 1]
+        for week in range(weeks):
+            week_first = start + datetime.timedelta(weeks=week)
+            week_last = week_first + datetime.timedelta(days=6)
+            overlap = (min(last, week_last) - max(first, week_first)).days + 1
+            if overlap > 0:
+                row[week] += allocation * overlap
+    return totals
+
+def best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        begin = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - begin)
+    return min(timings), result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--resources", type=int, default=10_000)
+    parser.add_argument("--assignments", type=int, default=3, help="assignments per resource")
+    parser.add_argument("--weeks", type=int, default=52)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    start = datetime.date(2026, 1, 5)
+    assignments = build(args.resources, args.assignments, start)
+    resource_ids = np.arange(1, args.resources + 1, dtype=np.int64)
+    availability = np.full(args.resources, 10000, dtype=np.int64)
+    columns = (
+        np.array([a[0] for a in assignments], dtype=np.int64),
+        np.array([a[1] for a in assignments], dtype="datetime64[D]"),
+        np.array([a[2] for a in assignments], dtype="datetime64[D]"),
+        np.array([a[3] for a in assignments], dtype=np.int64),
+    )
+
+    py_time, py_result = best_of(lambda: python_matrix(args.resources, assignments, start, args.weeks), args.repeat)
+    np_time, (load, over) = best_of(
+        lambda: rc.capacity_matrix(resource_ids, availability, *columns, start, args.weeks), args.repeat
+    )
+    assert np.allclose(np.array(py_result) / 700.0, load)
+
+    print(f"resources={args.resources:,} assignments={len(assignments):,} weeks={args.weeks}")
+    print(f"python loop    : {py_time * 1000:9.1f} ms")
+    print(f"numpy sweep    : {np_time * 1000:9.1f} ms")
+    print(f"speedup        : {py_time / np_time:9.1f}x")
+    print(f"over-allocated : {int(over.any(axis=1).sum()):,} resources")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Benchmark: schema validation + jsonable_encoder + json vs. precompiled row encoders + orjson.
+
+Fills an in-memory SQLite database with N stores, budgets and tasks (default 50k
+each; tasks as roots with a few subtasks each) and times the list responses of
+/api/stores/, /api/budgets/ and /api/tasks/ both ways, from the select() to the
+response body. The old path validates every row into the response schema and
+encodes it with jsonable_encoder and json.dumps (what response_model does); for
+tasks it also ran one subtask query per task (given an index on tasks.parent_id
+here, which the schema lacks; without it the old path is quadratic). The new path is what the routers
+do now: Core rows through app.fast_json encoders into orjson.
+
+    SECRET_KEY=bench python benchmarks/bench_serialization.py --rows 50000
+"""
+
+import argparse
+import datetime
+import enum
+import json
+import os
+import random
+import sys
+import time
+from decimal import Decimal
+
+from sqlalchemy import create_engine, insert, select, text
+from sqlalchemy.orm import Session
+from fastapi.encoders import jsonable_encoder
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SECRET_KEY", "bench")
+from app import models, schemas, fast_json  # noqa: E402
+
+CHILDREN = 4
+
+def build(db, n, seed=7):
+    rnd = random.Random(seed)
+    base = datetime.datetime(2026, 1, 1)
+    db.execute(insert(models.User.__table__), [{"id": 1, "username": "bench", "password_hash": "x", "role": "admin"}])
+    db.execute(insert(models.Project.__table__), [{"id": 1, "name": "bench", "user_id": 1}])
+    db.execute(insert(models.Store.__table__), [
+        {"store_number": f"S{i:06d}", "name": f"Store {i}", "region": rnd.choice(["east", "west"]),
+         "district": f"D{i % 40}", "format": "supercenter", "is_active": True, "created_at": base}
+        for i in range(n)
+    ])
+    db.execute(insert(models.Budget.__table__), [
+        {"project_id": 1, "category": rnd.choice(list(models.BudgetCategory)),
+         "planned_amount": Decimal(rnd.randint(0, 10_000_000)).scaleb(-2),
+         "actual_amount": Decimal(rnd.randint(0, 10_000_000)).scaleb(-2),
+         "currency": "USD", "fiscal_year": "FY26", "created_at": base}
+        for _ in range(n)
+    ])
+    tasks = []
+    for i in range(1, n + 1):
+        root = (i - 1) % (CHILDREN + 1) == 0
+        tasks.append({
+            "id": i, "user_id": 1, "project_id": 1,
+            "parent_id": None if root else i - (i - 1) % (CHILDREN + 1),
+            "description": f"Task {i}", "priority": rnd.choice(list(models.Priority)),
+            "status": rnd.choice(list(models.TaskStatus)), "completion_percentage": rnd.randint(0, 100),
+            "estimated_hours": Decimal(rnd.randint(1, 4000)).scaleb(-1), "actual_hours": Decimal(0),
+            "deadline": base + datetime.timedelta(days=rnd.randint(-200, 200)),
+            "created_at": base, "updated_at": base
+        })
+    db.execute(insert(models.Task.__table__), tasks)
+    db.execute(text("CREATE INDEX ix_bench_tasks_parent_id ON tasks (parent_id)"))
+    db.commit()
+
+def _schema_values(mapping):
+    """Model enums as the schema enum values (the schemas use the lower-case member names)."""
+    return {k: v.name.lower() if isinstance(v, enum.Enum) else v for k, v in mapping.items()}
+
+def old_list(db, model, schema):
+    rows = db.execute(select(*fast_json.columns(model, fast_json.field_names(schema, model)))).all()
+    out = [schema(**_schema_values(row._mapping)) for row in rows]
+    return json.dumps(jsonable_encoder(out)).encode()
+
+def old_tasks(db):
+    names = fast_json.field_names(schemas.TaskOut, models.Task)
+    task = models.Task.__table__.c
+    order = (task.priority.asc(), task.deadline.asc())
+
+    def children(parent_id):
+        condition = task.parent_id.is_(None) if parent_id is None else task.parent_id == parent_id
+        return db.execute(
+            select(*fast_json.columns(models.Task, names)).where(task.user_id == 1, task.project_id == 1, condition).order_by(*order)
+        ).all()
+
+    def map_task(row):
+        mapped = schemas.TaskOut(**_schema_values(row._mapping))
+        mapped.subtasks = [map_task(child) for child in children(row.id)]
+        return mapped
+    return json.dumps(jsonable_encoder([map_task(row) for row in children(None)])).encode()
+
+def new_list(db, model, schema):
+    names = fast_json.field_names(schema, model)
+    return fast_json.rows_response(db.execute(select(*fast_json.columns(model, names))), fast_json.encoder(schema, names)).body
+
+def new_tasks(db):
+    # same steps as tasks_router.list_tasks and crud.task_tree_rows
+    names = fast_json.field_names(schemas.TaskOut, models.Task)
+    task = models.Task.__table__.c
+    encode = fast_json.encoder(schemas.TaskOut, names)
+    children = {}
+    for row in db.execute(
+        select(*fast_json.columns(models.Task, names), task.project_id, task.parent_id)
+        .where(task.user_id == 1, task.project_id == 1).order_by(task.priority.asc(), task.deadline.asc())
+    ):
+        children.setdefault(row[-1], []).append(row)
+
+    def map_task(row):
+        item = encode(row)
+        item["subtasks"] = [map_task(child) for child in children.get(row[0], [])]
+        return item
+    return fast_json.ORJSONResponse([map_task(row) for row in children.get(None, [])]).body
+
+def best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://")
+    models.Base.metadata.create_all(engine)
+    db = Session(engine)
+    build(db, args.rows)
+
+    cases = [
+        ("/api/stores/", lambda: old_list(db, models.Store, schemas.StoreOut), lambda: new_list(db, models.Store, schemas.StoreOut)),
+        ("/api/budgets/", lambda: old_list(db, models.Budget, schemas.BudgetOut), lambda: new_list(db, models.Budget, schemas.BudgetOut)),
+        ("/api/tasks/", lambda: old_tasks(db), lambda: new_tasks(db)),
+    ]
+    print(f"rows={args.rows:,} per endpoint")
+    for path, old, new in cases:
+        old_time, old_body = best_of(old, args.repeat)
+        new_time, new_body = best_of(new, args.repeat)
+        assert json.loads(old_body) == json.loads(new_body), path
+        print(f"{path:14} schema+json {old_time * 1000:9.1f} ms   encoder+orjson {new_time * 1000:9.1f} ms   "
+              f"speedup {old_time / new_time:6.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+from sqlalchemy import create_engine
+from sqlalchemy.pool import StaticPool
+from app import analytics_overview
+
+def test_server_timing_header():
+    assert analytics_overview.server_timing({"tasks": 12.345, "total": 20}) == "tasks;dur=12.3, total;dur=20.0"
+
+def test_in_memory_sqlite_loads_sequentially(tmp_path):
+    shared = create_engine("sqlite://", poolclass=StaticPool)
+    pooled = create_engine(f"sqlite:///{tmp_path / 'tracker.db'}")
+    assert analytics_overview._shares_connection(shared)
+    assert not analytics_overview._shares_connection(pooled)
+
+def test_overview_matches_the_separate_routes(tmp_path, monkeypatch):
+    import datetime
+    from decimal import Decimal
+    from types import SimpleNamespace
+    from fastapi.testclient import TestClient
+    from sqlalchemy import insert
+    from sqlalchemy.orm import sessionmaker
+    from app import auth, db, models
+    from app.main import app
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'tracker.db'}", connect_args={"check_same_thread": False})
+    models.Base.metadata.create_all(engine)
+    past = datetime.datetime.now() - datetime.timedelta(days=3)
+    with engine.begin() as conn:
+        conn.execute(insert(models.Project.__table__), [
+            {"id": 1, "name": "Remodel", "user_id": 1, "completion_percentage": 40},
+            {"id": 2, "name": "POS", "user_id": 1, "completion_percentage": 90},
+            {"id": 3, "name": "Someone else's", "user_id": 2, "completion_percentage": 0},
+        ])
+        conn.execute(insert(models.Budget.__table__), [
+            {"project_id": project_id, "category": models.BudgetCategory.CAPITAL,
+             "planned_amount": Decimal("1000.50"), "actual_amount": Decimal(actual)}
+            for project_id, actual in ((1, "400"), (2, "1200"), (3, "5"))
+        ])
+        conn.execute(insert(models.Task.__table__), [
+            {"title": f"t{i}", "description": "", "project_id": 1 + i % 2, "user_id": 1,
+             "status": list(models.TaskStatus)[i % len(models.TaskStatus)], "deadline": past,
+             "estimated_hours": i, "actual_hours": i / 2}
+            for i in range(12)
+        ])
+        conn.execute(insert(models.Risk.__table__), [
+            {"project_id": 1, "title": "Permits", "category": list(models.RiskCategory)[0],
+             "probability": 5, "impact": 4},
+        ])
+
+    sessions = sessionmaker(bind=engine)
+
+    def get_db():
+        session = sessions()
+        try:
+            yield session
+        finally:
+            session.close()
+    submitted = []
+    real_pool = analytics_overview._pool
+    monkeypatch.setattr(analytics_overview, "WORKERS", 4)
+    monkeypatch.setattr(analytics_overview, "_pool", lambda: submitted.append(1) or real_pool())
+    app.dependency_overrides[db.get_db] = get_db
+    try:
+        client = TestClient(app)
+        headers = {"Authorization": "Bearer " + auth.create_user_tokens(
+            SimpleNamespace(id=1, username="pm", role="user", store_number=None))["access_token"]}
+        overview = client.get("/api/analytics/overview", headers=headers)
+        dashboard = client.get("/api/analytics/dashboard", headers=headers)
+        performance = client.get("/api/analytics/project-performance", headers=headers)
+    finally:
+        app.dependency_overrides.pop(db.get_db)
+    assert overview.status_code == 200 and submitted  # sections loaded on the thread pool
+    assert "tasks;dur=" in overview.headers["Server-Timing"]
+    assert overview.json()["dashboard"] == dashboard.json()
+    assert overview.json()["project_performance"] == performance.json()
+    assert [row["project_id"] for row in performance.json()] == [1, 2]
@@ -17,4 +17,51 @@ async def test_register_and_login(monkeypatch):
         resp2 = await ac.post("/api/auth/token", data=form)
         assert resp2.status_code == 200
         token = resp2.json().get("access_token")
-        assert token
\ No newline at end of file
+        assert token
+
+def test_access_token_carries_authorization_claims():
+    from types import SimpleNamespace
+    from app import auth
+    user = SimpleNamespace(id=7, username="storeuser", role="manager", store_number="042")
+    tokens = auth.create_user_tokens(user)
+    token_user = auth.get_token_user(tokens["access_token"])
+    assert token_user.id == 7
+    assert token_user.username == "storeuser"
+    assert token_user.role == "manager"
+    assert token_user.store_number == "042"
+
+
+def test_refresh_token_rejected_as_access_token():
+    from fastapi import HTTPException
+    from app import auth
+    refresh = auth.create_refresh_token("storeuser")
+    with pytest.raises(HTTPException):
+        auth.get_token_user(refresh)
+
+
+def test_revoked_refresh_token_cannot_be_reused():
+    from fastapi import HTTPException
+    from app import auth
+    refresh = auth.create_refresh_token("storeuser")
+    auth.revoke_refresh_token(refresh)
+    with pytest.raises(HTTPException) as exc:
+        auth.refresh_tokens(None, refresh)
+    assert exc.value.status_code == 401
+
+def test_concurrent_refreshes_rotate_once():
+    import threading
+    from app import auth
+    refresh = auth.create_refresh_token("storeuser")
+    jti = auth.decode_token(refresh, expected_type="refresh")["jti"]
+    start = threading.Barrier(8)
+    wins = []
+
+    def race():
+        start.wait()
+        wins.append(auth.revocation_list.revoke(jti, 2 ** 40))
+    threads = [threading.Thread(target=race) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert wins.count(True) == 1
@@ -0,0 +1,82 @@
+import io
+import pytest
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session
+from app import bulk_import, models
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    for model in (models.Store, models.Resource, models.ResourceSkill):
+        model.__table__.create(engine)
+    with Session(engine) as session:
+        session.execute(insert(models.Store.__table__), [
+            {"id": 1, "store_number": "0001", "name": "Old Name", "region": "South", "format": "Supercenter"},
+        ])
+        session.execute(insert(models.Resource.__table__), [
+            {"id": 1, "name": "Ann", "email": "ann@example.com", "role": "IT Tech"},
+        ])
+        session.commit()
+        yield session
+
+def upload(text: str):
+    return io.BytesIO(text.encode("utf-8-sig"))
+
+def test_headers_and_cells_are_normalized():
+    columns, records = bulk_import.read_rows(upload("Store Number,Name, Region \n0002, B ,\n,,\n"), "s.csv")
+    assert columns == ["store_number", "name", "region"]
+    assert list(records) == [(2, {"store_number": "0002", "name": "B", "region": None})]
+
+def test_unusable_files_are_rejected():
+    with pytest.raises(bulk_import.ImportFileError):
+        bulk_import.read_rows(upload("name\nx\n"), "s.csv", required=("store_number", "name"))
+    with pytest.raises(bulk_import.ImportFileError):
+        bulk_import.read_rows(upload("name\nx\n"), "s.json")
+
+def test_parse_skills():
+    assert bulk_import.parse_skills("Python:3; SQL") == {"Python": 3, "SQL": None}
+    assert bulk_import.parse_skills('{"python": 4}') == {"python": 4}
+
+def test_store_upsert_keeps_ids_and_unlisted_columns(db):
+    csv_text = "store_number,name,region\n0001,New Name,East\n,Missing Number,\n0003,Dup,\n0003,Last,West\n0002,Second,\n"
+    report = bulk_import.import_file(db, "stores", upload(csv_text), "stores.csv", chunk_rows=2)
+    assert (report["rows"], report["created"], report["updated"], report["failed"]) == (5, 2, 1, 1)
+    assert report["errors"][0]["row"] == 3 and report["errors"][0]["errors"][0].startswith("store_number")
+    table = models.Store.__table__
+    stores = {row.store_number: row for row in db.execute(select(table))}
+    assert stores["0001"].id == 1 and stores["0001"].name == "New Name"
+    assert stores["0001"].format == "Supercenter"  # not in the file, left alone
+    assert stores["0003"].name == "Last" and stores["0003"].is_active
+
+def test_dry_run_writes_nothing(db):
+    report = bulk_import.import_file(db, "stores", upload("store_number,name\n0001,X\n0009,Y\n"), "s.csv", dry_run=True)
+    assert (report["created"], report["updated"]) == (1, 1)
+    assert db.execute(select(models.Store.__table__.c.name).where(models.Store.__table__.c.id == 1)).scalar() == "Old Name"
+
+def test_resources_match_on_email_and_index_skills(db):
+    csv_text = (
+        "name,email,hourly_rate,skills\n"
+        "Ann B,ann@example.com,55.5,Python:3\n"
+        "Bob,,not a number,SQL\n"
+        "Cy,,,\"{\"\"sql\"\": 2}\"\n"
+    )
+    report = bulk_import.import_file(db, "resources", upload(csv_text), "r.csv")
+    assert (report["created"], report["updated"], report["failed"]) == (1, 1, 1)
+    assert report["errors"][0]["row"] == 3
+    resources = models.Resource.__table__
+    ann = db.execute(select(resources).where(resources.c.id == 1)).first()
+    assert ann.name == "Ann B" and ann.role == "IT Tech" and ann.skills == {"Python": 3}
+    skills = db.execute(select(models.ResourceSkill.__table__).order_by("resource_id")).all()
+    assert [(row.resource_id, row.skill, row.level) for row in skills] == [(1, "python", 3), (2, "sql", 2)]
+
+def test_xlsx_upload(db):
+    openpyxl = pytest.importorskip("openpyxl")
+    workbook = openpyxl.Workbook()
+    workbook.active.append(["Store Number", "Name"])
+    workbook.active.append([4, "Numeric Number"])
+    data = io.BytesIO()
+    workbook.save(data)
+    data.seek(0)
+    report = bulk_import.import_file(db, "stores", data, "stores.xlsx")
+    assert report["created"] == 1
+    assert db.execute(select(models.Store.__table__.c.name).where(models.Store.__table__.c.store_number == "4")).scalar()
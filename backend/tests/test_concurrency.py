@@ -0,0 +1,75 @@
+from types import SimpleNamespace
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+from app import concurrency, crud, models, schemas
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'tracker.db'}", connect_args={"check_same_thread": False})
+    models.Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        db.add(models.Project(id=1, name="Remodel", user_id=1))
+        db.commit()
+    return engine
+
+def test_if_match_forms():
+    assert concurrency.parse_if_match(None) is None
+    assert concurrency.parse_if_match("*") is None
+    assert concurrency.parse_if_match('"3"') == 3
+    assert concurrency.parse_if_match('W/"12"') == 12
+    assert concurrency.parse_if_match("7") == 7
+    with pytest.raises(ValueError):
+        concurrency.parse_if_match('"abc"')
+
+def test_conflict_rate():
+    stats = concurrency.ConflictStats()
+    for conflict in (False, True, False, False):
+        stats.record("tasks", conflict)
+    stats.add_conflict("tasks")
+    assert stats.snapshot() == {"tasks": {"updates": 4, "conflicts": 2, "conflict_rate": 0.5}}
+
+def test_stale_if_match_is_a_conflict(engine):
+    with Session(engine) as db:
+        project = crud.update_project(db, 1, 1, schemas.ProjectUpdate(name="v2"), expected_version=1)
+        assert project.version == 2
+        with pytest.raises(concurrency.VersionConflict) as exc:
+            crud.update_project(db, 1, 1, schemas.ProjectUpdate(name="v3"), expected_version=1)
+        assert exc.value.current_version == 2
+
+def test_concurrent_write_found_at_flush(engine):
+    with Session(engine) as first, Session(engine) as second:
+        mine = first.get(models.Project, 1)
+        theirs = second.get(models.Project, 1)
+        theirs.name = "theirs"
+        second.commit()
+        mine.name = "mine"  # still at version 1
+        with pytest.raises(concurrency.VersionConflict) as exc:
+            crud._flush_versioned(first, "projects", models.Project, 1)
+        assert exc.value.current_version == 2
+    with Session(engine) as db:
+        assert db.get(models.Project, 1).name == "theirs"
+
+def test_patch_with_if_match(engine):
+    from fastapi.testclient import TestClient
+    from app import auth, db
+    from app.main import app
+    sessions = sessionmaker(bind=engine)
+
+    def get_db():
+        session = sessions()
+        try:
+            yield session
+        finally:
+            session.close()
+    app.dependency_overrides[db.get_db] = get_db
+    try:
+        client = TestClient(app)
+        headers = {"Authorization": "Bearer " + auth.create_user_tokens(
+            SimpleNamespace(id=1, username="pm", role="user", store_number=None))["access_token"]}
+        ok = client.patch("/api/projects/1", json={"name": "v2"}, headers={**headers, "If-Match": '"1"'})
+        stale = client.patch("/api/projects/1", json={"name": "v3"}, headers={**headers, "If-Match": '"1"'})
+    finally:
+        app.dependency_overrides.pop(db.get_db)
+    assert ok.status_code == 200 and ok.headers["ETag"] == '"2"' and ok.json()["name"] == "v2"
+    assert stale.status_code == 409 and stale.json()["detail"]["current_version"] == 2
@@ -0,0 +1,45 @@
+import datetime
+from types import SimpleNamespace
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from app import delta_sync, models
+
+def test_tokens_are_strictly_increasing():
+    now = datetime.datetime(2026, 10, 19, 12, 0)
+    first = delta_sync.issue_token(now)
+    second = delta_sync.issue_token(now - datetime.timedelta(seconds=5))  # clock stepped back
+    assert int(second) > int(first)
+    assert delta_sync.decode_token(first) >= now
+
+def test_malformed_tokens_are_rejected():
+    for token in ("abc", "-5", "1.5", "99999999999999999999"):
+        with pytest.raises(ValueError):
+            delta_sync.decode_token(token)
+
+def test_sync_rows_carry_project_and_timestamp():
+    from app import models, schemas
+    assert delta_sync.sync_fields(models.Task, schemas.TaskOut)[-1] == "project_id"
+    assert delta_sync.sync_fields(models.Budget, schemas.BudgetOut)[-1] == "updated_at"
+
+def test_changes_return_updated_rows_and_tombstones():
+    engine = create_engine("sqlite://")
+    models.Base.metadata.create_all(engine)
+    admin = SimpleNamespace(id=1, role="admin", store_number=None)
+    long_ago = datetime.datetime.utcnow() - datetime.timedelta(days=1)
+    with Session(engine) as db:
+        db.add_all([
+            models.Project(id=project_id, name=f"p{project_id}", user_id=1, created_at=long_ago, updated_at=long_ago)
+            for project_id in (1, 2, 3)
+        ])
+        db.commit()
+        full = delta_sync.changes(db, admin)
+        assert full["full"] and [row["id"] for row in full["projects"]] == [1, 2, 3]
+
+        db.get(models.Project, 1).name = "renamed"
+        db.delete(db.get(models.Project, 2))
+        db.commit()
+        delta = delta_sync.changes(db, admin, since=full["token"])
+    assert not delta["full"] and int(delta["token"]) > int(full["token"])
+    assert [(row["id"], row["name"]) for row in delta["projects"]] == [(1, "renamed")]
+    assert delta["deleted"] == {"projects": [2], "tasks": [], "budgets": [], "risks": []}
@@ -0,0 +1,94 @@
+import time
+import datetime
+import numpy as np
+from decimal import Decimal
+from sqlalchemy import create_engine, select, insert, func
+from sqlalchemy.orm import Session, sessionmaker
+from app import models
+from app.earned_value import compute, indices, planned_fraction, trend, start_snapshotter, _store
+
+AS_OF = datetime.date(2026, 3, 10)
+
+def _dates(values):
+    return np.array(values, dtype="datetime64[D]")
+
+def _ints(values):
+    return np.array(values, dtype=np.int64)
+
+def test_planned_fraction_is_linear_and_nan_without_dates():
+    fraction = planned_fraction(
+        _dates(["2026-03-01", "2026-03-11", "2026-01-01", None]),
+        _dates(["2026-03-20", "2026-03-20", "2026-02-01", "2026-04-01"]),
+        AS_OF
+    )
+    assert fraction[:3].tolist() == [0.5, 0.0, 1.0]
+    assert np.isnan(fraction[3])
+
+def test_compute_prefers_budgets_and_task_hours():
+    projects = {
+        "id": _ints([1, 2, 3]),
+        "start": _dates([None, "2026-03-01", None]),
+        "end": _dates([None, "2026-03-20", None]),
+        "budget_total": _ints([0, 100000, 5000]),
+        "actual_cost": _ints([0, 40000, 0]),
+        "completion": _ints([0, 30, 0]),
+    }
+    budgets = {"project_id": _ints([1]), "planned": _ints([1000000]), "actual": _ints([0])}
+    tasks = {
+        "project_id": _ints([1]), "hours": _ints([4000]), "earned": _ints([250000]),
+        "scheduled": _ints([4000]), "due": _ints([1000]), "labor": _ints([110000]),
+    }
+    bac, pv, ev, ac = compute(projects, budgets, tasks, AS_OF)
+    assert bac.tolist() == [1000000, 100000, 5000]
+    assert ev.tolist() == [625000, 30000, 0]
+    assert ac.tolist() == [110000, 40000, 0]
+    assert pv[:2].tolist() == [250000, 50000]
+    assert np.isnan(pv[2])
+
+def test_indices_without_cost_or_baseline():
+    measures = indices(100000, None, 25000, 0)
+    assert measures["pv"] is None and measures["spi"] is None and measures["cpi"] is None
+    assert measures["eac"] == Decimal("750.00")
+    measures = indices(100000, 50000, 30000, 40000)
+    assert (measures["cpi"], measures["spi"]) == (0.75, 0.6)
+    assert measures["eac"] == Decimal("1333.33")
+
+def test_snapshots_already_written_are_skipped():
+    engine = create_engine("sqlite://")
+    models.EvmSnapshot.__table__.create(engine)
+    cents = _ints([10000, 20000])
+    pv = np.array([5000.0, np.nan])
+    with Session(engine) as db:
+        assert _store(db, AS_OF, _ints([2]), cents[1:], pv[1:], cents[1:], cents[1:]) == 1
+        # a second run of the day (or a concurrent one) only adds the missing project
+        assert _store(db, AS_OF, _ints([1, 2]), cents, pv, cents, cents) == 1
+        assert db.execute(select(func.count()).select_from(models.EvmSnapshot.__table__)).scalar() == 2
+
+def test_portfolio_spi_only_counts_projects_with_a_baseline():
+    engine = create_engine("sqlite://")
+    models.EvmSnapshot.__table__.create(engine)
+    # project 1 is on plan; project 2 has no dates, so its EV must not inflate SPI
+    bac = _ints([10000, 10000])
+    with Session(engine) as db:
+        _store(db, AS_OF, _ints([1, 2]), bac, np.array([5000.0, np.nan]), _ints([5000, 8000]), _ints([0, 0]))
+        [point] = trend(db)
+    assert (point["pv"], point["ev"]) == (Decimal("50.00"), Decimal("130.00"))
+    assert (point["spi"], point["sv"]) == (1.0, Decimal("0.00"))
+
+def test_snapshotter_records_the_day_without_a_request(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'evm.db'}", connect_args={"check_same_thread": False})
+    for model in (models.Project, models.Budget, models.Resource, models.Task, models.EvmSnapshot):
+        model.__table__.create(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(models.Project.__table__), [{"id": 1, "name": "P", "budget_total": Decimal("100")}])
+    stop = start_snapshotter(sessionmaker(bind=engine), interval=3600)
+    try:
+        with Session(engine) as db:
+            for _ in range(100):
+                days = db.execute(select(models.EvmSnapshot.snapshot_date)).scalars().all()
+                if days:
+                    break
+                time.sleep(0.05)
+    finally:
+        stop.set()
+    assert days == [datetime.date.today()]
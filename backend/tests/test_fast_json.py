@@ -0,0 +1,37 @@
+import datetime
+import json
+from decimal import Decimal
+from fastapi import HTTPException
+from app import models, schemas, fast_json
+
+def test_encoder_matches_schema_output():
+    names = fast_json.field_names(schemas.BudgetOut, models.Budget)
+    row = (7, 3, models.BudgetCategory.CAPITAL, Decimal("12.50"), Decimal("0.00"), "USD", None, None,
+           datetime.datetime(2026, 1, 1, 10, 30), 4)
+    encoded = fast_json.encoder(schemas.BudgetOut, names)(row)
+    expected = schemas.BudgetOut(**{**dict(zip(names, row)), "category": "capital"})
+    assert json.loads(fast_json.dumps(encoded)) == json.loads(expected.json())
+
+def test_model_enums_map_by_member_name():
+    encode = fast_json.encoder(schemas.TaskOut, ["id", "priority", "status", "estimated_hours"])
+    assert encode((1, models.Priority.MEDIUM, models.TaskStatus.IN_PROGRESS, None, "trailing")) == {
+        "id": 1, "priority": "medium", "status": "in_progress", "estimated_hours": None
+    }
+
+def test_fieldset_projects_columns_and_relations():
+    fieldset = fast_json.fieldset(schemas.TaskOut, models.Task, relations=("subtasks",))
+    assert fieldset(fields="status,id") == (["id", "status"], set())
+    assert fieldset(fields="id,subtasks") == (["id"], {"subtasks"})
+    names, include = fieldset()
+    assert "description" in names and include == {"subtasks"}
+    try:
+        fieldset(fields="id,password")
+        assert False, "unknown field accepted"
+    except HTTPException as exc:
+        assert exc.status_code == 400
+    assert fieldset(fields="subtasks") == ([], {"subtasks"})  # the tree route adds its key columns
+    try:
+        fieldset(fields=" , ")
+        assert False, "empty projection accepted"
+    except HTTPException as exc:
+        assert exc.status_code == 400
@@ -0,0 +1,41 @@
+import datetime
+import numpy as np
+from app.forecasting import throughput, work_units, simulate, percentile_weeks
+
+AS_OF = datetime.date(2026, 3, 11)  # a Wednesday; full weeks end on Monday 2026-03-09
+
+def _rows(rows):
+    project_id, kind, day, tasks, estimated, hours = zip(*rows)
+    return {
+        "project_id": np.array(project_id, dtype=np.int64), "kind": np.array(kind, dtype=np.int64),
+        "day": np.array(day, dtype="datetime64[D]"), "tasks": np.array(tasks, dtype=np.int64),
+        "estimated": np.array(estimated, dtype=np.int64), "hours": np.array(hours, dtype=np.int64),
+    }
+
+def test_history_starts_with_the_project_and_unestimated_tasks_use_the_average():
+    rows = _rows([
+        (1, 0, "2026-02-16", 4, 2, 2000),  # two tasks of 10h, two unestimated
+        (1, 1, "2026-02-18", 1, 1, 1000),
+        (1, 1, "2026-03-03", 2, 0, 0),
+        (1, 1, "2026-03-10", 1, 1, 1000),  # current week: not in the history
+    ])
+    work = work_units(rows)
+    assert work.tolist() == [4000, 1000, 2000, 1000]
+    projects, remaining, matrix, history = throughput(rows, work, AS_OF, weeks=4)
+    assert projects.tolist() == [1]
+    assert remaining.tolist() == [0]
+    assert history.tolist() == [3]
+    assert matrix.tolist() == [[0, 1000, 0, 2000]]
+
+def test_simulation_with_steady_and_missing_throughput():
+    matrix = np.array([[0, 10, 10, 10], [0, 0, 0, 0], [5, 5, 5, 5]], dtype=np.float64)
+    needed = simulate(np.array([35, 10, 0]), matrix, np.array([3, 4, 4]), trials=50)
+    weeks = percentile_weeks(needed)
+    assert weeks[50].tolist() == [4, np.inf, 0]
+    assert weeks[85].tolist() == [4, np.inf, 0]
+
+def test_percentiles_follow_variable_throughput():
+    matrix = np.array([[0, 20, 0, 20]], dtype=np.float64)
+    needed = simulate(np.array([100]), matrix, np.array([4]), trials=2000)
+    weeks = percentile_weeks(needed)
+    assert 8 <= weeks[50][0] <= 12 <= weeks[85][0] <= 16
@@ -0,0 +1,69 @@
+import datetime
+from types import SimpleNamespace
+import pytest
+from fastapi import Response
+from sqlalchemy import create_engine, insert, select, func
+from sqlalchemy.orm import Session
+from app import idempotency, models, schemas
+
+NOW = datetime.datetime(2026, 10, 19, 12, 0)
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    models.IdempotencyKey.__table__.create(engine)
+    models.Store.__table__.create(engine)
+    with Session(engine) as session:
+        yield session
+
+def test_request_hash_ignores_session_and_user():
+    first = idempotency.request_hash("create", {"name": "a", "db": object(), "current_user": object()})
+    assert first == idempotency.request_hash("create", {"name": "a"})
+    assert first != idempotency.request_hash("create", {"name": "b"})
+    assert first != idempotency.request_hash("other", {"name": "a"})
+
+def test_stored_response_is_replayed(db):
+    assert idempotency.claim(db, 1, "k", "h", NOW) is None
+    with pytest.raises(idempotency.KeyInProgress):
+        idempotency.claim(db, 1, "k", "h", NOW)
+    idempotency.complete(db, 1, "k", 200, b'{"id":7}', NOW)
+    stored = idempotency.claim(db, 1, "k", "h", NOW + datetime.timedelta(hours=1))
+    response = idempotency.replay(stored)
+    assert response.body == b'{"id":7}' and response.headers["Idempotent-Replayed"] == "true"
+    with pytest.raises(idempotency.KeyReused):
+        idempotency.claim(db, 1, "k", "other", NOW)
+    assert idempotency.claim(db, 2, "k", "h", NOW) is None  # keys belong to a user
+
+def test_released_and_expired_keys_run_again(db):
+    idempotency.claim(db, 1, "failed", "h", NOW)
+    idempotency.release(db, 1, "failed")
+    assert idempotency.claim(db, 1, "failed", "h", NOW) is None
+    abandoned = NOW + datetime.timedelta(seconds=idempotency.LOCK_SECONDS + 1)
+    assert idempotency.claim(db, 1, "failed", "h", abandoned) is None
+
+def test_purge_removes_expired_rows(db):
+    idempotency.claim(db, 1, "done", "h", NOW)
+    idempotency.complete(db, 1, "done", 200, b"{}", NOW)
+    idempotency.claim(db, 1, "stuck", "h", NOW)
+    assert idempotency.purge(db, NOW + datetime.timedelta(minutes=5)) == 1
+    assert idempotency.purge(db, NOW + datetime.timedelta(hours=idempotency.TTL_HOURS)) == 1
+
+def test_created_rows_commit_with_the_stored_response(db):
+    user = SimpleNamespace(id=1)
+    stores = models.Store.__table__
+
+    @idempotency.idempotent(schemas.StoreOut)
+    def create(number: str, crash: bool, current_user, db):
+        db.execute(insert(stores).values(store_number=number, name="s"))
+        db.commit()  # as the crud helpers do
+        if crash:
+            raise RuntimeError("worker died before the response was stored")
+        return Response(content=b'{"ok":true}', media_type="application/json")
+
+    with pytest.raises(RuntimeError):
+        create(idempotency_key="k", number="0001", crash=True, current_user=user, db=db)
+    assert db.execute(select(func.count()).select_from(stores)).scalar() == 0
+    create(idempotency_key="k", number="0001", crash=False, current_user=user, db=db)
+    replayed = create(idempotency_key="k", number="0001", crash=False, current_user=user, db=db)
+    assert replayed.headers["Idempotent-Replayed"] == "true"
+    assert db.execute(select(func.count()).select_from(stores)).scalar() == 1
@@ -0,0 +1,87 @@
+import datetime
+import threading
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app import jobs, models
+
+NOW = datetime.datetime(2026, 10, 19, 12, 0)
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'jobs.db'}", connect_args={"check_same_thread": False})
+    models.Job.__table__.create(engine)
+    return sessionmaker(bind=engine)
+
+@pytest.fixture
+def calls(monkeypatch):
+    seen = []
+
+    def record(db, payload):
+        seen.append(payload["n"])
+        return {"n": payload["n"]}
+
+    def flaky(db, payload):
+        raise RuntimeError("boom")
+    monkeypatch.setitem(jobs.HANDLERS, "test.record", record)
+    monkeypatch.setitem(jobs.HANDLERS, "test.flaky", flaky)
+    return seen
+
+def test_higher_priority_runs_first(session_factory, calls):
+    db = session_factory()
+    jobs.enqueue(db, "test.record", {"n": 1}, run_after=NOW)
+    jobs.enqueue(db, "test.record", {"n": 2}, priority=5, run_after=NOW)
+    jobs.enqueue(db, "test.record", {"n": 3}, run_after=NOW + datetime.timedelta(hours=1))
+    while jobs.run_one(db, "w", NOW) is not None:
+        pass
+    assert calls == [2, 1]
+    assert jobs.get_job(db, 1).result == {"n": 1}
+
+def test_failures_back_off_then_fail(session_factory, calls):
+    db = session_factory()
+    job_id = jobs.enqueue(db, "test.flaky", max_attempts=2, run_after=NOW)
+    jobs.run_one(db, "w", NOW)
+    job = jobs.get_job(db, job_id)
+    assert job.status == jobs.QUEUED and job.run_after == NOW + jobs.backoff(1)
+    assert jobs.run_one(db, "w", NOW) is None  # not due yet
+    jobs.run_one(db, "w", job.run_after)
+    job = jobs.get_job(db, job_id)
+    assert (job.status, job.attempts, job.error) == (jobs.FAILED, 2, "RuntimeError: boom")
+
+def test_stale_running_jobs_are_requeued(session_factory, calls):
+    db = session_factory()
+    job_id = jobs.enqueue(db, "test.record", {"n": 1}, run_after=NOW)
+    jobs.claim(db, "crashed", NOW)
+    assert jobs.requeue_stale(db, NOW) == 0
+    assert jobs.requeue_stale(db, NOW + datetime.timedelta(seconds=jobs.LEASE_SECONDS + 1)) == 1
+    assert jobs.get_job(db, job_id).status == jobs.QUEUED
+
+def test_worker_past_its_lease_does_not_overwrite_the_next_run(session_factory, calls):
+    db = session_factory()
+    job_id = jobs.enqueue(db, "test.record", {"n": 1}, run_after=NOW)
+    slow = jobs.claim(db, "slow", NOW)
+    later = NOW + datetime.timedelta(seconds=jobs.LEASE_SECONDS + 1)
+    jobs.requeue_stale(db, later)
+    current = jobs.claim(db, "fast", later)
+    assert not jobs.finish(db, slow, result={"n": "stale"}, now=later)
+    job = jobs.get_job(db, job_id)
+    assert (job.status, job.locked_by) == (jobs.RUNNING, "fast")
+    assert jobs.finish(db, current, result={"n": 1}, now=later)
+    assert jobs.get_job(db, job_id).result == {"n": 1}
+
+def test_concurrent_workers_claim_each_job_once(session_factory, calls):
+    db = session_factory()
+    for n in range(40):
+        jobs.enqueue(db, "test.record", {"n": n}, run_after=NOW)
+
+    def drain(index):
+        session = session_factory()
+        while jobs.run_one(session, f"w{index}", NOW) is not None:
+            pass
+        session.close()
+    threads = [threading.Thread(target=drain, args=(index,)) for index in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(calls) == list(range(40))
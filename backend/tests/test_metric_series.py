@@ -0,0 +1,52 @@
+import datetime
+from decimal import Decimal
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+from app import models
+from app.metric_series import bucket_start, rollup_deltas, combine, apply_rollups
+
+def test_bucket_start():
+    day = datetime.date(2026, 3, 12)  # a Thursday
+    assert bucket_start(day, "day") == day
+    assert bucket_start(day, "week") == datetime.date(2026, 3, 9)
+    assert bucket_start(day, "month") == datetime.date(2026, 3, 1)
+
+def test_rollups_merge_across_batches_like_one_batch():
+    points = [
+        {"project_id": 1, "metric_name": "Sales_Impact", "measurement_date": datetime.date(2026, 3, d),
+         "actual_value": Decimal(d), "target_value": None if d % 2 else Decimal(5)}
+        for d in range(2, 12)
+    ]
+    points.append({"project_id": 1, "metric_name": "Sales_Impact", "measurement_date": None, "actual_value": Decimal(1)})
+    whole = rollup_deltas(points)
+    first, second = rollup_deltas(points[:4]), rollup_deltas(points[4:])
+    merged = dict(second)
+    for key, value in first.items():
+        merged[key] = combine(value, second[key]) if key in second else value
+    assert merged == whole
+
+    week = whole[("week", 1, "Sales_Impact", datetime.date(2026, 3, 2))]
+    assert (week["count"], week["actual_sum"], week["actual_min"], week["actual_max"]) == (7, Decimal(35), 2, 8)
+    assert (week["target_count"], week["target_sum"]) == (4, Decimal(20))
+    assert whole[("month", 1, "Sales_Impact", datetime.date(2026, 3, 1))]["count"] == 10
+
+def test_upserted_rollups_add_up_across_sessions(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'rollups.db'}")
+    models.MetricRollup.__table__.create(engine)
+    points = [
+        {"project_id": 1, "metric_name": "m", "measurement_date": datetime.date(2026, 3, d),
+         "actual_value": Decimal(d), "target_value": Decimal(9) if d == 4 else None}
+        for d in (2, 3, 4, 5)
+    ]
+    for batch in (points[:2], points[2:]):
+        with Session(engine) as db:
+            apply_rollups(db, batch)
+            db.commit()
+    names = list(rollup_deltas(points)[("month", 1, "m", datetime.date(2026, 3, 1))])
+    table = models.MetricRollup.__table__
+    with Session(engine) as db:
+        stored = {
+            (row.bucket, row.project_id, row.metric_name, row.bucket_start): {name: row._mapping[name] for name in names}
+            for row in db.execute(select(table))
+        }
+    assert stored == rollup_deltas(points)
@@ -0,0 +1,63 @@
+import datetime
+import pytest
+from sqlalchemy import create_engine, insert, select, func
+from sqlalchemy.orm import Session
+from app import models
+from app.overdue import encode_cursor, decode_cursor, OPEN_STATUSES, sweep, count_for_user, STALE_AFTER
+
+NOW = datetime.datetime(2026, 3, 10, 12, 0)
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    for model in (models.Task, models.OverdueSummary):
+        model.__table__.create(engine)
+    past, future = NOW - datetime.timedelta(days=2), NOW + datetime.timedelta(days=2)
+    with Session(engine) as session:
+        session.execute(insert(models.Task.__table__), [
+            {"id": task_id, "title": f"t{task_id}", "description": "", "project_id": project_id, "user_id": user_id,
+             "status": status, "deadline": deadline}
+            for task_id, project_id, user_id, status, deadline in (
+                (1, 1, 1, models.TaskStatus.IN_PROGRESS, past),
+                (2, 1, 1, models.TaskStatus.BACKLOG, past),
+                (3, 2, 1, models.TaskStatus.IN_PROGRESS, past),
+                (4, 1, 1, models.TaskStatus.COMPLETE, past),
+                (5, 1, 1, models.TaskStatus.IN_PROGRESS, future),
+                (6, 1, 2, models.TaskStatus.IN_PROGRESS, past),
+            )
+        ])
+        session.commit()
+        yield session
+
+def test_cursor_round_trip():
+    deadline = datetime.datetime(2026, 3, 9, 17, 30, 0, 250000)
+    assert decode_cursor(encode_cursor(deadline, 42)) == (deadline, 42)
+
+def test_malformed_cursor_is_rejected():
+    with pytest.raises(ValueError):
+        decode_cursor("yesterday_7")
+
+def test_only_complete_tasks_are_never_overdue():
+    assert models.TaskStatus.COMPLETE not in OPEN_STATUSES
+    assert len(OPEN_STATUSES) == len(models.TaskStatus) - 1
+
+def test_sweep_replaces_the_summary(db):
+    assert sweep(db, NOW) == 4
+    assert sweep(db, NOW) == 4  # repeated sweeps do not pile up rows
+    rows = db.execute(
+        select(models.OverdueSummary.project_id, models.OverdueSummary.user_id, models.OverdueSummary.overdue_count)
+        .order_by(models.OverdueSummary.project_id, models.OverdueSummary.user_id)
+    ).all()
+    assert [tuple(row) for row in rows] == [(None, None, 4), (1, 1, 2), (1, 2, 1), (2, 1, 1)]
+
+def test_count_for_user_reads_fresh_summary_else_live(db):
+    projects = select(models.Task.project_id).where(models.Task.project_id == 1)
+    assert count_for_user(db, 1, projects, NOW) == 2  # live, nothing swept yet
+    sweep(db, NOW)
+    db.execute(insert(models.Task.__table__).values(
+        id=7, title="t7", description="", project_id=1, user_id=1, status=models.TaskStatus.BACKLOG,
+        deadline=NOW - datetime.timedelta(days=1)
+    ))
+    db.commit()
+    assert count_for_user(db, 1, projects, NOW) == 2  # summary, until the next sweep
+    assert count_for_user(db, 1, projects, NOW + STALE_AFTER + datetime.timedelta(seconds=1)) == 3
@@ -0,0 +1,76 @@
+from decimal import Decimal
+from types import SimpleNamespace
+import pytest
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session
+from app import models, policy
+
+# user 1 owns project 1 and works at store 0001; project 2 (user 2) is rolled out to
+# store 0002 only, project 3 (user 2) to store 0001
+MEMBER = SimpleNamespace(id=1, role="user", store_number="0001")
+STORELESS = SimpleNamespace(id=1, role="user", store_number=None)
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    for model in (models.Project, models.Store, models.ProjectStore, models.Budget, models.Risk,
+                  models.Resource, models.ProjectResource):
+        model.__table__.create(engine)
+    with Session(engine) as session:
+        session.execute(insert(models.Project.__table__), [
+            {"id": 1, "name": "Mine", "user_id": 1}, {"id": 2, "name": "Other", "user_id": 2},
+            {"id": 3, "name": "At my store", "user_id": 2},
+        ])
+        session.execute(insert(models.Store.__table__), [
+            {"id": 1, "store_number": "0001", "name": "Home"}, {"id": 2, "store_number": "0002", "name": "Away"},
+            {"id": 3, "store_number": "0003", "name": "Mine elsewhere"},
+        ])
+        session.execute(insert(models.ProjectStore.__table__), [
+            {"project_id": 2, "store_id": 2}, {"project_id": 3, "store_id": 1}, {"project_id": 1, "store_id": 3},
+        ])
+        session.execute(insert(models.Budget.__table__), [
+            {"id": project_id, "project_id": project_id, "category": models.BudgetCategory.CAPITAL,
+             "planned_amount": Decimal("1"), "version": 1}
+            for project_id in (1, 2, 3)
+        ])
+        session.execute(insert(models.Risk.__table__), [
+            {"id": risk_id, "project_id": project_id, "title": f"r{risk_id}", "owner_id": owner_id,
+             "category": list(models.RiskCategory)[0], "version": 1}
+            for risk_id, project_id, owner_id in ((1, 1, None), (2, 2, 2), (3, 2, 1))
+        ])
+        session.execute(insert(models.Resource.__table__), [
+            {"id": 1, "name": "At home", "store_number": "0001"}, {"id": 2, "name": "Away", "store_number": "0002"},
+            {"id": 3, "name": "On my project", "store_number": "0002"},
+        ])
+        session.execute(insert(models.ProjectResource.__table__), [{"project_id": 1, "resource_id": 3}])
+        session.commit()
+        yield session
+
+def visible(db, model, clause):
+    return sorted(db.execute(select(model.id).where(clause)).scalars())
+
+def test_member_sees_own_and_store_projects(db):
+    assert visible(db, models.Project, policy.project_scope(MEMBER)) == [1, 3]
+    assert sorted(db.execute(policy.visible_project_ids(MEMBER)).scalars()) == [1, 3]
+    assert visible(db, models.Project, policy.project_scope(STORELESS)) == [1]
+
+def test_member_budgets_and_risks_follow_projects(db):
+    assert visible(db, models.Budget, policy.budget_scope(MEMBER)) == [1, 3]
+    assert visible(db, models.Budget, policy.budget_scope(STORELESS)) == [1]
+    # risk 3 is on a hidden project but owned by the member
+    assert visible(db, models.Risk, policy.risk_scope(MEMBER)) == [1, 3]
+
+def test_member_sees_own_store_and_its_resources(db):
+    assert visible(db, models.Store, policy.store_scope(MEMBER)) == [1, 3]
+    assert visible(db, models.Store, policy.store_scope(STORELESS)) == [3]
+    assert visible(db, models.Resource, policy.resource_scope(MEMBER)) == [1, 3]
+    assert visible(db, models.Resource, policy.resource_scope(STORELESS)) == [3]
+
+@pytest.mark.parametrize("role", ["admin", "manager"])
+def test_admin_and_manager_see_everything(db, role):
+    user = SimpleNamespace(id=99, role=role, store_number=None)
+    assert visible(db, models.Project, policy.project_scope(user)) == [1, 2, 3]
+    assert visible(db, models.Budget, policy.budget_scope(user)) == [1, 2, 3]
+    assert visible(db, models.Risk, policy.risk_scope(user)) == [1, 2, 3]
+    assert visible(db, models.Store, policy.store_scope(user)) == [1, 2, 3]
+    assert visible(db, models.Resource, policy.resource_scope(user)) == [1, 2, 3]
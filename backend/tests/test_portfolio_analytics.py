@@ -0,0 +1,70 @@
+import datetime
+from decimal import Decimal
+import numpy as np
+from app import portfolio_analytics as pa
+
+NOW = datetime.datetime(2026, 6, 1, 12, 0)
+
+def _projects():
+    return {
+        "id": np.array([1, 2], dtype=np.int64),
+        "name": np.array(["Remodel", "POS"], dtype=object),
+        "status": np.array(["IN_PROGRESS", "COMPLETE"], dtype=object),
+        "completion": np.array([40, 100], dtype=np.int64),
+    }
+
+def _budgets():
+    return {
+        "project_id": np.array([1, 1, 2], dtype=np.int64),
+        "category": np.array(["CAPITAL", "TRAINING", "CAPITAL"], dtype=object),
+        "planned": np.array([1000010, 50, 20000], dtype=np.int64),
+        "actual": np.array([500005, 0, 25000], dtype=np.int64),
+    }
+
+def _tasks():
+    return {
+        "project_id": np.array([1, 1, 1, 2], dtype=np.int64),
+        "status": np.array(["COMPLETE", "IN_PROGRESS", "BACKLOG", "COMPLETE"], dtype=object),
+        "deadline": np.array([datetime.datetime(2026, 1, 1), datetime.datetime(2026, 1, 1), None,
+                              datetime.datetime(2026, 1, 1)], dtype="datetime64[us]"),
+    }
+
+def _risks():
+    return {
+        "project_id": np.array([1, 1], dtype=np.int64),
+        "probability": np.array([5, 2], dtype=np.int64),
+        "impact": np.array([4, 0], dtype=np.int64),
+        "status": np.array(["open", "closed"], dtype=object),
+    }
+
+def test_budget_summary_keeps_exact_cents():
+    summary = pa.budget_summary(_budgets())
+    assert summary["total_planned"] == Decimal("10200.60")
+    assert summary["total_actual"] == Decimal("5250.05")
+    assert summary["variance"] == Decimal("4950.55")
+    assert summary["categories"]["capital"]["variance"] == Decimal("4950.05")
+    assert summary["categories"]["training"]["planned"] == Decimal("0.50")
+
+def test_dashboard_summary_counts():
+    data = pa.dashboard_summary(_projects(), _budgets(), _tasks(), _risks(), NOW)
+    assert data["projects"] == {"total": 2, "active": 1, "completed": 1, "completion_rate": 50.0}
+    assert data["tasks"]["completed"] == 2
+    assert data["tasks"]["overdue"] == 1
+    assert data["risks"] == {"total": 2, "high_risk": 1, "open": 1}
+
+def test_project_performance_groups_by_project():
+    rows = pa.project_performance(_projects(), _budgets(), _tasks(), _risks())
+    first, second = rows
+    assert first["project_id"] == 1
+    assert round(first["task_completion_rate"], 2) == 33.33
+    assert first["risk_score"] == 10.0
+    assert second["task_completion_rate"] == 100.0
+    assert second["budget_performance"] == -25.0
+    assert second["risk_score"] == 0.0
+
+def test_empty_inputs():
+    empty = lambda d: {k: v[:0] for k, v in d.items()}
+    data = pa.dashboard_summary(empty(_projects()), empty(_budgets()), empty(_tasks()), empty(_risks()), NOW)
+    assert data["tasks"]["total"] == 0
+    assert data["budget"]["total_planned"] == Decimal("0")
+    assert pa.project_performance(empty(_projects()), _budgets(), _tasks(), _risks()) == []
@@ -0,0 +1,35 @@
+import datetime
+import numpy as np
+from app.resource_capacity import capacity_matrix, week_start
+
+START = datetime.date(2026, 1, 5)  # a Monday
+
+def _dates(values):
+    return np.array(values, dtype="datetime64[D]")
+
+def test_week_start_is_monday():
+    assert week_start(datetime.date(2026, 1, 8)) == START
+    assert week_start(START) == START
+
+def test_partial_weeks_are_prorated_by_day():
+    load, over = capacity_matrix(
+        np.array([1], dtype=np.int64), np.array([10000], dtype=np.int64),
+        np.array([1], dtype=np.int64),
+        _dates(["2026-01-08"]), _dates(["2026-01-14"]),  # Thu..Wed
+        np.array([7000], dtype=np.int64), START, 3
+    )
+    assert load.tolist() == [[40.0, 30.0, 0.0]]
+    assert not over.any()
+
+def test_overlapping_assignments_flag_over_allocation():
+    resource_ids = np.array([1, 2], dtype=np.int64)
+    availability = np.array([10000, 5000], dtype=np.int64)  # 1.0 and 0.5 FTE
+    load, over = capacity_matrix(
+        resource_ids, availability,
+        np.array([1, 1, 2, 99], dtype=np.int64),
+        _dates(["2026-01-05", "2026-01-12", None, "2026-01-05"]),
+        _dates(["2026-01-25", None, "2026-01-11", None]),
+        np.array([6000, 6000, 6000, 10000], dtype=np.int64), START, 3
+    )
+    assert load.tolist() == [[60.0, 120.0, 120.0], [60.0, 0.0, 0.0]]
+    assert over.tolist() == [[False, True, True], [True, False, False]]
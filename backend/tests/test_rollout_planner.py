@@ -0,0 +1,63 @@
+import datetime
+from sqlalchemy import create_engine, insert, select, func
+from sqlalchemy.orm import Session
+from app import models
+from app.rollout_planner import build_schedule, plan_rollouts
+
+START = datetime.date(2026, 1, 5)
+
+def test_district_weekly_capacity_is_respected():
+    stores = [(i, "D1") for i in range(5)] + [(10 + i, "D2") for i in range(2)]
+    scheduled, unscheduled = build_schedule(stores, START, weekly_capacity=2)
+
+    assert unscheduled == []
+    assert len(scheduled) == 7
+    per_week = {}
+    for store_id, phase, week_start in scheduled:
+        district = "D1" if store_id < 10 else "D2"
+        per_week[(district, week_start)] = per_week.get((district, week_start), 0) + 1
+    assert max(per_week.values()) <= 2
+    assert max(week_start for _, _, week_start in scheduled) == START + datetime.timedelta(weeks=2)
+
+def test_existing_load_and_overrides():
+    stores = [(i, "D1") for i in range(3)]
+    scheduled, _ = build_schedule(
+        stores, START, weekly_capacity=5,
+        district_capacity={"D1": 2},
+        existing_load={("D1", 0): 2}
+    )
+    # week 0 is already full from other projects
+    assert [week_start for _, _, week_start in scheduled] == [
+        START + datetime.timedelta(weeks=1),
+        START + datetime.timedelta(weeks=1),
+        START + datetime.timedelta(weeks=2),
+    ]
+
+def test_phases_group_weeks_and_zero_capacity_is_unscheduled():
+    stores = [(i, "D1") for i in range(4)] + [(99, "Closed")]
+    scheduled, unscheduled = build_schedule(
+        stores, START, weekly_capacity=1,
+        district_capacity={"Closed": 0},
+        weeks_per_phase=2
+    )
+    assert unscheduled == [99]
+    assert [phase for _, phase, _ in scheduled] == [1, 1, 2, 2]
+
+def test_large_fleet_schedules_quickly():
+    stores = [(i, f"D{i % 100}") for i in range(5000)]
+    scheduled, _ = build_schedule(stores, START, weekly_capacity=5)
+    assert len(scheduled) == 5000
+    assert max(week_start for _, _, week_start in scheduled) == START + datetime.timedelta(weeks=9)
+
+def test_repeated_project_ids_are_planned_once():
+    engine = create_engine("sqlite://")
+    for model in (models.Store, models.ProjectStore):
+        model.__table__.create(engine)
+    with Session(engine) as db:
+        db.execute(insert(models.Store.__table__), [
+            {"id": i, "store_number": f"{i:04d}", "name": f"S{i}", "district": "D1", "is_active": True}
+            for i in range(1, 4)
+        ])
+        plans = plan_rollouts(db, [7, 8, 7], START, weekly_capacity=2)
+        assert [plan["project_id"] for plan in plans] == [7, 8]
+        assert db.execute(select(func.count()).select_from(models.ProjectStore.__table__)).scalar() == 6
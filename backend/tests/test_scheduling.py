@@ -0,0 +1,40 @@
+import datetime
+import pytest
+from app.scheduling import compute_schedule, schedule_rows, to_dates, CycleError
+
+# 1 -> 2 -> 4 and 1 -> 3 -> 4, with 3 the short branch
+TASKS = [(1, 8, None, None), (2, 16, None, None), (3, 4, None, None), (4, 8, None, None), (5, 2, None, 4)]
+EDGES = [(1, 2, 0), (1, 3, 0), (2, 4, 0), (3, 4, 2)]
+
+def _by_id(schedule):
+    return {row["task_id"]: row for row in schedule_rows(schedule)}
+
+def test_forward_and_backward_pass():
+    schedule = compute_schedule(TASKS, EDGES)
+    tasks = _by_id(schedule)
+    assert schedule["finish"] == 32
+    assert schedule["critical_path"] == [1, 2, 4]
+    assert (tasks[3]["earliest_start"], tasks[3]["latest_start"], tasks[3]["slack"]) == (8, 18, 10)
+    assert [t for t in sorted(tasks) if tasks[t]["critical"]] == [1, 2, 4]
+    # the unlinked subtask floats, and its parent reports the subtree span
+    assert tasks[5]["slack"] == 30
+    assert (tasks[4]["span_start"], tasks[4]["span_finish"]) == (0, 32)
+    assert "span_start" not in tasks[2]
+
+def test_missed_deadline_gives_negative_slack():
+    tasks = [(1, 8, None, None), (2, 16, 16, None), (3, 2, None, None)]
+    schedule = compute_schedule(tasks, [(1, 2, 0)])
+    rows = _by_id(schedule)
+    assert rows[2]["slack"] == -8
+    assert rows[1]["critical"] and rows[2]["critical"] and not rows[3]["critical"]
+
+def test_cycle_is_reported_with_task_ids():
+    with pytest.raises(CycleError) as exc:
+        compute_schedule([(10, 1, None, None), (11, 1, None, None), (12, 1, None, None)],
+                         [(10, 11, 0), (11, 10, 0), (10, 12, 0)])
+    assert exc.value.task_ids == [10, 11, 12]
+
+def test_hours_to_dates():
+    origin = datetime.date(2026, 1, 5)
+    assert to_dates(origin, [0, 8]) == [origin, datetime.date(2026, 1, 6)]
+    assert to_dates(origin, [8, 9], finish=True) == [origin, datetime.date(2026, 1, 6)]
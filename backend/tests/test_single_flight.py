@@ -0,0 +1,68 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+from app.single_flight import SingleFlight, coalesce, request_key, visibility_scope
+
+def test_concurrent_callers_share_one_call():
+    group = SingleFlight(grace=0)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.1)
+        return {"total": 42}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(group.do("k", compute))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert results == [{"total": 42}] * 8
+    group.do("k", compute)
+    assert len(calls) == 2  # nothing kept without a grace window
+
+def test_grace_window_and_failures():
+    group = SingleFlight(grace=60)
+    calls = []
+
+    def fail():
+        calls.append(1)
+        raise ValueError("boom")
+
+    for _ in range(2):
+        try:
+            group.do("k", fail)
+        except ValueError:
+            pass
+    assert len(calls) == 2
+    assert group.do("k", lambda: 1) == 1
+    assert group.do("k", lambda: 2) == 1
+
+def test_async_handlers_coalesce_by_scope():
+    group = SingleFlight(grace=0)
+    calls = []
+
+    @coalesce(scope=visibility_scope, group=group)
+    async def handler(project_id=None, current_user=None, db=None):
+        calls.append(current_user.id)
+        await asyncio.sleep(0.05)
+        return {"project_id": project_id}
+
+    admin = SimpleNamespace(id=1, role="admin", store_number=None)
+    manager = SimpleNamespace(id=2, role="manager", store_number=None)
+    user = SimpleNamespace(id=3, role="user", store_number="0042")
+
+    async def burst():
+        return await asyncio.gather(
+            handler(project_id=5, current_user=admin, db="a"),
+            handler(project_id=5, current_user=manager, db="b"),
+            handler(project_id=5, current_user=user, db="c"),
+            handler(project_id=6, current_user=admin, db="d"),
+        )
+    results = asyncio.run(burst())
+    assert [r["project_id"] for r in results] == [5, 5, 5, 6]
+    assert sorted(calls) == [1, 1, 3]
+    assert request_key("x", {"a": [1, 2], "db": object()}, user) == ("x", (("a", (1, 2)),), ("user", 3))
@@ -0,0 +1,17 @@
+import numpy as np
+from app.skill_matching import normalize_skills, rank_candidates
+
+def test_normalize_skills_matrix():
+    assert normalize_skills({" POS ": 4, "Network  Setup": 3.0, "Forklift": True, "Deli": False}) == {
+        "pos": 4, "network setup": 3, "forklift": None
+    }
+    assert normalize_skills(["POS", "pos"]) == {"pos": None}
+    assert normalize_skills(None) == {}
+
+def test_rank_prefers_overlap_then_capacity():
+    matched = np.array([1, 2, 2, 2])
+    availability = np.array([10000, 5000, 10000, 10000])
+    remaining = np.array([10000, 5000, 2000, 9000])
+    score, order = rank_candidates(2, matched, availability, remaining)
+    assert order.tolist() == [3, 2, 1, 0]
+    assert score[3] > score[2] > score[1]
@@ -0,0 +1,32 @@
+from app.store_search import StoreSearchIndex
+
+def _index():
+    index = StoreSearchIndex()
+    index.add(1, "1001", "Bentonville Supercenter", "Central", "D1", "Supercenter")
+    index.add(2, "1002", "Rogers Neighborhood Market", "Central", "D1", "Neighborhood Market")
+    index.add(3, "2100", "Springdale Supercenter", "Central", "D2", "Supercenter")
+    index.add(4, "100", "Supply Depot", "East", "D9", "Warehouse")
+    return index
+
+def test_store_number_prefix_ranks_exact_match_first():
+    assert _index().search("100") == [4, 1, 2]
+
+def test_name_substring_and_filters():
+    index = _index()
+    assert index.search("supercenter") == [3, 1]  # shorter names rank first
+    assert index.search("supercenter", district="D2") == [3]
+    assert index.search("market", format="Neighborhood Market") == [2]
+    assert index.search("sup") == [4, 3, 1]
+
+def test_incremental_add_and_reindex():
+    index = _index()
+    index.add(5, "3001", "Bella Vista Supercenter", "Central", "D1", "Supercenter")
+    assert 5 in index.search("vista")
+    index.add(5, "3001", "Bella Vista Market", "Central", "D1", "Neighborhood Market")
+    assert 5 not in index.search("supercenter")
+    assert index.max_id == 5
+
+def test_inactive_stores_are_hidden():
+    index = _index()
+    index.add(6, "4000", "Closed Store", is_active=False)
+    assert index.search("closed") == []
@@ -0,0 +1,51 @@
+import pytest
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session
+from app import crud, models, schemas
+from app.task_batch import apply, group_updates
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    for model in (models.Project, models.Task):
+        model.__table__.create(engine)
+    with Session(engine) as session:
+        session.execute(insert(models.Project.__table__).values(id=1, name="p", user_id=1))
+        session.execute(insert(models.Task.__table__), [
+            {"id": task_id, "title": f"t{task_id}", "description": "", "project_id": 1, "user_id": 1,
+             "status": models.TaskStatus.BACKLOG, "completion_percentage": 0, "version": 1}
+            for task_id in (1, 2)
+        ])
+        session.commit()
+        yield session
+
+def test_identical_changes_share_one_group():
+    updates = [
+        schemas.TaskBatchItem(id=1, status="complete"),
+        schemas.TaskBatchItem(id=2, completion_percentage=40),
+        schemas.TaskBatchItem(id=3, status="complete"),
+        schemas.TaskBatchItem(id=4),
+    ]
+    groups = group_updates(updates)
+    assert [ids for ids, _ in groups] == [[1, 3], [2]]
+    assert groups[0][1] == {"status": schemas.TaskStatusEnum.COMPLETE}
+
+def test_single_and_batch_updates_store_the_same_status_data(db):
+    table = models.Task.__table__
+
+    def stored(task_id):
+        row = db.execute(select(table).where(table.c.id == task_id)).first()
+        return row.status, row.completion_percentage, row.completed_at
+
+    def change(status):
+        crud.update_task(db, 1, 1, schemas.TaskUpdate(status=status))
+        apply(db, 1, [([2], {"status": schemas.TaskStatusEnum(status)})])
+        db.expire_all()
+        return stored(1), stored(2)
+
+    (single, batch) = change("complete")
+    assert single[:2] == batch[:2] == (models.TaskStatus.COMPLETE, 100) and single[2] and batch[2]
+    # completing again keeps the first stamp on both paths
+    assert change("complete") == (single, batch)
+    (single, batch) = change("in_progress")
+    assert single == batch == (models.TaskStatus.IN_PROGRESS, 100, None)
@@ -0,0 +1,97 @@
+import datetime
+import threading
+from decimal import Decimal
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session
+from app import models, task_rollup
+from app.task_rollup import apply, contribution, deltas, parent_state
+
+NOW = datetime.datetime(2026, 3, 9, 12, 0)
+EARLIER = datetime.datetime(2026, 3, 1, 9, 0)
+S = models.TaskStatus
+
+def test_contribution_weights_by_hours():
+    assert contribution(S.IN_PROGRESS, 50, Decimal("2.5")) == (1, 0, Decimal("2.5"), Decimal("125.0"))
+    assert contribution(S.COMPLETE, 10, None) == (1, 1, 1, 100)
+    assert contribution(S.CANCELLED, 80, 8) == (0, 0, 0, 0)
+
+def test_deltas_cover_updates_moves_creates_and_deletes():
+    before = {
+        1: (10, 7, contribution(S.BACKLOG, 0, 4)),
+        2: (10, 7, contribution(S.IN_PROGRESS, 50, 2)),
+        3: (None, 7, contribution(S.BACKLOG, 0, 1)),
+        4: None,
+    }
+    after = {
+        1: (10, 7, contribution(S.COMPLETE, 100, 4)),
+        2: (11, 7, contribution(S.IN_PROGRESS, 50, 2)),
+        4: (11, 7, contribution(S.BACKLOG, 0, 3)),
+    }
+    parents, projects = deltas(before, after)
+    assert parents == {10: (-1, 1, -2, 300), 11: (2, 0, 5, 100)}
+    assert projects == {7: (-1, 0, -1, 0)}
+
+def test_parent_completes_and_reopens_with_its_children():
+    assert parent_state(6, 600, 3, 3, S.IN_PROGRESS, 40, None, NOW) == (100, S.COMPLETE, NOW)
+    assert parent_state(6, 600, 3, 3, S.COMPLETE, 100, EARLIER, NOW) == (100, S.COMPLETE, EARLIER)
+    assert parent_state(6, 500, 3, 2, S.COMPLETE, 100, EARLIER, NOW) == (83, S.IN_PROGRESS, None)
+    assert parent_state(40, 2030, 2, 0, S.BACKLOG, 0, None, NOW) == (51, S.BACKLOG, None)
+    # a parent without children keeps its own completion
+    assert parent_state(0, 0, 0, 0, S.IN_PROGRESS, 30, None, NOW) == (30, S.IN_PROGRESS, None)
+
+def test_concurrent_deltas_to_one_parent_add_up(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'rollup.db'}", connect_args={"timeout": 10})
+    for model in (models.Project, models.Task):
+        model.__table__.create(engine)
+    with Session(engine) as db:
+        db.execute(insert(models.Project.__table__).values(id=7, name="p"))
+        db.execute(insert(models.Task.__table__).values(
+            id=1, title="parent", description="", project_id=7, status=S.IN_PROGRESS, completion_percentage=0,
+            child_count=2, child_done=0, child_weight=Decimal(2), child_progress=Decimal(0)
+        ))
+        db.commit()
+    # each sibling went from BACKLOG to COMPLETE
+    done = deltas({2: (1, 7, contribution(S.BACKLOG, 0, None))}, {2: (1, 7, contribution(S.COMPLETE, 100, None))})[0][1]
+    first_applied = threading.Event()
+
+    def first():
+        with Session(engine) as db:
+            apply(db, {1: done}, now=NOW)
+            first_applied.set()
+            threading.Event().wait(0.3)  # the second session starts while this one is uncommitted
+            db.commit()
+
+    def second():
+        first_applied.wait()
+        with Session(engine) as db:
+            apply(db, {1: done}, now=NOW)
+            db.commit()
+    threads = [threading.Thread(target=first), threading.Thread(target=second)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    with Session(engine) as db:
+        parent = db.execute(select(models.Task.__table__).where(models.Task.__table__.c.id == 1)).first()
+    assert (parent.child_count, parent.child_done, parent.child_progress) == (2, 2, Decimal(200))
+    assert (parent.status, parent.completion_percentage, parent.completed_at) == (S.COMPLETE, 100, NOW)
+
+def test_project_version_changes_only_with_its_completion(monkeypatch):
+    engine = create_engine("sqlite://")
+    for model in (models.Project, models.Task):
+        model.__table__.create(engine)
+    projects = models.Project.__table__
+
+    def state(db):
+        row = db.execute(select(projects).where(projects.c.id == 7)).first()
+        return row.task_weight, row.completion_percentage, row.version
+    half = (1, 0, Decimal(2), Decimal(100))  # two hours at 50%
+    with Session(engine) as db:
+        db.execute(insert(projects).values(id=7, name="p", completion_percentage=0, version=1))
+        apply(db, {}, {7: half}, now=NOW)
+        assert state(db) == (Decimal(2), 0, 1)
+        monkeypatch.setattr(task_rollup, "PROJECT_COMPLETION_FROM_TASKS", True)
+        apply(db, {}, {7: half}, now=NOW)
+        assert state(db) == (Decimal(4), 50, 2)
+        apply(db, {}, {7: half}, now=NOW)  # the counters move, completion stays at 50
+        assert state(db) == (Decimal(6), 50, 2)
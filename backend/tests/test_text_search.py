@@ -0,0 +1,79 @@
+import sqlite3
+from types import SimpleNamespace
+import pytest
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+from app import models, text_search
+from app.text_search import SEARCHABLE, fts5_query, highlight, excerpt, _sqlite_ddl
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    for model in (models.Project, models.Store, models.ProjectStore, models.Task, models.Risk):
+        model.__table__.create(engine)
+    text_search.ensure_index(engine)
+    with Session(engine) as session:
+        session.execute(insert(models.Project.__table__), [
+            {"id": 1, "name": "Kiosk rollout", "description": "Self-checkout kiosks", "user_id": 1},
+            {"id": 2, "name": "Other", "description": "Kiosk pilot elsewhere", "user_id": 2},
+        ])
+        session.execute(insert(models.Task.__table__), [
+            {"id": 1, "title": "Install kiosk", "description": "Pilot store", "project_id": 1, "user_id": 1},
+            {"id": 2, "title": "Training", "description": "Show associates the kiosk", "project_id": 1, "user_id": 1},
+            {"id": 3, "title": "Kiosk <script>alert(1)</script>", "description": "x", "project_id": 2, "user_id": 2},
+        ])
+        session.commit()
+        yield session
+
+def test_fts5_query_quotes_words_and_prefixes_last():
+    assert fts5_query('pilot "kiosk" roll') == '"pilot" "kiosk" "roll"*'
+    assert fts5_query("kiosk in") == '"kiosk" "in"'
+    assert fts5_query("  ") == ""
+
+def test_like_fallback_highlighting():
+    assert highlight("Install Checkout kiosks", ["checkout"]) == "Install <mark>Checkout</mark> kiosks"
+    text = "x" * 200 + " checkout " + "y" * 200
+    snippet = excerpt(text, ["checkout"])
+    assert "checkout" in snippet and snippet.startswith("…") and snippet.endswith("…")
+    assert highlight("<b>lt</b> & kiosk", ["lt"]) == "&lt;b&gt;<mark>lt</mark>&lt;/b&gt; &amp; kiosk"
+
+def test_sqlite_triggers_keep_index_in_sync():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE tasks (id INTEGER PRIMARY KEY, title TEXT, description TEXT)")
+    for statement in _sqlite_ddl(SEARCHABLE["task"]):
+        conn.execute(statement)
+    conn.execute("INSERT INTO tasks VALUES (1, 'Install kiosks', 'Pilot stores first')")
+    conn.execute("INSERT INTO tasks VALUES (2, 'Training', 'Associates')")
+    match = "SELECT rowid FROM tasks_fts WHERE tasks_fts MATCH ?"
+    assert conn.execute(match, (fts5_query("pilot"),)).fetchall() == [(1,)]
+    conn.execute("UPDATE tasks SET description = 'Pilot checkout' WHERE id = 2")
+    assert sorted(conn.execute(match, (fts5_query("pilot"),)).fetchall()) == [(1,), (2,)]
+    conn.execute("DELETE FROM tasks WHERE id = 1")
+    assert conn.execute(match, (fts5_query("kiosk"),)).fetchall() == []
+
+def test_sqlite_index_ignores_updates_of_other_columns():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE tasks (id INTEGER PRIMARY KEY, title TEXT, description TEXT, status TEXT)")
+    for statement in _sqlite_ddl(SEARCHABLE["task"]):
+        conn.execute(statement)
+    conn.execute("INSERT INTO tasks VALUES (1, 'Install kiosks', 'Pilot stores first', 'BACKLOG')")
+    statements = []
+    conn.set_trace_callback(statements.append)
+    conn.execute("UPDATE tasks SET status = 'COMPLETE' WHERE id = 1")
+    assert not any("tasks_fts" in statement for statement in statements)
+    conn.execute("UPDATE tasks SET title = 'Remove kiosks' WHERE id = 1")
+    assert any("tasks_fts" in statement for statement in statements)
+
+def test_fts5_search_ranks_within_the_users_scope(db):
+    assert text_search.backend_for(db) == "fts5"
+    user = SimpleNamespace(id=1, role="user", store_number=None)
+    results = text_search.search(db, "kiosk", user=user)
+    # title matches outrank description matches; project 2 and task 3 belong to user 2
+    assert [(r["type"], r["id"]) for r in results] == [("task", 1), ("project", 1), ("task", 2)]
+    assert results[0]["title"] == "Install <mark>kiosk</mark>"
+    assert text_search.search(db, "pilot", types=["project"], user=user) == []
+
+def test_fts5_highlights_are_escaped(db):
+    admin = SimpleNamespace(id=9, role="admin", store_number=None)
+    [result] = text_search.search(db, "alert", types=["task"], user=admin)
+    assert result["title"] == "Kiosk &lt;script&gt;<mark>alert</mark>(1)&lt;/script&gt;"
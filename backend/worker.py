@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Background job worker.
+Runs queued jobs from the jobs table (see app/jobs.py) until interrupted. Run as
+many worker processes as the database can take; set JOB_WORKER_THREADS=0 on the
+API when all jobs should run here instead.
+
+    python worker.py --threads 4
+    python worker.py --once      # drain the due jobs and exit (cron)
+"""
+
+import argparse
+import signal
+import threading
+
+from app import jobs
+from app.db import SessionLocal
+
+def drain():
+    """Run due jobs until none is left; returns how many ran."""
+    ran = 0
+    db = SessionLocal()
+    try:
+        jobs.requeue_stale(db)
+        while jobs.run_one(db, jobs.worker_name()) is not None:
+            ran += 1
+    finally:
+        db.close()
+    return ran
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=max(jobs.WORKER_THREADS, 1))
+    parser.add_argument("--poll", type=float, default=jobs.POLL_SECONDS, help="seconds between polls of an idle queue")
+    parser.add_argument("--once", action="store_true")
+    args = parser.parse_args()
+
+    if args.once:
+        print(f"Ran {drain()} jobs.")
+        return
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+    threads = [
+        threading.Thread(target=jobs.work, args=(SessionLocal, jobs.worker_name(index), stop, args.poll),
+                         name=f"job-worker-{index}")
+        for index in range(args.threads)
+    ]
+    for thread in threads:
+        thread.start()
+    print(f"Job worker started with {args.threads} threads.")
+    # a job in progress finishes before its thread exits
+    while any(thread.is_alive() for thread in threads):
+        for thread in threads:
+            thread.join(timeout=1)
+
+if __name__ == "__main__":
+    main()
@@ -4,10 +4,61 @@ const API_BASE = import.meta.env.VITE_API_BASE || "http://localhost:8000/api";
 
 const instance = axios.create({ baseURL: API_BASE, timeout: 10000 });
 
+// crypto.randomUUID only exists in secure contexts (HTTPS or localhost); fall back to a v4 UUID from getRandomValues
+const newIdempotencyKey = (): string => {
+  if (typeof crypto !== "undefined" && typeof crypto.randomUUID === "function") return crypto.randomUUID();
+  const bytes = new Uint8Array(16);
+  if (typeof crypto !== "undefined" && typeof crypto.getRandomValues === "function") {
+    crypto.getRandomValues(bytes);
+  } else {
+    for (let i = 0; i < bytes.length; i++) bytes[i] = Math.floor(Math.random() * 256);
+  }
+  bytes[6] = (bytes[6] & 0x0f) | 0x40;
+  bytes[8] = (bytes[8] & 0x3f) | 0x80;
+  const hex = Array.from(bytes, (b) => b.toString(16).padStart(2, "0")).join("");
+  return `${hex.slice(0, 8)}-${hex.slice(8, 12)}-${hex.slice(12, 16)}-${hex.slice(16, 20)}-${hex.slice(20)}`;
+};
+
 instance.interceptors.request.use((config) => {
   const token = localStorage.getItem("token");
   if (token && config.headers) config.headers.Authorization = `Bearer ${token}`;
+  // One key per logical create, kept across retries of the same config, so the API replays instead of creating twice
+  if (config.method === "post" && config.headers && !config.headers["Idempotency-Key"]) {
+    config.headers["Idempotency-Key"] = newIdempotencyKey();
+  }
   return config;
 });
 
+// Access tokens are short-lived; on a 401 exchange the refresh token once and replay the request.
+let refreshing: Promise<string | null> | null = null;
+
+const refreshAccessToken = async (): Promise<string | null> => {
+  const refreshToken = localStorage.getItem("refresh_token");
+  if (!refreshToken) return null;
+  try {
+    const res = await axios.post(`${API_BASE}/auth/refresh`, { refresh_token: refreshToken });
+    localStorage.setItem("token", res.data.access_token);
+    localStorage.setItem("refresh_token", res.data.refresh_token);
+    return res.data.access_token;
+  } catch {
+    localStorage.removeItem("token");
+    localStorage.removeItem("refresh_token");
+    return null;
+  }
+};
+
+instance.interceptors.response.use(
+  (response) => response,
+  async (error) => {
+    const original = error.config;
+    if (error.response?.status !== 401 || !original || original._retried) throw error;
+    original._retried = true;
+    refreshing = refreshing || refreshAccessToken().finally(() => { refreshing = null; });
+    const token = await refreshing;
+    if (!token) throw error;
+    original.headers.Authorization = `Bearer ${token}`;
+    return instance(original);
+  }
+);
+
 export default instance;
\ No newline at end of file
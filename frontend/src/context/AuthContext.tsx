@@ -31,6 +31,7 @@ export const AuthProvider: React.FC<{children:any}> = ({ children }) => {
     form.append("password", password);
     form.append("grant_type", "password");
     const res = await api.post("/auth/token", form);
+    localStorage.setItem("refresh_token", res.data.refresh_token);
     setToken(res.data.access_token);
   };
 
@@ -38,7 +39,12 @@ export const AuthProvider: React.FC<{children:any}> = ({ children }) => {
     await api.post("/auth/register", { username, password, outlook_email });
   };
 
-  const logout = () => setToken(null);
+  const logout = () => {
+    const refreshToken = localStorage.getItem("refresh_token");
+    if (refreshToken) api.post("/auth/logout", { refresh_token: refreshToken }).catch(() => undefined);
+    localStorage.removeItem("refresh_token");
+    setToken(null);
+  };
 
   return <AuthContext.Provider value={{ token, user, login, register, logout }}>{children}</AuthContext.Provider>;
 };